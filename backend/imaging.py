@@ -0,0 +1,53 @@
+"""Photo processing that server.py runs in worker processes.
+
+Kept free of server imports so a spawned worker only loads Pillow.
+"""
+import io
+
+from PIL import Image, ImageOps
+
+# Bound decode work on hostile uploads (about 8000 x 5000)
+Image.MAX_IMAGE_PIXELS = 40_000_000
+
+
+def encode_jpeg(image: Image.Image, quality: int) -> bytes:
+    buffer = io.BytesIO()
+    # A fresh save without exif= or icc_profile= drops all metadata
+    image.save(buffer, format="JPEG", quality=quality, optimize=True, progressive=True)
+    return buffer.getvalue()
+
+
+def difference_hash(image: Image.Image, size: int = 8) -> str:
+    """64-bit perceptual hash that survives resizing and re-encoding"""
+    small = image.convert("L").resize((size + 1, size), Image.LANCZOS)
+    pixels = small.tobytes()
+    value = 0
+    for row in range(size):
+        for col in range(size):
+            offset = row * (size + 1) + col
+            value = (value << 1) | (pixels[offset] > pixels[offset + 1])
+    return f"{value:0{size * size // 4}x}"
+
+
+def normalize_photo(data: bytes, max_dimension: int, quality: int, thumbnail_dimension: int, thumbnail_quality: int) -> tuple:
+    """Decode a photo and return (photo, thumbnail, perceptual hash); images are metadata-free JPEGs"""
+    try:
+        with Image.open(io.BytesIO(data)) as source:
+            # Let the JPEG decoder downscale by a power of two while decoding
+            source.draft("RGB", (max_dimension, max_dimension))
+            image = ImageOps.exif_transpose(source)
+            if image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info):
+                image = image.convert("RGBA")
+                background = Image.new("RGB", image.size, (255, 255, 255))
+                background.paste(image, mask=image.getchannel("A"))
+                image = background
+            else:
+                image = image.convert("RGB")
+    except (OSError, ValueError, Image.DecompressionBombError) as e:
+        raise ValueError("Photo could not be decoded") from e
+
+    image.thumbnail((max_dimension, max_dimension), Image.LANCZOS)
+    photo = encode_jpeg(image, quality)
+    image.thumbnail((thumbnail_dimension, thumbnail_dimension), Image.LANCZOS)
+    thumbnail = encode_jpeg(image, thumbnail_quality)
+    return photo, thumbnail, difference_hash(image)
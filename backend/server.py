@@ -1,46 +1,422 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, status, File, UploadFile, Header
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, status, File, UploadFile, Header, Form, Query
+from fastapi.responses import StreamingResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
-from motor.motor_asyncio import AsyncIOMotorClient
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorGridFSBucket
+from gridfs.errors import NoFile
+from pymongo import ReturnDocument, IndexModel, ASCENDING, DESCENDING, UpdateOne, DeleteOne, monitoring
+from pymongo.errors import BulkWriteError, DuplicateKeyError, OperationFailure
+from bson import ObjectId
+from bson.errors import InvalidId
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse, JSONResponse
 import os
 import logging
 from pathlib import Path
-from pydantic import BaseModel, Field, ConfigDict, EmailStr
-from typing import List, Optional
+from pydantic import BaseModel, Field, ConfigDict, EmailStr, ValidationError
+from typing import List, Optional, Literal
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from bisect import bisect_left
+import multiprocessing
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import asyncio
+import hashlib
+import heapq
+import hmac
+import re
+import time
 import uuid
 from datetime import datetime, timezone, timedelta
 import bcrypt
 import jwt
+import orjson
 from emergentintegrations.llm.chat import LlmChat, UserMessage
 import base64
+import binascii
+import csv
+import io
+import json
+import shutil
+import tempfile
 from twilio.rest import Client
-import requests
+import httpx
+from imaging import normalize_photo
+from verhoeff import verhoeff_check_digit, verhoeff_valid
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
+# Metrics
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+def format_labels(names: tuple, values: tuple) -> str:
+    pairs = []
+    for name, value in zip(names, values):
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        pairs.append(f'{name}="{value}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+class Counter:
+    def __init__(self, name: str, help_text: str, label_names: tuple):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels: tuple, amount: float = 1):
+        with self._lock:
+            self.values[labels] = self.values.get(labels, 0) + amount
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        for labels, value in list(self.values.items()):
+            lines.append(f"{self.name}{format_labels(self.label_names, labels)} {value}")
+        return lines
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, label_names: tuple, buckets: tuple = LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        self.series = {}  # labels -> [bucket counts, sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, labels: tuple, value: float):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self.series.get(labels)
+            if series is None:
+                series = self.series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        names = self.label_names + ("le",)
+        for labels, (counts, total, count) in list(self.series.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append(f"{self.name}_bucket{format_labels(names, labels + (bound,))} {cumulative}")
+            lines.append(f"{self.name}_bucket{format_labels(names, labels + ('+Inf',))} {count}")
+            lines.append(f"{self.name}_sum{format_labels(self.label_names, labels)} {total}")
+            lines.append(f"{self.name}_count{format_labels(self.label_names, labels)} {count}")
+        return lines
+
+class Metrics:
+    """In-process metrics registry rendered in Prometheus text format"""
+
+    def __init__(self):
+        self.requests = Counter("http_requests_total", "HTTP requests by route and status", ("method", "route", "status"))
+        self.request_errors = Counter("http_request_errors_total", "HTTP requests that raised or returned 5xx", ("method", "route"))
+        self.request_latency = Histogram("http_request_duration_seconds", "HTTP request latency", ("method", "route"))
+        self.dependency_latency = Histogram("dependency_duration_seconds", "Latency of calls to external dependencies", ("dependency", "operation"))
+        self.dependency_errors = Counter("dependency_errors_total", "Failed calls to external dependencies", ("dependency", "operation"))
+        self.in_flight = 0
+        self._gauges = []
+        self._counters = []
+
+    @contextmanager
+    def span(self, dependency: str, operation: str):
+        """Time a dependency call; works around awaits as well"""
+        start = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            self.dependency_errors.inc((dependency, operation))
+            raise
+        finally:
+            self.dependency_latency.observe((dependency, operation), time.perf_counter() - start)
+
+    def gauge(self, name: str, help_text: str, read):
+        """Register a gauge whose value is read at scrape time"""
+        self._gauges.append((name, help_text, read))
+
+    def counter(self, name: str, help_text: str, read):
+        """Register a monotonic count kept elsewhere, read at scrape time"""
+        self._counters.append((name, help_text, read))
+
+    def render(self) -> str:
+        lines = [
+            "# HELP http_requests_in_flight HTTP requests currently being served",
+            "# TYPE http_requests_in_flight gauge",
+            f"http_requests_in_flight {self.in_flight}",
+        ]
+        for name, help_text, read in self._gauges:
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} gauge", f"{name} {read()}"]
+        for name, help_text, read in self._counters:
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter", f"{name} {read()}"]
+        for metric in (self.requests, self.request_errors, self.request_latency, self.dependency_latency, self.dependency_errors):
+            lines += metric.render()
+        return "\n".join(lines) + "\n"
+
+metrics = Metrics()
+
+class MetricsMiddleware:
+    """Pure ASGI middleware, so streaming responses are not buffered"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        status_code = 500
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+        
+        metrics.in_flight += 1
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            metrics.in_flight -= 1
+            # Route templates keep label cardinality bounded
+            route = getattr(scope.get("route"), "path", "unmatched")
+            method = scope["method"]
+            metrics.request_latency.observe((method, route), time.perf_counter() - start)
+            metrics.requests.inc((method, route, status_code))
+            if status_code >= 500:
+                metrics.request_errors.inc((method, route))
+
+class UploadLimitMiddleware:
+    """Caps multipart upload bodies before the form parser spools them to disk"""
+
+    def __init__(self, app, paths: set):
+        self.app = app
+        self.paths = paths
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+        
+        limit = UPLOAD_BODY_MAX_BYTES
+        content_length = dict(scope["headers"]).get(b"content-length")
+        if content_length is not None and content_length.isdigit() and int(content_length) > limit:
+            await self._reject(send, limit)
+            return
+        
+        # Chunked bodies carry no length, so the cap is also enforced as they stream in
+        received = 0
+        exceeded = False
+        async def receive_wrapper():
+            nonlocal received, exceeded
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    exceeded = True
+                    # Ending the body early makes the parser fail; the response is replaced below
+                    return {"type": "http.request", "body": b"", "more_body": False}
+            return message
+        
+        started = False
+        async def send_wrapper(message):
+            nonlocal started
+            if not exceeded:
+                await send(message)
+            elif not started:
+                started = True
+                await self._reject(send, limit)
+        
+        await self.app(scope, receive_wrapper, send_wrapper)
+
+    async def _reject(self, send, limit: int):
+        body = json.dumps({"detail": f"Upload exceeds {limit} bytes"}).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": 413,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+        })
+        await send({"type": "http.response.body", "body": body})
+
+class MongoCommandTimer(monitoring.CommandListener):
+    """Times every Mongo command via the driver's monitoring hooks"""
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        metrics.dependency_latency.observe(("mongo", event.command_name), event.duration_micros / 1e6)
+
+    def failed(self, event):
+        metrics.dependency_latency.observe(("mongo", event.command_name), event.duration_micros / 1e6)
+        metrics.dependency_errors.inc(("mongo", event.command_name))
+
 # MongoDB connection
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+client = AsyncIOMotorClient(mongo_url, event_listeners=[MongoCommandTimer()])
 db = client[os.environ['DB_NAME']]
 
 # JWT Config
 JWT_SECRET = os.environ.get('JWT_SECRET_KEY', 'your-secret-key')
 JWT_ALGORITHM = os.environ.get('JWT_ALGORITHM', 'HS256')
 JWT_EXPIRATION_DAYS = int(os.environ.get('JWT_EXPIRATION_DAYS', 7))
+# Lifetime of the query-string ticket that opens the admin event stream
+STREAM_TICKET_SECONDS = int(os.environ.get('STREAM_TICKET_SECONDS', 60))
+STREAM_TICKET_AUDIENCE = "card-events"
+
+# Principal Cache Config
+PRINCIPAL_CACHE_SIZE = int(os.environ.get('PRINCIPAL_CACHE_SIZE', 10000))
+PRINCIPAL_CACHE_TTL_SECONDS = float(os.environ.get('PRINCIPAL_CACHE_TTL_SECONDS', 60))
+# Tokens younger than this are trusted without a lookup (0 disables)
+PRINCIPAL_TRUST_JWT_SECONDS = int(os.environ.get('PRINCIPAL_TRUST_JWT_SECONDS', 0))
+
+# Password Hashing Pool Config
+PASSWORD_POOL_WORKERS = int(os.environ.get('PASSWORD_POOL_WORKERS', os.cpu_count() or 4))
+PASSWORD_POOL_MAX_QUEUE = int(os.environ.get('PASSWORD_POOL_MAX_QUEUE', 256))
+
+# Verification Queue Config
+VERIFICATION_WORKERS = int(os.environ.get('VERIFICATION_WORKERS', 2))
+VERIFICATION_MAX_ATTEMPTS = int(os.environ.get('VERIFICATION_MAX_ATTEMPTS', 5))
+VERIFICATION_BACKOFF_SECONDS = float(os.environ.get('VERIFICATION_BACKOFF_SECONDS', 5))
+VERIFICATION_LEASE_SECONDS = int(os.environ.get('VERIFICATION_LEASE_SECONDS', 300))
+VERIFICATION_POLL_SECONDS = float(os.environ.get('VERIFICATION_POLL_SECONDS', 2))
+
+# Pre-screening Config
+PRESCREEN_AUTO_PASS = os.environ.get('PRESCREEN_AUTO_PASS', 'true').lower() == 'true'
+PRESCREEN_MIN_FAMILY_MEMBERS = int(os.environ.get('PRESCREEN_MIN_FAMILY_MEMBERS', 1))
+PRESCREEN_MAX_FAMILY_MEMBERS = int(os.environ.get('PRESCREEN_MAX_FAMILY_MEMBERS', 20))
+PRESCREEN_TYPICAL_FAMILY_MEMBERS = int(os.environ.get('PRESCREEN_TYPICAL_FAMILY_MEMBERS', 10))
+PRESCREEN_MIN_ADDRESS_LENGTH = int(os.environ.get('PRESCREEN_MIN_ADDRESS_LENGTH', 20))
+
+# Verification Cache Config
+VERIFICATION_CACHE_SIZE = int(os.environ.get('VERIFICATION_CACHE_SIZE', 5000))
+VERIFICATION_CACHE_TTL_SECONDS = int(os.environ.get('VERIFICATION_CACHE_TTL_SECONDS', 7 * 24 * 3600))
+
+# Blob Storage Config
+BLOB_BACKEND = os.environ.get('BLOB_BACKEND', 'gridfs')  # gridfs or local
+BLOB_DIR = Path(os.environ.get('BLOB_DIR', ROOT_DIR / 'blobs'))
+BLOB_CHUNK_SIZE = int(os.environ.get('BLOB_CHUNK_SIZE', 256 * 1024))
+BLOB_MIGRATE_ON_STARTUP = os.environ.get('BLOB_MIGRATE_ON_STARTUP', 'true').lower() == 'true'
+# A concurrent upload of the same blob that adds no chunk for this long is treated as dead
+BLOB_UPLOAD_STALL_SECONDS = float(os.environ.get('BLOB_UPLOAD_STALL_SECONDS', 10))
+BLOB_UPLOAD_POLL_SECONDS = 0.1
+
+# Admin Listing Config
+ADMIN_PAGE_SIZE = int(os.environ.get('ADMIN_PAGE_SIZE', 50))
+ADMIN_MAX_PAGE_SIZE = int(os.environ.get('ADMIN_MAX_PAGE_SIZE', 500))
+
+# Index Config
+INDEX_DIAGNOSTICS = os.environ.get('INDEX_DIAGNOSTICS', 'warn')  # off, warn or strict
+
+# Card Number Config
+CARD_NUMBER_PREFIX = os.environ.get('CARD_NUMBER_PREFIX', 'RC')
+CARD_NUMBER_REGION = os.environ.get('CARD_NUMBER_REGION', '00')  # digits, e.g. district + shop code
+CARD_NUMBER_BLOCK_SIZE = int(os.environ.get('CARD_NUMBER_BLOCK_SIZE', 100))
+
+# Bulk Action Config
+BULK_MAX_CARDS = int(os.environ.get('BULK_MAX_CARDS', 10000))
+
+# Export Config
+EXPORT_BATCH_SIZE = int(os.environ.get('EXPORT_BATCH_SIZE', 1000))
+
+# Import Config
+IMPORT_BATCH_SIZE = int(os.environ.get('IMPORT_BATCH_SIZE', 500))
+IMPORT_MAX_ROWS = int(os.environ.get('IMPORT_MAX_ROWS', 100000))
+IMPORT_MAX_RECORD_LINES = int(os.environ.get('IMPORT_MAX_RECORD_LINES', 20))  # lines one quoted CSV field may span
+IMPORT_MAX_BYTES = int(os.environ.get('IMPORT_MAX_BYTES', 256 * 1024 * 1024))
+IMPORT_WORKERS = int(os.environ.get('IMPORT_WORKERS', 1))
+IMPORT_MAX_ATTEMPTS = int(os.environ.get('IMPORT_MAX_ATTEMPTS', 3))  # claims, counting ones cut short by a restart
+IMPORT_LEASE_SECONDS = int(os.environ.get('IMPORT_LEASE_SECONDS', 300))  # renewed after every batch
+IMPORT_POLL_SECONDS = float(os.environ.get('IMPORT_POLL_SECONDS', 2))
+
+# Upload Config
+UPLOAD_MAX_BYTES = int(os.environ.get('UPLOAD_MAX_BYTES', 10 * 1024 * 1024))
+# Whole multipart body: both documents plus the form fields
+UPLOAD_BODY_MAX_BYTES = int(os.environ.get('UPLOAD_BODY_MAX_BYTES', 2 * UPLOAD_MAX_BYTES + 64 * 1024))
+
+# Photo Config
+PHOTO_MAX_DIMENSION = int(os.environ.get('PHOTO_MAX_DIMENSION', 1024))
+PHOTO_QUALITY = int(os.environ.get('PHOTO_QUALITY', 85))
+PHOTO_THUMBNAIL_DIMENSION = int(os.environ.get('PHOTO_THUMBNAIL_DIMENSION', 160))
+PHOTO_THUMBNAIL_QUALITY = int(os.environ.get('PHOTO_THUMBNAIL_QUALITY', 70))
+PHOTO_POOL_WORKERS = int(os.environ.get('PHOTO_POOL_WORKERS', os.cpu_count() or 2))
+PHOTO_POOL_MAX_QUEUE = int(os.environ.get('PHOTO_POOL_MAX_QUEUE', 64))
+
+# Duplicate Detection Config
+AADHAAR_HASH_KEY = os.environ.get('AADHAAR_HASH_KEY', 'aadhaar-index')
+DUPLICATE_TEXT_THRESHOLD = float(os.environ.get('DUPLICATE_TEXT_THRESHOLD', 0.7))  # estimated trigram Jaccard
+DUPLICATE_PHOTO_DISTANCE = int(os.environ.get('DUPLICATE_PHOTO_DISTANCE', 3))  # differing bits of 64
+# One photo hash band per allowed bit plus one; past 15, bands of under 4 bits match nearly everything
+if not 0 <= DUPLICATE_PHOTO_DISTANCE <= 15:
+    raise ValueError("DUPLICATE_PHOTO_DISTANCE must be between 0 and 15")
+DUPLICATE_CANDIDATE_LIMIT = int(os.environ.get('DUPLICATE_CANDIDATE_LIMIT', 200))
+DUPLICATE_BACKFILL_ON_STARTUP = os.environ.get('DUPLICATE_BACKFILL_ON_STARTUP', 'true').lower() == 'true'
+
+# Stats Config
+STATS_RECONCILE_SECONDS = float(os.environ.get('STATS_RECONCILE_SECONDS', 3600))
+STATS_RECONCILE_ATTEMPTS = int(os.environ.get('STATS_RECONCILE_ATTEMPTS', 3))
+
+# Card Event Feed Config
+CARD_EVENTS_SOURCE = os.environ.get('CARD_EVENTS_SOURCE', 'auto')  # auto, change_stream or events
+CARD_EVENTS_TTL_SECONDS = int(os.environ.get('CARD_EVENTS_TTL_SECONDS', 24 * 3600))
+CARD_EVENTS_POLL_SECONDS = float(os.environ.get('CARD_EVENTS_POLL_SECONDS', 1))
+CARD_EVENTS_HEARTBEAT_SECONDS = float(os.environ.get('CARD_EVENTS_HEARTBEAT_SECONDS', 15))
 
 # Twilio Config
-twilio_client = Client(
-    os.environ['TWILIO_ACCOUNT_SID'],
-    os.environ['TWILIO_AUTH_TOKEN']
-)
-TWILIO_PHONE = os.environ['TWILIO_PHONE_NUMBER']
+TWILIO_ACCOUNT_SID = os.environ.get('TWILIO_ACCOUNT_SID')
+TWILIO_AUTH_TOKEN = os.environ.get('TWILIO_AUTH_TOKEN')
+TWILIO_PHONE = os.environ.get('TWILIO_PHONE_NUMBER')
+
+# SMS Delivery Config
+SMS_BACKEND = os.environ.get('SMS_BACKEND', 'twilio')  # twilio or fake
+SMS_WORKERS = int(os.environ.get('SMS_WORKERS', 8))
+SMS_RATE_PER_SECOND = float(os.environ.get('SMS_RATE_PER_SECOND', 10))
+SMS_BURST = int(os.environ.get('SMS_BURST', 20))
+SMS_BATCH_SIZE = int(os.environ.get('SMS_BATCH_SIZE', 500))
+SMS_MAX_ATTEMPTS = int(os.environ.get('SMS_MAX_ATTEMPTS', 6))
+SMS_BACKOFF_SECONDS = float(os.environ.get('SMS_BACKOFF_SECONDS', 10))
+SMS_LEASE_SECONDS = int(os.environ.get('SMS_LEASE_SECONDS', 120))
+SMS_POLL_SECONDS = float(os.environ.get('SMS_POLL_SECONDS', 2))
+SMS_FAKE_MAX_MESSAGES = int(os.environ.get('SMS_FAKE_MAX_MESSAGES', 1000))
+
+# Slot Scheduling Config
+SCHEDULE_INSERT_BATCH_SIZE = int(os.environ.get('SCHEDULE_INSERT_BATCH_SIZE', 1000))
+
+# Outbound HTTP Config
+OAUTH_SESSION_URL = os.environ.get('OAUTH_SESSION_URL', 'https://demobackend.emergentagent.com/auth/v1/env/oauth/session-data')
+HTTP_CONNECT_TIMEOUT = float(os.environ.get('HTTP_CONNECT_TIMEOUT', 5))
+HTTP_READ_TIMEOUT = float(os.environ.get('HTTP_READ_TIMEOUT', 10))
+HTTP_MAX_CONNECTIONS = int(os.environ.get('HTTP_MAX_CONNECTIONS', 100))
+HTTP_MAX_KEEPALIVE = int(os.environ.get('HTTP_MAX_KEEPALIVE', 20))
+HTTP_RETRIES = int(os.environ.get('HTTP_RETRIES', 2))
+HTTP_RETRY_BACKOFF_SECONDS = float(os.environ.get('HTTP_RETRY_BACKOFF_SECONDS', 0.2))
 
 # Emergent LLM Key
 EMERGENT_LLM_KEY = os.environ['EMERGENT_LLM_KEY']
 
-app = FastAPI()
+# Response Serialization
+def json_default(value):
+    """orjson fallback for the types it does not encode natively"""
+    if isinstance(value, BaseModel):
+        return value.model_dump()
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+class FastJSONResponse(JSONResponse):
+    """orjson-encoded JSON; returning it from a handler also skips FastAPI's jsonable_encoder pass"""
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, default=json_default, option=orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS)
+
+app = FastAPI(default_response_class=FastJSONResponse)
 api_router = APIRouter(prefix="/api")
 security = HTTPBearer()
 
@@ -83,6 +459,11 @@ class RationCardApplication(BaseModel):
     income_proof: str  # base64 encoded
     photo: str  # base64 encoded
 
+class BlobRef(BaseModel):
+    blob_id: str  # sha256 of the content
+    content_type: str
+    size: int
+
 class RationCard(BaseModel):
     model_config = ConfigDict(extra="ignore")
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -92,10 +473,13 @@ class RationCard(BaseModel):
     address: str
     family_members: int
     aadhaar: str
-    income_proof: str
-    photo: str
-    status: str = "pending"  # pending, approved, rejected, fake
+    income_proof: Optional[BlobRef] = None
+    photo: Optional[BlobRef] = None
+    photo_thumbnail: Optional[BlobRef] = None
+    photo_hash: Optional[str] = None  # perceptual hash of the photo
+    status: str = "verifying"  # verifying, pending, approved, rejected, fake
     ai_verification_result: Optional[str] = None
+    verification_job_id: str = Field(default_factory=lambda: str(uuid.uuid4()))  # only this job may settle the card
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
@@ -111,6 +495,105 @@ class TokenDistribution(BaseModel):
     user_ids: List[str]
     message: str
     time_slot: str
+    distribution_id: Optional[str] = None  # reuse to retry a request without double-sending
+
+class CardFilter(BaseModel):
+    status: Optional[str] = None  # comma-separated
+    created_from: Optional[str] = None
+    created_to: Optional[str] = None
+    card_number: Optional[str] = None
+
+class BulkCardAction(BaseModel):
+    action: Literal["approve", "reject", "delete"]
+    card_ids: Optional[List[str]] = None
+    filter: Optional[CardFilter] = None
+    region: Optional[str] = None  # card number region/shop code for approvals
+
+class SlotScheduleRequest(BaseModel):
+    name: str
+    slots: List[str]  # e.g. "2025-11-03 10:00-11:00"
+    capacity_per_slot: int  # family members the shop can serve per slot
+    card_ids: Optional[List[str]] = None  # defaults to every approved card
+
+class SlotNotification(BaseModel):
+    message: str
+
+# In-process Caches
+class TTLCache:
+    """Bounded LRU cache with a per-entry TTL"""
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key: str):
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        value, expires_at = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: str, value):
+        if self.max_size <= 0:
+            return
+        self._entries[key] = (value, time.monotonic() + self.ttl_seconds)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key: str):
+        if self._entries.pop(key, None) is not None:
+            self.invalidations += 1
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+class PrincipalCache(TTLCache):
+    """Resolved users keyed by user id"""
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        super().__init__(max_size, ttl_seconds)
+        self.jwt_trusted = 0
+
+    def put(self, user: User):
+        self.set(user.id, user)
+
+    def stats(self) -> dict:
+        stats = super().stats()
+        stats["jwt_trusted"] = self.jwt_trusted
+        return stats
+
+# Users are only ever inserted (register, first Google login), so cached entries cannot go
+# stale. Any endpoint that later changes or deletes a user, e.g. its role, must call
+# principal_cache.invalidate(user_id) after the write; JWTs inside the
+# PRINCIPAL_TRUST_JWT_SECONDS window keep their claims until that window passes.
+principal_cache = PrincipalCache(PRINCIPAL_CACHE_SIZE, PRINCIPAL_CACHE_TTL_SECONDS)
 
 # Helper Functions
 def hash_password(password: str) -> str:
@@ -119,73 +602,1969 @@ def hash_password(password: str) -> str:
 def verify_password(password: str, hashed: str) -> bool:
     return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
 
-def create_jwt_token(user_id: str, email: str, role: str) -> str:
-    expiration = datetime.now(timezone.utc) + timedelta(days=JWT_EXPIRATION_DAYS)
+# Blob Storage
+DOCUMENT_FIELDS = ("income_proof", "photo")
+DOWNLOADABLE_DOCUMENTS = DOCUMENT_FIELDS + ("photo_thumbnail",)
+DATA_URL_RE = re.compile(r"^data:([^;,]*)[^,]*;base64,", re.IGNORECASE)
+
+def decode_document(value: str) -> tuple:
+    """Split a base64 (data URL) upload into bytes and a content type"""
+    content_type = "application/octet-stream"
+    match = DATA_URL_RE.match(value)
+    if match:
+        content_type = match.group(1) or content_type
+        value = value[match.end():]
+    try:
+        data = base64.b64decode(value, validate=True)
+    except (binascii.Error, ValueError):
+        raise HTTPException(status_code=400, detail="Document is not valid base64")
+    if not data:
+        raise HTTPException(status_code=400, detail="Empty document")
+    return data, content_type
+
+class GridFSBlobStore:
+    """Content-addressed blobs in a GridFS bucket, keyed by sha256"""
+
+    def __init__(self, database, bucket_name: str = "blobs"):
+        self.files = database[f"{bucket_name}.files"]
+        self.chunks = database[f"{bucket_name}.chunks"]
+        self.bucket = AsyncIOMotorGridFSBucket(database, bucket_name=bucket_name)
+
+    async def exists(self, blob_id: str) -> bool:
+        return await self.files.find_one({"_id": blob_id}, {"_id": 1}) is not None
+
+    async def put(self, blob_id: str, source, content_type: str):
+        for attempt in range(2):
+            try:
+                await self.bucket.upload_from_stream_with_id(
+                    blob_id, blob_id, source, metadata={"content_type": content_type}
+                )
+                return
+            except DuplicateKeyError:
+                # A concurrent upload of the same content got its chunks in first
+                if await self._wait_for_upload(blob_id):
+                    return
+                if attempt:
+                    raise
+            # That upload died part-way; clear its orphaned chunks and write again
+            logging.warning(f"Replacing orphaned chunks of blob {blob_id}")
+            await self.chunks.delete_many({"files_id": blob_id})
+            source.seek(0)
+
+    async def _wait_for_upload(self, blob_id: str) -> bool:
+        """Wait for another upload of the blob to write its files document; False once it stalls"""
+        chunks = None
+        stalled = 0.0
+        while stalled < BLOB_UPLOAD_STALL_SECONDS:
+            if await self.exists(blob_id):
+                return True
+            count = await self.chunks.count_documents({"files_id": blob_id})
+            if count != chunks:
+                chunks = count
+                stalled = 0.0
+            await asyncio.sleep(BLOB_UPLOAD_POLL_SECONDS)
+            stalled += BLOB_UPLOAD_POLL_SECONDS
+        return await self.exists(blob_id)
+
+    async def stream(self, blob_id: str, start: int, end: int):
+        try:
+            grid_out = await self.bucket.open_download_stream(blob_id)
+        except NoFile:
+            raise HTTPException(status_code=404, detail="Document not found")
+        grid_out.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = await grid_out.read(min(BLOB_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+class LocalBlobStore:
+    """Content-addressed blobs on the local filesystem, keyed by sha256"""
+
+    def __init__(self, root: Path):
+        self.root = root
+
+    def _path(self, blob_id: str) -> Path:
+        return self.root / blob_id[:2] / blob_id
+
+    async def exists(self, blob_id: str) -> bool:
+        return await asyncio.to_thread(self._path(blob_id).exists)
+
+    def _write(self, blob_id: str, source):
+        path = self._path(blob_id)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(f".{uuid.uuid4().hex}.tmp")
+        with open(tmp_path, "wb") as handle:
+            shutil.copyfileobj(source, handle, BLOB_CHUNK_SIZE)
+        os.replace(tmp_path, path)
+
+    async def put(self, blob_id: str, source, content_type: str):
+        await asyncio.to_thread(self._write, blob_id, source)
+
+    async def stream(self, blob_id: str, start: int, end: int):
+        try:
+            handle = await asyncio.to_thread(open, self._path(blob_id), "rb")
+        except FileNotFoundError:
+            raise HTTPException(status_code=404, detail="Document not found")
+        try:
+            await asyncio.to_thread(handle.seek, start)
+            remaining = end - start + 1
+            while remaining > 0:
+                chunk = await asyncio.to_thread(handle.read, min(BLOB_CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
+        finally:
+            handle.close()
+
+class BlobService:
+    """Stores decoded documents once and hands out references"""
+
+    def __init__(self, store):
+        self.store = store
+        self.stored = 0
+        self.deduplicated = 0
+
+    async def _store(self, blob_id: str, source, content_type: str, size: int) -> dict:
+        if await self.store.exists(blob_id):
+            self.deduplicated += 1
+        else:
+            await self.store.put(blob_id, source, content_type)
+            self.stored += 1
+        return {"blob_id": blob_id, "content_type": content_type, "size": size}
+
+    async def put(self, data: bytes, content_type: str) -> dict:
+        blob_id = hashlib.sha256(data).hexdigest()
+        return await self._store(blob_id, io.BytesIO(data), content_type, len(data))
+
+    async def put_encoded(self, value: str) -> dict:
+        data, content_type = decode_document(value)
+        return await self.put(data, content_type)
+
+    async def _checked_chunks(self, upload: UploadFile, allowed_types: tuple, max_bytes: int):
+        """Yield (chunk, content type) while enforcing the type and size limits"""
+        size = 0
+        content_type = None
+        while True:
+            chunk = await upload.read(BLOB_CHUNK_SIZE)
+            if not chunk:
+                break
+            if content_type is None:
+                content_type = sniff_content_type(chunk)
+                if content_type not in allowed_types:
+                    raise HTTPException(status_code=415, detail=f"Unsupported {upload.filename or 'document'} type")
+            size += len(chunk)
+            if size > max_bytes:
+                raise HTTPException(status_code=413, detail=f"Document exceeds {max_bytes} bytes")
+            yield chunk, content_type
+        if size == 0:
+            raise HTTPException(status_code=400, detail="Empty document")
+
+    async def put_upload(self, upload: UploadFile, allowed_types: tuple, max_bytes: int = UPLOAD_MAX_BYTES) -> dict:
+        """Hash and type-check an upload chunk by chunk, then stream it to the store"""
+        digest = hashlib.sha256()
+        size = 0
+        content_type = None
+        async for chunk, content_type in self._checked_chunks(upload, allowed_types, max_bytes):
+            size += len(chunk)
+            digest.update(chunk)
+        
+        await upload.seek(0)
+        return await self._store(digest.hexdigest(), upload.file, content_type, size)
+
+    async def put_stream(self, chunks, content_type: str, max_bytes: int) -> dict:
+        """Spool a streamed request body while hashing it, then store it"""
+        digest = hashlib.sha256()
+        size = 0
+        with tempfile.SpooledTemporaryFile(max_size=BLOB_CHUNK_SIZE * 16) as spool:
+            async for chunk in chunks:
+                size += len(chunk)
+                if size > max_bytes:
+                    raise HTTPException(status_code=413, detail=f"Body exceeds {max_bytes} bytes")
+                digest.update(chunk)
+                await asyncio.to_thread(spool.write, chunk)
+            if size == 0:
+                raise HTTPException(status_code=400, detail="Empty body")
+            spool.seek(0)
+            return await self._store(digest.hexdigest(), spool, content_type, size)
+
+    async def read_upload(self, upload: UploadFile, allowed_types: tuple, max_bytes: int = UPLOAD_MAX_BYTES) -> bytes:
+        """Type-check an upload and return its bytes, for documents that get re-encoded"""
+        return b"".join([chunk async for chunk, _ in self._checked_chunks(upload, allowed_types, max_bytes)])
+
+    async def read(self, ref: dict) -> bytes:
+        return b"".join([chunk async for chunk in self.store.stream(ref['blob_id'], 0, ref['size'] - 1)])
+
+    def response(self, ref: dict, range_header: Optional[str] = None) -> StreamingResponse:
+        """Stream a blob, honouring a single HTTP byte range"""
+        size = ref['size']
+        headers = {"Accept-Ranges": "bytes"}
+        byte_range = parse_byte_range(range_header, size)
+        if byte_range is None:
+            start, end, status_code = 0, size - 1, 200
+        else:
+            start, end = byte_range
+            status_code = 206
+            headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+        headers["Content-Length"] = str(max(end - start + 1, 0))
+        return StreamingResponse(
+            self.store.stream(ref['blob_id'], start, end),
+            status_code=status_code,
+            media_type=ref['content_type'],
+            headers=headers
+        )
+
+    def stats(self) -> dict:
+        return {"backend": BLOB_BACKEND, "stored": self.stored, "deduplicated": self.deduplicated}
+
+DOCUMENT_MAGIC = (
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+    (b"%PDF-", "application/pdf"),
+)
+IMAGE_TYPES = ("image/jpeg", "image/png", "image/gif", "image/webp")
+DOCUMENT_TYPES = {
+    "income_proof": IMAGE_TYPES + ("application/pdf",),
+    "photo": IMAGE_TYPES,
+}
+
+def sniff_content_type(head: bytes) -> str:
+    """Detect the file type from its leading bytes, ignoring client claims"""
+    for magic, content_type in DOCUMENT_MAGIC:
+        if head.startswith(magic):
+            return content_type
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    return "application/octet-stream"
+
+def parse_byte_range(range_header: Optional[str], size: int) -> Optional[tuple]:
+    if not range_header or not range_header.startswith("bytes="):
+        return None
+    spec = range_header[len("bytes="):].split(",")[0].strip()
+    start_text, _, end_text = spec.partition("-")
+    try:
+        if start_text == "":
+            start, end = max(size - int(end_text), 0), size - 1
+        else:
+            start = int(start_text)
+            end = min(int(end_text), size - 1) if end_text else size - 1
+    except ValueError:
+        return None
+    if start >= size or start > end:
+        raise HTTPException(
+            status_code=416,
+            detail="Requested range not satisfiable",
+            headers={"Content-Range": f"bytes */{size}"}
+        )
+    return start, end
+
+blob_service = BlobService(LocalBlobStore(BLOB_DIR) if BLOB_BACKEND == "local" else GridFSBlobStore(db))
+
+async def migrate_inline_documents():
+    """Move base64 documents left on older cards into the blob store"""
+    query = {"$or": [{field: {"$type": "string"}} for field in DOCUMENT_FIELDS]}
+    migrated = 0
+    async for card in db.ration_cards.find(query, {"_id": 0, "id": 1, **{field: 1 for field in DOCUMENT_FIELDS}}):
+        refs = {}
+        for field in DOCUMENT_FIELDS:
+            value = card.get(field)
+            if value == "":
+                # Left by the update form before empty documents were ignored
+                refs[field] = None
+            elif isinstance(value, str):
+                try:
+                    refs.update(await store_encoded_documents({field: value}, wait=True))
+                except HTTPException as e:
+                    if e.status_code != 400:
+                        raise
+                    logging.warning(f"Card {card['id']} has an undecodable {field}")
+                    refs[field] = None
+        if refs:
+            await db.ration_cards.update_one({"id": card['id']}, {"$set": refs})
+            migrated += 1
+    if migrated:
+        logging.info(f"Moved documents of {migrated} cards into the blob store")
+
+async def normalize_stored_photos():
+    """Re-encode photos stored before normalization and give them thumbnails"""
+    query = {"photo": {"$type": "object"}, "photo_thumbnail": None}
+    normalized = 0
+    async for card in db.ration_cards.find(query, {"_id": 0, "id": 1, "photo": 1}):
+        try:
+            refs = await photo_pool.store(await blob_service.read(card['photo']), wait=True)
+        except HTTPException as e:
+            logging.warning(f"Card {card['id']} photo not normalized: {e.detail}")
+            continue
+        await db.ration_cards.update_one({"id": card['id'], "photo": card['photo']}, {"$set": refs})
+        normalized += 1
+    if normalized:
+        logging.info(f"Normalized photos of {normalized} cards")
+
+async def normalize_stored_aadhaar():
+    """Strip whitespace from Aadhaar numbers stored before input was normalized"""
+    normalized = 0
+    async for card in db.ration_cards.find({"aadhaar": {"$regex": r"\s"}}, {"_id": 0, "id": 1, "aadhaar": 1}):
+        await db.ration_cards.update_one(
+            {"id": card['id'], "aadhaar": card['aadhaar']},
+            {"$set": {"aadhaar": normalize_aadhaar(card['aadhaar'])}}
+        )
+        normalized += 1
+    if normalized:
+        logging.info(f"Normalized Aadhaar numbers of {normalized} cards")
+
+async def migrate_documents():
+    await normalize_stored_aadhaar()
+    if BLOB_MIGRATE_ON_STARTUP:
+        await migrate_inline_documents()
+        await normalize_stored_photos()
+    # After photos are normalized, so their perceptual hashes are indexed too
+    if DUPLICATE_BACKFILL_ON_STARTUP:
+        await duplicate_index.backfill()
+
+# Bounded Worker Pools
+class BoundedPool:
+    """Runs blocking calls on an executor with a fixed number in flight and a bounded wait queue"""
+
+    def __init__(self, workers: int, max_queue: int, dependency: str):
+        self.workers = max(1, workers)
+        self.max_queue = max_queue
+        self.dependency = dependency
+        self._executor = None
+        self._slots = asyncio.Semaphore(self.workers)
+        self.queued = 0
+        self.waiting = 0
+        self.running = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+
+    def _create_executor(self):
+        raise NotImplementedError
+
+    async def run(self, func, *args, wait: bool = False):
+        """Request handlers fail fast with a 503 once the queue is full; wait=True is for internal batch callers"""
+        if wait:
+            self.waiting += 1
+        elif self.queued >= self.max_queue:
+            self.rejected += 1
+            raise HTTPException(status_code=503, detail="Server busy, please retry")
+        else:
+            self.queued += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            if wait:
+                self.waiting -= 1
+            else:
+                self.queued -= 1
+        self.running += 1
+        try:
+            if self._executor is None:
+                self._executor = self._create_executor()
+            loop = asyncio.get_running_loop()
+            with metrics.span(self.dependency, func.__name__):
+                result = await loop.run_in_executor(self._executor, func, *args)
+        except BaseException:
+            self.failed += 1
+            raise
+        finally:
+            self.running -= 1
+            self._slots.release()
+        self.completed += 1
+        return result
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "queue_depth": self.queued,
+            "waiting_internal": self.waiting,
+            "running": self.running,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+        }
+
+# Password Hashing Pool
+class PasswordPool(BoundedPool):
+    """Runs bcrypt off the event loop on a bounded thread pool"""
+
+    def __init__(self, workers: int, max_queue: int):
+        super().__init__(workers, max_queue, "bcrypt")
+
+    def _create_executor(self):
+        # bcrypt releases the GIL, so threads scale with cores
+        return ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bcrypt")
+
+    async def hash(self, password: str) -> str:
+        return await self.run(hash_password, password)
+
+    async def verify(self, password: str, hashed: str) -> bool:
+        return await self.run(verify_password, password, hashed)
+
+password_pool = PasswordPool(PASSWORD_POOL_WORKERS, PASSWORD_POOL_MAX_QUEUE)
+
+# Photo Processing Pool
+class PhotoPool(BoundedPool):
+    """Re-encodes photos and cuts thumbnails on a bounded process pool"""
+
+    def __init__(self, workers: int, max_queue: int):
+        super().__init__(workers, max_queue, "photo")
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def _create_executor(self):
+        # Decoding and resampling hold the GIL, so this needs processes. Spawned, not
+        # forked: forking would copy the event loop, Motor's threads and their locks
+        return ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+
+    async def normalize(self, data: bytes, wait: bool = False) -> tuple:
+        try:
+            photo, thumbnail, photo_hash = await self.run(
+                normalize_photo, data,
+                PHOTO_MAX_DIMENSION, PHOTO_QUALITY, PHOTO_THUMBNAIL_DIMENSION, PHOTO_THUMBNAIL_QUALITY,
+                wait=wait
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except BrokenProcessPool:
+            # A worker died (e.g. out of memory); start a fresh pool next time
+            self._executor = None
+            raise HTTPException(status_code=503, detail="Photo processing unavailable, please retry")
+        self.bytes_in += len(data)
+        self.bytes_out += len(photo) + len(thumbnail)
+        return photo, thumbnail, photo_hash
+
+    async def store(self, data: bytes, wait: bool = False) -> dict:
+        """Normalize a photo and store it with its thumbnail and perceptual hash"""
+        photo, thumbnail, photo_hash = await self.normalize(data, wait)
+        return {
+            "photo": await blob_service.put(photo, "image/jpeg"),
+            "photo_thumbnail": await blob_service.put(thumbnail, "image/jpeg"),
+            "photo_hash": photo_hash
+        }
+
+    def stats(self) -> dict:
+        stats = super().stats()
+        stats["bytes_in"] = self.bytes_in
+        stats["bytes_out"] = self.bytes_out
+        return stats
+
+photo_pool = PhotoPool(PHOTO_POOL_WORKERS, PHOTO_POOL_MAX_QUEUE)
+
+async def store_encoded_documents(values: dict, wait: bool = False) -> dict:
+    """Store base64 documents; the photo is normalized and gains a thumbnail"""
+    documents = {}
+    for field, value in values.items():
+        if field == "photo":
+            data, _ = decode_document(value)
+            documents.update(await photo_pool.store(data, wait))
+        else:
+            documents[field] = await blob_service.put_encoded(value)
+    return documents
+
+async def store_uploaded_documents(uploads: dict) -> dict:
+    """Multipart counterpart of store_encoded_documents"""
+    documents = {}
+    for field, upload in uploads.items():
+        if field == "photo":
+            data = await blob_service.read_upload(upload, DOCUMENT_TYPES[field])
+            documents.update(await photo_pool.store(data))
+        else:
+            documents[field] = await blob_service.put_upload(upload, DOCUMENT_TYPES[field])
+    return documents
+
+def create_jwt_token(user_id: str, email: str, role: str, user: Optional[User] = None) -> str:
+    now = datetime.now(timezone.utc)
+    expiration = now + timedelta(days=JWT_EXPIRATION_DAYS)
     payload = {
         "user_id": user_id,
         "email": email,
         "role": role,
+        "iat": now,
         "exp": expiration
     }
+    if user is not None:
+        # Profile claims let get_current_user skip the lookup for fresh tokens
+        payload["name"] = user.name
+        payload["phone"] = user.phone
+        payload["created_at"] = user.created_at.isoformat() if isinstance(user.created_at, datetime) else user.created_at
     return jwt.encode(payload, JWT_SECRET, algorithm=JWT_ALGORITHM)
 
-async def get_current_user(authorization: Optional[str] = Header(None)):
-    if not authorization:
-        raise HTTPException(status_code=401, detail="Not authenticated")
-    
-    try:
-        token = authorization.replace("Bearer ", "")
-        payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
-        user_id = payload.get("user_id")
-        
-        user = await db.users.find_one({"id": user_id}, {"_id": 0})
-        if not user:
-            raise HTTPException(status_code=401, detail="User not found")
-        
-        return User(**user)
-    except jwt.ExpiredSignatureError:
-        raise HTTPException(status_code=401, detail="Token expired")
-    except Exception as e:
-        raise HTTPException(status_code=401, detail="Invalid token")
+def user_from_claims(payload: dict) -> Optional[User]:
+    """Build a User from JWT claims if the token is inside the trust window"""
+    if PRINCIPAL_TRUST_JWT_SECONDS <= 0:
+        return None
+    issued_at = payload.get("iat")
+    if issued_at is None or "name" not in payload or "created_at" not in payload:
+        return None
+    if time.time() - issued_at > PRINCIPAL_TRUST_JWT_SECONDS:
+        return None
+    return User(
+        id=payload["user_id"],
+        name=payload["name"],
+        email=payload["email"],
+        phone=payload.get("phone", ""),
+        role=payload["role"],
+        created_at=payload["created_at"]
+    )
+
+async def load_principal(user_id: str) -> User:
+    cached = principal_cache.get(user_id)
+    if cached is not None:
+        return cached
+    
+    user = await db.users.find_one({"id": user_id}, {"_id": 0})
+    if not user:
+        raise HTTPException(status_code=401, detail="User not found")
+    
+    user_obj = User(**user)
+    principal_cache.put(user_obj)
+    return user_obj
+
+async def get_current_user(authorization: Optional[str] = Header(None)):
+    if not authorization:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    
+    try:
+        token = authorization.replace("Bearer ", "")
+        payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
+        user_id = payload.get("user_id")
+        
+        trusted = user_from_claims(payload)
+        if trusted is not None:
+            principal_cache.jwt_trusted += 1
+            return trusted
+        
+        return await load_principal(user_id)
+    except jwt.ExpiredSignatureError:
+        raise HTTPException(status_code=401, detail="Token expired")
+    except Exception as e:
+        raise HTTPException(status_code=401, detail="Invalid token")
+
+async def get_admin_user(user: User = Depends(get_current_user)):
+    if user.role != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+    return user
+
+async def verify_ration_card_with_ai(card_data: dict) -> dict:
+    """Use Claude Sonnet 4 to verify ration card authenticity"""
+    try:
+        chat = LlmChat(
+            api_key=EMERGENT_LLM_KEY,
+            session_id=f"verification_{card_data['id']}",
+            system_message="You are an expert at detecting fake documents and verifying ration card applications. Analyze the provided information and determine if it appears genuine or fake."
+        ).with_model("anthropic", "claude-3-7-sonnet-20250219")
+        
+        message = UserMessage(
+            text=f"""Analyze this ration card application:
+            Name: {card_data['name']}
+            Address: {card_data['address']}
+            Family Members: {card_data['family_members']}
+            Aadhaar: {card_data['aadhaar']}
+            
+            Check for:
+            1. Aadhaar format validity (12 digits)
+            2. Reasonable family member count
+            3. Address completeness
+            4. Any suspicious patterns
+            
+            Respond with: GENUINE or FAKE followed by a brief reason."""
+        )
+        
+        with metrics.span("llm", "verify"):
+            response = await chat.send_message(message)
+        return {
+            "result": "fake" if "FAKE" in response.upper() else "genuine",
+            "details": response
+        }
+    except Exception as e:
+        logging.error(f"AI verification error: {str(e)}")
+        return {"result": "error", "details": str(e)}
+
+# Pre-screening Rules
+PIN_CODE_RE = re.compile(r"\b[1-9][0-9]{5}\b")
+
+def normalize_aadhaar(value) -> str:
+    """The form cards store and every Aadhaar lookup uses: digits with whitespace removed"""
+    return "".join(str(value).split())
+
+def check_aadhaar_format(card_data: dict):
+    aadhaar = normalize_aadhaar(card_data.get('aadhaar', ''))
+    if len(aadhaar) != 12 or not aadhaar.isdigit():
+        return "fail", "Aadhaar must be 12 digits"
+    if aadhaar[0] in "01":
+        return "fail", "Aadhaar cannot start with 0 or 1"
+    if not verhoeff_valid(aadhaar):
+        return "fail", "Aadhaar checksum is invalid"
+    return "pass", "Aadhaar format and checksum valid"
+
+def check_family_members(card_data: dict):
+    count = card_data.get('family_members', 0)
+    if count < PRESCREEN_MIN_FAMILY_MEMBERS or count > PRESCREEN_MAX_FAMILY_MEMBERS:
+        return "fail", f"Family member count {count} is outside {PRESCREEN_MIN_FAMILY_MEMBERS}-{PRESCREEN_MAX_FAMILY_MEMBERS}"
+    if count > PRESCREEN_TYPICAL_FAMILY_MEMBERS:
+        return "warn", f"Family member count {count} is unusually large"
+    return "pass", "Family member count is reasonable"
+
+def check_address(card_data: dict):
+    address = " ".join(str(card_data.get('address', '')).split())
+    if len(address) < 5 or not any(c.isalpha() for c in address):
+        return "fail", "Address is missing or unreadable"
+    if len(address) < PRESCREEN_MIN_ADDRESS_LENGTH:
+        return "warn", "Address looks incomplete"
+    if not PIN_CODE_RE.search(address):
+        return "warn", "Address has no PIN code"
+    return "pass", "Address looks complete"
+
+def check_name(card_data: dict):
+    name = str(card_data.get('name', '')).strip()
+    if len(name) < 2 or any(c.isdigit() for c in name):
+        return "fail", "Applicant name is invalid"
+    return "pass", "Applicant name looks valid"
+
+PRESCREEN_RULES = [check_aadhaar_format, check_family_members, check_address, check_name]
+
+class PreScreener:
+    """Deterministic checks that settle obvious cases without the LLM"""
+
+    def __init__(self, rules: list, auto_pass: bool):
+        self.rules = rules
+        self.auto_pass = auto_pass
+        self.short_circuit_fake = 0
+        self.short_circuit_genuine = 0
+        self.escalated = 0
+
+    async def screen(self, card_data: dict) -> Optional[dict]:
+        """Return a verification result, or None if the LLM should decide"""
+        findings = [rule(card_data) for rule in self.rules]
+        if all(verdict != "fail" for verdict, _ in findings):
+            findings.extend(await duplicate_index.check(card_data))
+        
+        failures = [reason for verdict, reason in findings if verdict == "fail"]
+        if failures:
+            self.short_circuit_fake += 1
+            return {"result": "fake", "details": "FAKE (pre-screen): " + "; ".join(failures)}
+        
+        warnings = [reason for verdict, reason in findings if verdict == "warn"]
+        if not warnings and self.auto_pass:
+            self.short_circuit_genuine += 1
+            return {"result": "genuine", "details": "GENUINE (pre-screen): " + "; ".join(r for _, r in findings)}
+        
+        self.escalated += 1
+        return None
+
+    def stats(self) -> dict:
+        return {
+            "auto_pass": self.auto_pass,
+            "short_circuit_fake": self.short_circuit_fake,
+            "short_circuit_genuine": self.short_circuit_genuine,
+            "escalated_to_llm": self.escalated,
+            "llm_calls_avoided": self.short_circuit_fake + self.short_circuit_genuine,
+        }
+
+prescreener = PreScreener(PRESCREEN_RULES, PRESCREEN_AUTO_PASS)
+
+# Duplicate Detection Index
+MINHASH_PRIME = (1 << 61) - 1
+# Each band key joins name rows with address rows, so a bucket only holds cards
+# alike in both; shared surnames or streets alone no longer collide.
+# A pair at 0.7 similarity in both shares one of 16 bands ~98% of the time.
+MINHASH_BANDS = 16
+MINHASH_NAME_ROWS = 3
+MINHASH_ADDRESS_ROWS = 5
+
+def minhash_params(label: str, count: int) -> list:
+    """Fixed seeds so signatures stay comparable across restarts"""
+    return [
+        (
+            int.from_bytes(hashlib.sha256(f"minhash-{label}-a-{i}".encode()).digest()[:8], "big") % (MINHASH_PRIME - 1) + 1,
+            int.from_bytes(hashlib.sha256(f"minhash-{label}-b-{i}".encode()).digest()[:8], "big") % MINHASH_PRIME
+        )
+        for i in range(count)
+    ]
+
+MINHASH_NAME_PARAMS = minhash_params("name", MINHASH_BANDS * MINHASH_NAME_ROWS)
+MINHASH_ADDRESS_PARAMS = minhash_params("address", MINHASH_BANDS * MINHASH_ADDRESS_ROWS)
+# Pigeonhole: photos within DUPLICATE_PHOTO_DISTANCE bits of each other agree on at least one of
+# DUPLICATE_PHOTO_DISTANCE + 1 disjoint bands
+PHOTO_HASH_BITS = 64
+PHOTO_HASH_BANDS = DUPLICATE_PHOTO_DISTANCE + 1
+# Stored on each fingerprint; a change to the signature or band layout rebuilds them all
+FINGERPRINT_VERSION = f"2:{MINHASH_BANDS}x{MINHASH_NAME_ROWS}+{MINHASH_ADDRESS_ROWS}:p{PHOTO_HASH_BANDS}"
+
+def normalize_text(value: str) -> str:
+    return " ".join(re.sub(r"[\W_]+", " ", str(value).casefold()).split())
+
+def trigrams(text: str) -> set:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def minhash(shingles: set, params: list) -> list:
+    hashes = [int.from_bytes(hashlib.blake2b(s.encode('utf-8'), digest_size=8).digest(), "big") for s in shingles]
+    if not hashes:
+        return []
+    return [min((a * h + b) % MINHASH_PRIME for h in hashes) for a, b in params]
+
+def minhash_bands(name_signature: list, address_signature: list) -> list:
+    if not name_signature or not address_signature:
+        return []
+    return [
+        f"{band}:" + hashlib.blake2b(repr((
+            name_signature[band * MINHASH_NAME_ROWS:(band + 1) * MINHASH_NAME_ROWS],
+            address_signature[band * MINHASH_ADDRESS_ROWS:(band + 1) * MINHASH_ADDRESS_ROWS]
+        )).encode(), digest_size=8).hexdigest()
+        for band in range(MINHASH_BANDS)
+    ]
+
+def minhash_similarity(left: list, right: list) -> tuple:
+    """(agreeing rows, total rows) between two signatures of the same shape"""
+    if not left or len(left) != len(right):
+        return 0, 0
+    return sum(a == b for a, b in zip(left, right)), len(left)
+
+def photo_hash_bands(photo_hash: Optional[str]) -> list:
+    if not photo_hash:
+        return []
+    value = int(photo_hash, 16)
+    bands = []
+    for band in range(PHOTO_HASH_BANDS):
+        low = PHOTO_HASH_BITS * band // PHOTO_HASH_BANDS
+        high = PHOTO_HASH_BITS * (band + 1) // PHOTO_HASH_BANDS
+        bands.append(f"{band}:{(value >> low) & ((1 << (high - low)) - 1):x}")
+    return bands
+
+def aadhaar_digest(aadhaar: str) -> str:
+    return hmac.new(AADHAAR_HASH_KEY.encode(), normalize_aadhaar(aadhaar).encode(), hashlib.sha256).hexdigest()
+
+class DuplicateIndex:
+    """Aadhaar, name+address and photo fingerprints, maintained on write and queried by index"""
+
+    def __init__(self, text_threshold: float, photo_distance: int, candidate_limit: int):
+        self.text_threshold = text_threshold
+        self.photo_distance = photo_distance
+        self.candidate_limit = candidate_limit
+        self.indexed = 0
+        self.flagged = 0
+
+    def fingerprint(self, card: dict) -> dict:
+        name_signature = minhash(trigrams(normalize_text(card.get('name', ''))), MINHASH_NAME_PARAMS)
+        address_signature = minhash(trigrams(normalize_text(card.get('address', ''))), MINHASH_ADDRESS_PARAMS)
+        return {
+            "card_id": card['id'],
+            "user_id": card.get('user_id'),
+            "aadhaar_hash": aadhaar_digest(card.get('aadhaar', '')),
+            "name_minhash": name_signature,
+            "address_minhash": address_signature,
+            "text_bands": minhash_bands(name_signature, address_signature),
+            "photo_hash": card.get('photo_hash'),
+            "photo_bands": photo_hash_bands(card.get('photo_hash')),
+            "version": FINGERPRINT_VERSION,
+        }
+
+    async def candidates(self, fingerprint: dict) -> list:
+        """Exact Aadhaar and photo hits are fetched uncapped; only the fuzzy band lookups share the limit"""
+        exact = [{"aadhaar_hash": fingerprint['aadhaar_hash']}]
+        fuzzy = []
+        if fingerprint['photo_hash']:
+            exact.append({"photo_hash": fingerprint['photo_hash']})
+        if fingerprint['text_bands']:
+            fuzzy.append({"text_bands": {"$in": fingerprint['text_bands']}})
+        if fingerprint['photo_bands']:
+            fuzzy.append({"photo_bands": {"$in": fingerprint['photo_bands']}})
+        projection = {
+            "_id": 0, "card_id": 1, "user_id": 1, "aadhaar_hash": 1,
+            "name_minhash": 1, "address_minhash": 1, "photo_hash": 1
+        }
+        
+        def lookup(clause: dict, limit: Optional[int]):
+            cursor = db.card_fingerprints.find({"card_id": {"$ne": fingerprint['card_id']}, **clause}, projection)
+            if limit:
+                cursor = cursor.limit(limit)
+            return cursor.to_list(limit)
+        
+        with metrics.span("duplicate_index", "lookup"):
+            results = await asyncio.gather(
+                *(lookup(clause, None) for clause in exact),
+                *(lookup(clause, self.candidate_limit) for clause in fuzzy)
+            )
+        merged = {}
+        for rows in results:
+            for row in rows:
+                merged.setdefault(row['card_id'], row)
+        return list(merged.values())
+
+    async def matches(self, fingerprint: dict) -> list:
+        """Score the cards sharing an exact Aadhaar hash, photo hash, MinHash band or photo hash band"""
+        candidates = await self.candidates(fingerprint)
+        
+        user_id = fingerprint['user_id']
+        results = []
+        for candidate in candidates:
+            # A user re-applying is not a duplicate; offline imports share one owner, so they are
+            if candidate.get('user_id') == user_id and not str(user_id).startswith("offline:"):
+                continue
+            match = {"card_id": candidate['card_id'], "reasons": []}
+            if candidate['aadhaar_hash'] == fingerprint['aadhaar_hash']:
+                match['reasons'].append("aadhaar")
+            name_agree, name_rows = minhash_similarity(candidate.get('name_minhash'), fingerprint['name_minhash'])
+            address_agree, address_rows = minhash_similarity(candidate.get('address_minhash'), fingerprint['address_minhash'])
+            if name_rows and address_rows:
+                similarity = (name_agree + address_agree) / (name_rows + address_rows)
+                if similarity >= self.text_threshold:
+                    match['reasons'].append("name_address")
+                    match['name_address_similarity'] = round(similarity, 2)
+            if candidate.get('photo_hash') and fingerprint['photo_hash']:
+                distance = bin(int(candidate['photo_hash'], 16) ^ int(fingerprint['photo_hash'], 16)).count("1")
+                if distance <= self.photo_distance:
+                    match['reasons'].append("photo")
+                    match['photo_distance'] = distance
+            if match['reasons']:
+                results.append(match)
+        return results
+
+    async def index(self, card: dict) -> list:
+        """Fingerprint a card, record what it resembles, and return those matches"""
+        fingerprint = self.fingerprint(card)
+        matches = await self.matches(fingerprint)
+        await db.card_fingerprints.update_one(
+            {"card_id": fingerprint['card_id']},
+            {"$set": {
+                **fingerprint,
+                "matches": matches,
+                "match_count": len(matches),
+                "updated_at": datetime.now(timezone.utc).isoformat()
+            }},
+            upsert=True
+        )
+        self.indexed += 1
+        if matches:
+            self.flagged += 1
+        return matches
+
+    async def remove(self, card_ids: list):
+        if not card_ids:
+            return
+        await db.card_fingerprints.delete_many({"card_id": {"$in": card_ids}})
+        await db.card_fingerprints.update_many(
+            {"matches.card_id": {"$in": card_ids}},
+            [
+                {"$set": {"matches": {"$filter": {
+                    "input": "$matches",
+                    "cond": {"$not": [{"$in": ["$$this.card_id", card_ids]}]}
+                }}}},
+                {"$set": {"match_count": {"$size": "$matches"}}}
+            ]
+        )
+
+    async def check(self, card_data: dict) -> list:
+        """Pre-screen findings from the matches recorded when the card was indexed.
+
+        Aadhaar reuse is a hard failure; other resemblance sends the card to
+        the LLM instead of auto-passing.
+        """
+        fingerprint = await db.card_fingerprints.find_one({"card_id": card_data.get('id')}, {"_id": 0, "matches": 1})
+        # Cards not yet backfilled are matched now
+        matches = fingerprint['matches'] if fingerprint else await self.index(card_data)
+        findings = []
+        
+        aadhaar_ids = [match['card_id'] for match in matches if "aadhaar" in match['reasons']]
+        # A rejected card frees its Aadhaar; statuses are read now, as they change after indexing
+        if aadhaar_ids and await db.ration_cards.find_one(
+            {"id": {"$in": aadhaar_ids}, "status": {"$ne": "rejected"}}, {"_id": 0, "id": 1}
+        ):
+            findings.append(("fail", "Aadhaar is already registered on another card"))
+        else:
+            findings.append(("pass", "Aadhaar is not used on another card"))
+        
+        reasons = sorted({reason for match in matches for reason in match['reasons'] if reason != "aadhaar"})
+        if reasons:
+            findings.append(("warn", f"Resembles another card by {' and '.join(reasons)}"))
+        else:
+            findings.append(("pass", "No similar cards found"))
+        return findings
+
+    async def backfill(self):
+        """Fingerprint cards created before the index (or its current layout) existed, oldest first"""
+        # Writes keep fingerprints current, so a completed pass never needs repeating
+        marker = await db.migrations.find_one({"_id": "duplicate_index"})
+        if marker and marker.get("version") == FINGERPRINT_VERSION:
+            return
+        backfilled = 0
+        batch = []
+        cursor = db.ration_cards.find(
+            {},
+            {"_id": 0, "id": 1, "user_id": 1, "name": 1, "address": 1, "aadhaar": 1, "photo_hash": 1}
+        ).sort("created_at", ASCENDING).batch_size(IMPORT_BATCH_SIZE)
+        async for card in cursor:
+            batch.append(card)
+            if len(batch) >= IMPORT_BATCH_SIZE:
+                backfilled += await self._backfill_batch(batch)
+                batch = []
+        if batch:
+            backfilled += await self._backfill_batch(batch)
+        if backfilled:
+            logging.info(f"Fingerprinted {backfilled} cards for duplicate detection")
+        await db.migrations.update_one(
+            {"_id": "duplicate_index"},
+            {"$set": {"version": FINGERPRINT_VERSION, "completed_at": datetime.now(timezone.utc).isoformat()}},
+            upsert=True
+        )
+
+    async def _backfill_batch(self, cards: list) -> int:
+        # Fingerprints from an older layout are rebuilt too; an interrupted pass resumes here
+        done = set(await db.card_fingerprints.distinct(
+            "card_id", {"card_id": {"$in": [c['id'] for c in cards]}, "version": FINGERPRINT_VERSION}
+        ))
+        missing = [card for card in cards if card['id'] not in done]
+        for card in missing:
+            await self.index(card)
+        return len(missing)
+
+    def stats(self) -> dict:
+        return {"indexed": self.indexed, "flagged": self.flagged}
+
+duplicate_index = DuplicateIndex(DUPLICATE_TEXT_THRESHOLD, DUPLICATE_PHOTO_DISTANCE, DUPLICATE_CANDIDATE_LIMIT)
+
+# Verification Cache
+VERIFIED_FIELDS = ("name", "address", "family_members", "aadhaar")
+
+def verification_key(card_data: dict) -> str:
+    """Hash of the normalized fields the LLM actually sees"""
+    parts = [" ".join(str(card_data.get(field, "")).lower().split()) for field in VERIFIED_FIELDS]
+    return hashlib.sha256("\x1f".join(parts).encode('utf-8')).hexdigest()
+
+class VerificationCache:
+    """LLM verdicts keyed by content hash, with single-flight coalescing"""
+
+    def __init__(self, max_size: int, ttl_seconds: int):
+        self.ttl_seconds = ttl_seconds
+        self.memory = TTLCache(max_size, ttl_seconds)
+        self._in_flight = {}
+        self.store_hits = 0
+        self.coalesced = 0
+        self.llm_calls = 0
+
+    async def verify(self, card_data: dict) -> dict:
+        key = verification_key(card_data)
+        cached = self.memory.get(key)
+        if cached is not None:
+            return cached
+        
+        in_flight = self._in_flight.get(key)
+        if in_flight is not None:
+            self.coalesced += 1
+            return await asyncio.shield(in_flight)
+        
+        task = asyncio.ensure_future(self._load(key, card_data))
+        self._in_flight[key] = task
+        task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        return await asyncio.shield(task)
+
+    async def _load(self, key: str, card_data: dict) -> dict:
+        stored = await db.verification_cache.find_one({"key": key}, {"_id": 0})
+        if stored:
+            self.store_hits += 1
+            result = {"result": stored['result'], "details": stored['details']}
+            self.memory.set(key, result)
+            return result
+        
+        self.llm_calls += 1
+        result = await verify_ration_card_with_ai(card_data)
+        if result['result'] == 'error':
+            return result
+        
+        self.memory.set(key, result)
+        await db.verification_cache.update_one(
+            {"key": key},
+            {"$set": {
+                "key": key,
+                "result": result['result'],
+                "details": result['details'],
+                # BSON date so the TTL index can expire it
+                "created_at": datetime.now(timezone.utc)
+            }},
+            upsert=True
+        )
+        return result
+
+    def stats(self) -> dict:
+        return {
+            "memory": self.memory.stats(),
+            "store_hits": self.store_hits,
+            "coalesced": self.coalesced,
+            "llm_calls": self.llm_calls,
+        }
+
+verification_cache = VerificationCache(VERIFICATION_CACHE_SIZE, VERIFICATION_CACHE_TTL_SECONDS)
+
+async def verify_ration_card(card_data: dict) -> dict:
+    """Run the local rules first and fall back to the LLM for ambiguous cases"""
+    screened = await prescreener.screen(card_data)
+    if screened is not None:
+        return screened
+    return await verification_cache.verify(card_data)
+
+# Card Event Feed
+def card_event_fields(fields: dict) -> dict:
+    """Event-safe copy of card fields: no documents, no ObjectIds"""
+    return {k: v for k, v in fields.items() if k not in DOCUMENT_FIELDS and k != "_id"}
+
+def sse_message(event_id: str, event: dict) -> str:
+    return f"id: {event_id}\nevent: {event['type']}\ndata: {json.dumps(event, default=str)}\n\n"
+
+class CardEventFeed:
+    """Incremental card events for the admin dashboard.
+
+    With a replica set, events come straight from a change stream on
+    ration_cards. Otherwise handlers publish into the card_events
+    collection, which the stream tails. SSE ids are resume tokens in both
+    modes ("cs:" change stream tokens, "ev:" event ObjectIds).
+    """
+
+    def __init__(self, source: str):
+        self.configured_source = source
+        self.source = None if source == "auto" else source
+        self.pre_images = False
+        self.published = 0
+
+    async def detect(self):
+        if self.source is None:
+            try:
+                hello = await db.command("hello")
+                self.source = "change_stream" if "setName" in hello else "events"
+            except Exception as e:
+                logging.warning(f"Could not detect replica set, tailing card_events: {str(e)}")
+                self.source = "events"
+        if self.source == "change_stream":
+            await self._enable_pre_images()
+
+    async def _enable_pre_images(self):
+        """Delete events only carry the ObjectId; a pre-image recovers the card id"""
+        try:
+            await db.command({"collMod": "ration_cards", "changeStreamPreAndPostImages": {"enabled": True}})
+            self.pre_images = True
+        except OperationFailure as e:
+            # Needs MongoDB 6.0+; deletes then fall back to object_id alone
+            logging.warning(f"Change stream pre-images unavailable: {str(e)}")
+
+    async def publish(self, event_type: str, cards: list):
+        """Record events when change streams are unavailable; a no-op otherwise"""
+        if self.source != "events" or not cards:
+            return
+        now = datetime.now(timezone.utc)
+        await db.card_events.insert_many([{
+            "type": event_type,
+            "card_id": card['id'],
+            "fields": card_event_fields(card),
+            "created_at": now
+        } for card in cards])
+        self.published += len(cards)
+
+    async def stream(self, request: Request, last_event_id: Optional[str]):
+        if self.source == "change_stream":
+            generator = self._change_stream(request, last_event_id)
+        else:
+            generator = self._tail_events(request, last_event_id)
+        async for message in generator:
+            yield message
+
+    async def _change_stream(self, request: Request, last_event_id: Optional[str]):
+        resume_after = None
+        if last_event_id and last_event_id.startswith("cs:"):
+            resume_after = {"_data": last_event_id[3:]}
+        excluded = {f"fullDocument.{field}": 0 for field in DOCUMENT_FIELDS}
+        options = {}
+        if self.pre_images:
+            excluded.update({f"fullDocumentBeforeChange.{field}": 0 for field in DOCUMENT_FIELDS})
+            options["full_document_before_change"] = "whenAvailable"
+        pipeline = [{"$project": excluded}]
+        try:
+            async with db.ration_cards.watch(
+                pipeline,
+                full_document="updateLookup",
+                resume_after=resume_after,
+                max_await_time_ms=int(CARD_EVENTS_HEARTBEAT_SECONDS * 1000),
+                **options
+            ) as change_stream:
+                while not await request.is_disconnected():
+                    change = await change_stream.try_next()
+                    if change is None:
+                        yield ": keepalive\n\n"
+                        continue
+                    document = change.get("fullDocument") or {}
+                    updated = change.get("updateDescription", {}).get("updatedFields", {})
+                    before = change.get("fullDocumentBeforeChange") or {}
+                    event = {
+                        "type": {"insert": "created", "delete": "deleted"}.get(change["operationType"], "updated"),
+                        "card_id": document.get("id") or before.get("id"),
+                        # Without a pre-image, deletes only carry the ObjectId; clients map it from earlier events
+                        "object_id": str(change.get("documentKey", {}).get("_id")),
+                        "fields": card_event_fields(updated or document)
+                    }
+                    yield sse_message(f"cs:{change['_id']['_data']}", event)
+        except OperationFailure as e:
+            logging.error(f"Card change stream failed: {str(e)}")
+            yield sse_message("", {"type": "error", "detail": "Change stream unavailable"})
+
+    async def _tail_events(self, request: Request, last_event_id: Optional[str]):
+        last_id = None
+        if last_event_id and last_event_id.startswith("ev:"):
+            try:
+                last_id = ObjectId(last_event_id[3:])
+            except InvalidId:
+                last_id = None
+        if last_id is None:
+            # New subscribers only see events from now on
+            last_id = ObjectId.from_datetime(datetime.now(timezone.utc))
+        
+        idle = 0.0
+        while not await request.is_disconnected():
+            events = await db.card_events.find({"_id": {"$gt": last_id}}).sort("_id", 1).to_list(100)
+            for event in events:
+                last_id = event.pop("_id")
+                event.pop("created_at", None)
+                yield sse_message(f"ev:{last_id}", event)
+            if events:
+                idle = 0.0
+                continue
+            await asyncio.sleep(CARD_EVENTS_POLL_SECONDS)
+            idle += CARD_EVENTS_POLL_SECONDS
+            if idle >= CARD_EVENTS_HEARTBEAT_SECONDS:
+                idle = 0.0
+                yield ": keepalive\n\n"
+
+card_events = CardEventFeed(CARD_EVENTS_SOURCE)
+
+# Card Statistics
+class CardStats:
+    """Counters kept in one card_stats document, bumped with $inc on every write.
+
+    Reads are a single find_one regardless of card volume. reconcile()
+    rebuilds the document from the source collections to correct drift,
+    counting exactly what the increments count. Every write bumps a
+    version, so a rebuild that raced an increment is discarded and redone.
+    """
+
+    def __init__(self, reconcile_seconds: float):
+        self.reconcile_seconds = reconcile_seconds
+        self._task = None
+
+    async def record(self, transitions: list):
+        """Apply (old_status, new_status, family_delta) transitions; None means absent"""
+        inc = {}
+        def bump(key, amount):
+            if amount:
+                inc[key] = inc.get(key, 0) + amount
+        today = datetime.now(timezone.utc).date().isoformat()
+        for old_status, new_status, family_delta in transitions:
+            if old_status == new_status and not family_delta:
+                continue
+            if old_status is not None and old_status != new_status:
+                bump(f"by_status.{old_status}", -1)
+            if new_status is not None and old_status != new_status:
+                bump(f"by_status.{new_status}", 1)
+            bump("total", (new_status is not None) - (old_status is not None))
+            bump("family_members_total", family_delta)
+            if new_status == "approved" and old_status != "approved":
+                bump(f"approvals_by_day.{today}", 1)
+        if inc:
+            inc["version"] = 1
+            await db.card_stats.update_one({"_id": "cards"}, {"$inc": inc}, upsert=True)
+
+    async def record_verification(self, result: str):
+        await db.card_stats.update_one({"_id": "cards"}, {"$inc": {f"verification.{result}": 1, "version": 1}}, upsert=True)
+
+    async def snapshot(self, days: int) -> dict:
+        doc = await db.card_stats.find_one({"_id": "cards"}) or {}
+        total = doc.get("total", 0)
+        verification = doc.get("verification", {})
+        verified = verification.get("fake", 0) + verification.get("genuine", 0)
+        approvals = doc.get("approvals_by_day", {})
+        return {
+            "total": total,
+            "by_status": {k: v for k, v in doc.get("by_status", {}).items() if v},
+            "approvals_per_day": {day: approvals[day] for day in sorted(approvals)[-days:]},
+            "average_family_size": doc.get("family_members_total", 0) / total if total else 0.0,
+            "verification": verification,
+            "fake_detection_rate": verification.get("fake", 0) / verified if verified else 0.0,
+            "reconciled_at": doc.get("reconciled_at")
+        }
+
+    async def rebuild(self) -> dict:
+        """Recompute every counter with aggregation pipelines"""
+        by_status = {}
+        total = 0
+        family_members_total = 0
+        async for row in db.ration_cards.aggregate([
+            {"$group": {"_id": "$status", "count": {"$sum": 1}, "family": {"$sum": "$family_members"}}}
+        ]):
+            by_status[row["_id"]] = row["count"]
+            total += row["count"]
+            family_members_total += row["family"]
+        
+        # record() counts transitions into approved, so re-approving an approved card is skipped
+        approvals_by_day = {}
+        async for row in db.audit_log.aggregate([
+            {"$match": {"action": "approve", "outcome": "approved", "previous_status": {"$ne": "approved"}}},
+            {"$group": {"_id": {"$substrBytes": ["$created_at", 0, 10]}, "count": {"$sum": 1}}}
+        ]):
+            approvals_by_day[row["_id"]] = row["count"]
+        # Cards approved before the audit log existed count on their last update
+        async for row in db.ration_cards.aggregate([
+            {"$match": {"status": "approved"}},
+            {"$project": {"_id": 0, "id": 1, "updated_at": 1}},
+            {"$lookup": {"from": "audit_log", "localField": "id", "foreignField": "card_id", "as": "audit"}},
+            {"$match": {"audit.action": {"$ne": "approve"}}},
+            {"$group": {"_id": {"$substrBytes": ["$updated_at", 0, 10]}, "count": {"$sum": 1}}}
+        ]):
+            approvals_by_day[row["_id"]] = approvals_by_day.get(row["_id"], 0) + row["count"]
+        
+        # Only jobs that settled their card were counted; older jobs lack the flag
+        verification = {}
+        async for row in db.verification_jobs.aggregate([
+            {"$match": {"status": "done", "settled": {"$ne": False}}},
+            {"$group": {"_id": "$result", "count": {"$sum": 1}}}
+        ]):
+            verification[row["_id"]] = row["count"]
+        
+        return {
+            "total": total,
+            "by_status": by_status,
+            "family_members_total": family_members_total,
+            "approvals_by_day": approvals_by_day,
+            "verification": verification,
+            "reconciled_at": datetime.now(timezone.utc).isoformat()
+        }
+
+    async def reconcile(self) -> Optional[dict]:
+        """Rebuild the counters and $set them unless an increment landed meanwhile"""
+        for _ in range(STATS_RECONCILE_ATTEMPTS):
+            current = await db.card_stats.find_one({"_id": "cards"}, {"version": 1})
+            doc = await self.rebuild()
+            if current is None:
+                try:
+                    await db.card_stats.insert_one({"_id": "cards", "version": 1, **doc})
+                    return doc
+                except DuplicateKeyError:
+                    continue
+            # A document from before versioning has none, which None matches
+            result = await db.card_stats.update_one(
+                {"_id": "cards", "version": current.get("version")},
+                {"$set": doc, "$inc": {"version": 1}}
+            )
+            if result.matched_count:
+                return doc
+        logging.warning("Stats reconciliation raced card writes on every attempt; counters left as they were")
+        return None
+
+    async def _loop(self):
+        while True:
+            try:
+                await self.reconcile()
+            except Exception as e:
+                logging.error(f"Stats reconciliation error: {str(e)}")
+            await asyncio.sleep(self.reconcile_seconds)
+
+    def start(self):
+        if self.reconcile_seconds > 0:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+card_stats = CardStats(STATS_RECONCILE_SECONDS)
+
+# Verification Pipeline
+class VerificationQueue:
+    """Mongo-backed job queue that runs AI verification in the background"""
+
+    def __init__(self, workers: int, max_attempts: int, backoff_seconds: float, lease_seconds: int, poll_seconds: float):
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.backoff_seconds = backoff_seconds
+        self.lease_seconds = lease_seconds
+        self.poll_seconds = poll_seconds
+        self._wakeup = asyncio.Event()
+        self._tasks = []
+        self.processed = 0
+        self.retried = 0
+        self.failed = 0
+
+    async def enqueue(self, card: dict) -> dict:
+        jobs = await self.enqueue_many([card])
+        return jobs[0]
+
+    async def enqueue_many(self, cards: list) -> list:
+        """Queue each card's verification_job_id in a single insert, cancelling jobs it supersedes"""
+        now = datetime.now(timezone.utc).isoformat()
+        jobs = [{
+            "id": card['verification_job_id'],
+            "card_id": card['id'],
+            "status": "queued",  # queued, running, done, failed, cancelled
+            "attempts": 0,
+            "next_run_at": now,
+            "lease_expires_at": None,
+            "last_error": None,
+            "result": None,
+            "created_at": now,
+            "updated_at": now
+        } for card in cards]
+        if not jobs:
+            return []
+        await db.verification_jobs.update_many(
+            {"card_id": {"$in": [job['card_id'] for job in jobs]}, "status": "queued"},
+            {"$set": {"status": "cancelled", "last_error": "Superseded by a newer job", "updated_at": now}}
+        )
+        await db.verification_jobs.insert_many(jobs)
+        for job in jobs:
+            job.pop("_id", None)
+        self._wakeup.set()
+        return jobs
+
+    async def _claim(self) -> Optional[dict]:
+        now = datetime.now(timezone.utc)
+        now_iso = now.isoformat()
+        # Expired leases belong to workers that died mid-job, e.g. on restart
+        return await db.verification_jobs.find_one_and_update(
+            {"$or": [
+                {"status": "queued", "next_run_at": {"$lte": now_iso}},
+                {"status": "running", "lease_expires_at": {"$lte": now_iso}}
+            ]},
+            {
+                "$set": {
+                    "status": "running",
+                    "lease_expires_at": (now + timedelta(seconds=self.lease_seconds)).isoformat(),
+                    "updated_at": now_iso
+                },
+                "$inc": {"attempts": 1}
+            },
+            sort=[("next_run_at", 1)],
+            projection={"_id": 0},
+            return_document=ReturnDocument.AFTER
+        )
+
+    async def _finish(self, job: dict, status: str, **fields):
+        fields.update({
+            "status": status,
+            "lease_expires_at": None,
+            "updated_at": datetime.now(timezone.utc).isoformat()
+        })
+        await db.verification_jobs.update_one({"id": job["id"]}, {"$set": fields})
+
+    async def _retry_or_fail(self, job: dict, card_id: str, error: str):
+        if job["attempts"] < self.max_attempts:
+            delay = self.backoff_seconds * (2 ** (job["attempts"] - 1))
+            next_run = datetime.now(timezone.utc) + timedelta(seconds=delay)
+            await self._finish(job, "queued", next_run_at=next_run.isoformat(), last_error=error)
+            self.retried += 1
+            return
+        await self._finish(job, "failed", last_error=error)
+        self.failed += 1
+        # Leave the card for manual review, as inline verification used to
+        settled = {
+            "status": "pending",
+            "ai_verification_result": error,
+            "updated_at": datetime.now(timezone.utc).isoformat()
+        }
+        result = await db.ration_cards.update_one(self.settle_filter(job), {"$set": settled})
+        if result.modified_count:
+            await card_stats.record([("verifying", "pending", 0)])
+            await card_events.publish("verified", [{"id": card_id, **settled}])
+
+    @staticmethod
+    def settle_filter(job: dict) -> dict:
+        """Only the card's latest job settles it, and only while it is verifying"""
+        # None matches cards queued before verification_job_id existed
+        return {"id": job["card_id"], "status": "verifying", "verification_job_id": {"$in": [job["id"], None]}}
+
+    async def _process(self, job: dict):
+        card = await db.ration_cards.find_one({"id": job["card_id"]}, {"_id": 0})
+        if not card:
+            await self._finish(job, "cancelled", last_error="Card no longer exists")
+            return
+        if card.get('verification_job_id') not in (job["id"], None):
+            # The card was edited after this job was queued; its newer job verifies the new fields
+            await self._finish(job, "cancelled", last_error="Superseded by a newer job")
+            return
+        
+        ai_result = await verify_ration_card(card)
+        if ai_result['result'] == 'error':
+            await self._retry_or_fail(job, card['id'], ai_result['details'])
+            return
+        
+        # Only settle cards an admin has not already acted on and that were not edited meanwhile
+        settled = {
+            "status": "fake" if ai_result['result'] == 'fake' else "pending",
+            "ai_verification_result": ai_result['details'],
+            "updated_at": datetime.now(timezone.utc).isoformat()
+        }
+        result = await db.ration_cards.update_one(self.settle_filter(job), {"$set": settled})
+        if result.modified_count:
+            await card_stats.record([("verifying", settled['status'], 0)])
+            await card_stats.record_verification(ai_result['result'])
+            await card_events.publish("verified", [{"id": card['id'], **settled}])
+        # Stats reconciliation only counts verdicts that settled the card
+        await self._finish(job, "done", result=ai_result['result'], last_error=None, settled=bool(result.modified_count))
+        self.processed += 1
+
+    async def _worker(self):
+        while True:
+            self._wakeup.clear()
+            try:
+                job = await self._claim()
+            except Exception as e:
+                logging.error(f"Verification queue claim error: {str(e)}")
+                await asyncio.sleep(self.poll_seconds)
+                continue
+            
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_seconds)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            
+            try:
+                await self._process(job)
+            except Exception as e:
+                logging.error(f"Verification job {job['id']} error: {str(e)}")
+                try:
+                    await self._retry_or_fail(job, job["card_id"], str(e))
+                except Exception as e:
+                    logging.error(f"Verification job {job['id']} could not be rescheduled: {str(e)}")
+
+    def start(self):
+        for _ in range(self.workers):
+            self._tasks.append(asyncio.create_task(self._worker()))
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def stats(self) -> dict:
+        counts = {}
+        async for row in db.verification_jobs.aggregate([{"$group": {"_id": "$status", "count": {"$sum": 1}}}]):
+            counts[row["_id"]] = row["count"]
+        return {
+            "workers": self.workers,
+            "jobs": counts,
+            "processed": self.processed,
+            "retried": self.retried,
+            "failed": self.failed,
+            "prescreen": prescreener.stats(),
+            "cache": verification_cache.stats(),
+        }
+
+verification_queue = VerificationQueue(
+    VERIFICATION_WORKERS,
+    VERIFICATION_MAX_ATTEMPTS,
+    VERIFICATION_BACKOFF_SECONDS,
+    VERIFICATION_LEASE_SECONDS,
+    VERIFICATION_POLL_SECONDS
+)
+
+# Outbound HTTP
+RETRY_STATUSES = {502, 503, 504}
+
+class OutboundHttp:
+    """Shared pooled async HTTP client, opened at startup and closed at shutdown"""
+
+    def __init__(self, retries: int, backoff_seconds: float):
+        self.retries = retries
+        self.backoff_seconds = backoff_seconds
+        self.client = None
+        self.requests = 0
+        self.retried = 0
+
+    def start(self):
+        limits = httpx.Limits(max_connections=HTTP_MAX_CONNECTIONS, max_keepalive_connections=HTTP_MAX_KEEPALIVE)
+        self.client = httpx.AsyncClient(
+            timeout=httpx.Timeout(HTTP_READ_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT),
+            # No transport retries: request() already retries failed connects, and both
+            # layers together multiplied the attempts
+            transport=httpx.AsyncHTTPTransport(limits=limits)
+        )
+
+    async def close(self):
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+
+    async def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """Send a request, retrying failed connects, timeouts and gateway errors with backoff"""
+        if self.client is None:
+            raise RuntimeError("HTTP client is not started")
+        for attempt in range(self.retries + 1):
+            self.requests += 1
+            try:
+                with metrics.span("http", method):
+                    response = await self.client.request(method, url, **kwargs)
+            except (httpx.TimeoutException, httpx.NetworkError):
+                if attempt == self.retries:
+                    raise
+            else:
+                if response.status_code not in RETRY_STATUSES or attempt == self.retries:
+                    return response
+            self.retried += 1
+            await asyncio.sleep(self.backoff_seconds * (2 ** attempt))
+
+    def stats(self) -> dict:
+        return {"requests": self.requests, "retried": self.retried}
+
+http = OutboundHttp(HTTP_RETRIES, HTTP_RETRY_BACKOFF_SECONDS)
+
+# SMS Delivery
+class TokenBucket:
+    """Async token-bucket rate limiter"""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = max(1, capacity)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        # Waiters queue on the lock, so tokens are handed out in arrival order
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+class TwilioSmsBackend:
+    """Sends through the Twilio REST API (blocking)"""
+
+    name = "twilio"
+
+    def __init__(self):
+        self.client = Client(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN)
+
+    def send(self, to: str, body: str) -> str:
+        message = self.client.messages.create(body=body, from_=TWILIO_PHONE, to=to)
+        return message.sid
+
+class FakeSmsBackend:
+    """Records messages in memory instead of sending them, for offline use"""
+
+    name = "fake"
+
+    def __init__(self, fail_numbers: Optional[set] = None):
+        self.fail_numbers = fail_numbers or set()
+        # Only the latest are kept, so a long-running fake backend stays bounded
+        self.messages = deque(maxlen=SMS_FAKE_MAX_MESSAGES)
+
+    def send(self, to: str, body: str) -> str:
+        if to in self.fail_numbers:
+            raise RuntimeError(f"Fake delivery failure for {to}")
+        sid = f"FAKE{uuid.uuid4().hex[:16].upper()}"
+        self.messages.append({"sid": sid, "to": to, "body": body})
+        return sid
+
+SMS_BACKENDS = {"twilio": TwilioSmsBackend, "fake": FakeSmsBackend}
+
+class SmsSender:
+    """Sends SMS through a backend on a thread pool under a shared rate limit"""
+
+    def __init__(self, backend, workers: int, rate: float, burst: int):
+        self.backend = backend
+        self.workers = max(1, workers)
+        self.bucket = TokenBucket(rate, burst)
+        # Backends may block, so calls run off the event loop
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="sms")
+        self._slots = asyncio.Semaphore(self.workers)
+        self.sent = 0
+        self.failed = 0
+
+    async def send(self, to: str, body: str) -> str:
+        async with self._slots:
+            await self.bucket.acquire()
+            loop = asyncio.get_running_loop()
+            try:
+                with metrics.span("sms", self.backend.name):
+                    sid = await loop.run_in_executor(self._executor, self.backend.send, to, body)
+            except Exception:
+                self.failed += 1
+                raise
+            self.sent += 1
+            return sid
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> dict:
+        return {
+            "backend": self.backend.name,
+            "workers": self.workers,
+            "rate_per_second": self.bucket.rate,
+            "burst": self.bucket.capacity,
+            "sent": self.sent,
+            "failed": self.failed,
+        }
+
+sms_sender = SmsSender(SMS_BACKENDS[SMS_BACKEND](), SMS_WORKERS, SMS_RATE_PER_SECOND, SMS_BURST)
+
+class SmsOutbox:
+    """Durable Mongo outbox drained by background dispatchers"""
+
+    def __init__(self, sender: SmsSender, max_attempts: int, backoff_seconds: float, lease_seconds: int, poll_seconds: float):
+        self.sender = sender
+        self.max_attempts = max_attempts
+        self.backoff_seconds = backoff_seconds
+        self.lease_seconds = lease_seconds
+        self.poll_seconds = poll_seconds
+        self._wakeup = asyncio.Event()
+        self._tasks = []
+        self.retried = 0
+        self.dead_lettered = 0
+
+    async def enqueue(self, distribution_id: str, user_ids: list, body: str) -> dict:
+        """Queue one message per recipient; (distribution, user) pairs are idempotent"""
+        counts = {"queued": 0, "skipped": 0, "duplicate": 0}
+        for i in range(0, len(user_ids), SMS_BATCH_SIZE):
+            batch = user_ids[i:i + SMS_BATCH_SIZE]
+            users = await db.users.find({"id": {"$in": batch}}, {"_id": 0, "id": 1, "phone": 1}).to_list(len(batch))
+            phones = {u['id']: u.get('phone') for u in users}
+            now = datetime.now(timezone.utc).isoformat()
+            messages = []
+            for user_id in batch:
+                phone = phones.get(user_id)
+                messages.append({
+                    "id": f"{distribution_id}:{user_id}",
+                    "distribution_id": distribution_id,
+                    "user_id": user_id,
+                    "phone": phone,
+                    "body": body,
+                    "status": "queued" if phone else "skipped",  # queued, sending, sent, skipped, dead
+                    "attempts": 0,
+                    "next_attempt_at": now,
+                    "lease_expires_at": None,
+                    "sid": None,
+                    "error": None if phone else "No phone number on file",
+                    "latency_ms": None,
+                    "created_at": now,
+                    "updated_at": now
+                })
+            try:
+                await db.sms_outbox.insert_many(messages, ordered=False)
+                inserted = messages
+            except BulkWriteError as e:
+                duplicates = {err['op']['id'] for err in e.details.get('writeErrors', []) if err.get('code') == 11000}
+                if len(duplicates) != len(e.details.get('writeErrors', [])):
+                    raise
+                counts["duplicate"] += len(duplicates)
+                inserted = [m for m in messages if m['id'] not in duplicates]
+            for message in inserted:
+                counts["queued" if message['phone'] else "skipped"] += 1
+        self._wakeup.set()
+        return counts
 
-async def get_admin_user(user: User = Depends(get_current_user)):
-    if user.role != "admin":
-        raise HTTPException(status_code=403, detail="Admin access required")
-    return user
+    async def _claim(self) -> Optional[dict]:
+        now = datetime.now(timezone.utc)
+        now_iso = now.isoformat()
+        return await db.sms_outbox.find_one_and_update(
+            {"$or": [
+                {"status": "queued", "next_attempt_at": {"$lte": now_iso}},
+                {"status": "sending", "lease_expires_at": {"$lte": now_iso}}
+            ]},
+            {
+                "$set": {
+                    "status": "sending",
+                    "lease_expires_at": (now + timedelta(seconds=self.lease_seconds)).isoformat(),
+                    "updated_at": now_iso
+                },
+                "$inc": {"attempts": 1}
+            },
+            sort=[("next_attempt_at", 1)],
+            projection={"_id": 0},
+            return_document=ReturnDocument.AFTER
+        )
 
-async def verify_ration_card_with_ai(card_data: dict) -> dict:
-    """Use Claude Sonnet 4 to verify ration card authenticity"""
-    try:
-        chat = LlmChat(
-            api_key=EMERGENT_LLM_KEY,
-            session_id=f"verification_{card_data['id']}",
-            system_message="You are an expert at detecting fake documents and verifying ration card applications. Analyze the provided information and determine if it appears genuine or fake."
-        ).with_model("anthropic", "claude-3-7-sonnet-20250219")
+    async def _dispatch(self, message: dict):
+        now = datetime.now(timezone.utc)
+        try:
+            sid = await self.sender.send(message['phone'], message['body'])
+        except Exception as e:
+            update = {"error": str(e), "lease_expires_at": None, "updated_at": now.isoformat()}
+            if message['attempts'] >= self.max_attempts:
+                update["status"] = "dead"
+                self.dead_lettered += 1
+            else:
+                delay = self.backoff_seconds * (2 ** (message['attempts'] - 1))
+                update["status"] = "queued"
+                update["next_attempt_at"] = (now + timedelta(seconds=delay)).isoformat()
+                self.retried += 1
+            await db.sms_outbox.update_one({"id": message['id']}, {"$set": update})
+            return
         
-        message = UserMessage(
-            text=f"""Analyze this ration card application:
-            Name: {card_data['name']}
-            Address: {card_data['address']}
-            Family Members: {card_data['family_members']}
-            Aadhaar: {card_data['aadhaar']}
+        sent_at = datetime.now(timezone.utc)
+        await db.sms_outbox.update_one({"id": message['id']}, {"$set": {
+            "status": "sent",
+            "sid": sid,
+            "error": None,
+            "lease_expires_at": None,
+            "latency_ms": (sent_at - datetime.fromisoformat(message['created_at'])).total_seconds() * 1000,
+            "updated_at": sent_at.isoformat()
+        }})
+
+    async def _worker(self):
+        while True:
+            self._wakeup.clear()
+            try:
+                message = await self._claim()
+            except Exception as e:
+                logging.error(f"SMS outbox claim error: {str(e)}")
+                await asyncio.sleep(self.poll_seconds)
+                continue
             
-            Check for:
-            1. Aadhaar format validity (12 digits)
-            2. Reasonable family member count
-            3. Address completeness
-            4. Any suspicious patterns
+            if message is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_seconds)
+                except asyncio.TimeoutError:
+                    pass
+                continue
             
-            Respond with: GENUINE or FAKE followed by a brief reason."""
-        )
-        
-        response = await chat.send_message(message)
-        return {
-            "result": "fake" if "FAKE" in response.upper() else "genuine",
-            "details": response
-        }
-    except Exception as e:
-        logging.error(f"AI verification error: {str(e)}")
-        return {"result": "error", "details": str(e)}
+            try:
+                await self._dispatch(message)
+            except Exception as e:
+                # The lease expires and another dispatcher picks the message up
+                logging.error(f"SMS outbox message {message['id']} error: {str(e)}")
+
+    def start(self):
+        for _ in range(self.sender.workers):
+            self._tasks.append(asyncio.create_task(self._worker()))
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def summary(self, distribution_id: Optional[str] = None) -> dict:
+        """Message counts by status and delivery latency"""
+        pipeline = [{"$match": {"distribution_id": distribution_id}}] if distribution_id else []
+        pipeline.append({"$group": {
+            "_id": "$status",
+            "count": {"$sum": 1},
+            "avg_latency_ms": {"$avg": "$latency_ms"},
+            "max_latency_ms": {"$max": "$latency_ms"}
+        }})
+        summary = {"counts": {}, "avg_latency_ms": None, "max_latency_ms": None}
+        async for row in db.sms_outbox.aggregate(pipeline):
+            summary["counts"][row["_id"]] = row["count"]
+            if row["_id"] == "sent":
+                summary["avg_latency_ms"] = row["avg_latency_ms"]
+                summary["max_latency_ms"] = row["max_latency_ms"]
+        return summary
+
+    def stats(self) -> dict:
+        stats = self.sender.stats()
+        stats.update({"retried": self.retried, "dead_lettered": self.dead_lettered})
+        return stats
+
+sms_outbox = SmsOutbox(sms_sender, SMS_MAX_ATTEMPTS, SMS_BACKOFF_SECONDS, SMS_LEASE_SECONDS, SMS_POLL_SECONDS)
+
+# Slot Scheduling
+def assign_slots(households: list, slot_count: int, capacity: int) -> tuple:
+    """Longest-first greedy packing of (key, size) households into slots.
+
+    Each household goes to the currently least-loaded slot, which keeps slot
+    loads flat; if that slot cannot take it, no slot can. Returns the
+    assigned slot index per household, the unassigned households and the
+    final load of each slot.
+    """
+    heap = [(0, i) for i in range(slot_count)]
+    assigned = []
+    unassigned = []
+    for household in sorted(households, key=lambda h: h[1], reverse=True):
+        load, slot = heap[0]
+        if load + household[1] > capacity:
+            unassigned.append(household)
+            continue
+        heapq.heapreplace(heap, (load + household[1], slot))
+        assigned.append((household, slot))
+    loads = [0] * slot_count
+    for load, slot in heap:
+        loads[slot] = load
+    return assigned, unassigned, loads
+
+# Index Management
+REQUIRED_INDEXES = {
+    "users": [
+        IndexModel([("email", ASCENDING)], unique=True),
+        IndexModel([("id", ASCENDING)], unique=True),
+        IndexModel([("role", ASCENDING)]),
+    ],
+    "ration_cards": [
+        IndexModel([("id", ASCENDING)], unique=True),
+        IndexModel([("user_id", ASCENDING), ("status", ASCENDING)]),
+        IndexModel([("created_at", DESCENDING), ("id", DESCENDING)]),
+        IndexModel([("status", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)]),
+        IndexModel(
+            [("card_number", ASCENDING)],
+            unique=True,
+            partialFilterExpression={"card_number": {"$type": "string"}}
+        ),
+        IndexModel([("aadhaar", ASCENDING)]),
+    ],
+    "sessions": [
+        IndexModel([("session_token", ASCENDING)], unique=True),
+        IndexModel([("expires_at", ASCENDING)], expireAfterSeconds=0),
+    ],
+    "verification_jobs": [
+        IndexModel([("id", ASCENDING)], unique=True),
+        IndexModel([("status", ASCENDING), ("next_run_at", ASCENDING)]),
+        IndexModel([("status", ASCENDING), ("lease_expires_at", ASCENDING)]),
+        IndexModel([("card_id", ASCENDING), ("created_at", DESCENDING)]),
+    ],
+    "sms_outbox": [
+        IndexModel([("id", ASCENDING)], unique=True),
+        IndexModel([("status", ASCENDING), ("next_attempt_at", ASCENDING)]),
+        IndexModel([("status", ASCENDING), ("lease_expires_at", ASCENDING)]),
+        IndexModel([("distribution_id", ASCENDING), ("status", ASCENDING)]),
+    ],
+    "slot_assignments": [
+        IndexModel([("schedule_id", ASCENDING), ("slot", ASCENDING)]),
+        IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING)]),
+    ],
+    "audit_log": [
+        IndexModel([("card_id", ASCENDING), ("created_at", DESCENDING)]),
+        IndexModel([("batch_id", ASCENDING)]),
+        IndexModel([("action", ASCENDING), ("outcome", ASCENDING)]),
+        IndexModel([("created_at", DESCENDING)]),
+    ],
+    "card_events": [
+        IndexModel([("created_at", ASCENDING)], expireAfterSeconds=CARD_EVENTS_TTL_SECONDS),
+    ],
+    "schedules": [
+        IndexModel([("id", ASCENDING)], unique=True),
+    ],
+    "distributions": [
+        IndexModel([("id", ASCENDING)], unique=True),
+    ],
+    "card_fingerprints": [
+        IndexModel([("card_id", ASCENDING)], unique=True),
+        IndexModel([("aadhaar_hash", ASCENDING)]),
+        IndexModel([("text_bands", ASCENDING)]),
+        IndexModel([("photo_hash", ASCENDING)]),
+        IndexModel([("photo_bands", ASCENDING)]),
+        IndexModel([("matches.card_id", ASCENDING)]),
+        IndexModel(
+            [("updated_at", DESCENDING), ("card_id", DESCENDING)],
+            partialFilterExpression={"match_count": {"$gt": 0}}
+        ),
+    ],
+    "import_jobs": [
+        IndexModel([("id", ASCENDING)], unique=True),
+        IndexModel([("status", ASCENDING), ("created_at", ASCENDING)]),
+    ],
+    "import_rows": [
+        IndexModel([("import_id", ASCENDING), ("row", ASCENDING)]),
+    ],
+    "verification_cache": [
+        IndexModel([("key", ASCENDING)], unique=True),
+        IndexModel([("created_at", ASCENDING)], expireAfterSeconds=VERIFICATION_CACHE_TTL_SECONDS),
+    ],
+}
+
+# (name, collection, filter, sort) for every query the handlers issue
+QUERY_SHAPES = [
+    ("get_current_user", "users", {"id": "x"}, None),
+    ("login", "users", {"email": "x@example.com"}, None),
+    ("get_all_users", "users", {"role": "user"}, None),
+    ("apply_ration_card", "ration_cards", {"user_id": "x", "status": {"$in": ["verifying", "pending", "approved"]}}, None),
+    ("get_my_card", "ration_cards", {"user_id": "x"}, None),
+    ("approve_card", "ration_cards", {"id": "x"}, None),
+    ("get_all_cards", "ration_cards", {}, [("created_at", -1), ("id", -1)]),
+    ("get_all_cards:status", "ration_cards", {"status": {"$in": ["pending"]}}, [("created_at", -1), ("id", -1)]),
+    ("get_all_cards:card_number", "ration_cards", {"card_number": "x"}, None),
+    ("prescreen_aadhaar_matches", "ration_cards", {"id": {"$in": ["x"]}, "status": {"$ne": "rejected"}}, None),
+    ("session_lookup", "sessions", {"session_token": "x"}, None),
+    ("verification_claim", "verification_jobs", {"status": "queued", "next_run_at": {"$lte": "x"}}, [("next_run_at", 1)]),
+    ("verification_status", "verification_jobs", {"card_id": "x"}, [("created_at", -1)]),
+    ("verification_cache", "verification_cache", {"key": "x"}, None),
+    ("sms_outbox_claim", "sms_outbox", {"status": "queued", "next_attempt_at": {"$lte": "x"}}, [("next_attempt_at", 1)]),
+    ("schedule_assignments", "slot_assignments", {"schedule_id": "x", "slot": "x"}, None),
+    ("my_slot", "slot_assignments", {"user_id": "x"}, [("created_at", -1)]),
+    ("stats_approvals", "audit_log", {"action": "approve", "outcome": "approved", "previous_status": {"$ne": "approved"}}, None),
+    ("distribution_deliveries", "sms_outbox", {"distribution_id": "x", "status": "sent"}, None),
+    ("duplicate_aadhaar", "card_fingerprints", {"card_id": {"$ne": "x"}, "aadhaar_hash": "x"}, None),
+    ("duplicate_photo", "card_fingerprints", {"card_id": {"$ne": "x"}, "photo_hash": "x"}, None),
+    ("duplicate_text_bands", "card_fingerprints", {"card_id": {"$ne": "x"}, "text_bands": {"$in": ["x"]}}, None),
+    ("duplicate_photo_bands", "card_fingerprints", {"card_id": {"$ne": "x"}, "photo_bands": {"$in": ["x"]}}, None),
+    ("possible_duplicates", "card_fingerprints", {"match_count": {"$gt": 0}}, [("updated_at", -1), ("card_id", -1)]),
+]
+
+def plan_stages(plan) -> set:
+    """Collect every stage name in an explain() plan tree"""
+    stages = set()
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            stages.add(plan["stage"])
+        for value in plan.values():
+            stages |= plan_stages(value)
+    elif isinstance(plan, list):
+        for value in plan:
+            stages |= plan_stages(value)
+    return stages
+
+async def ensure_indexes():
+    """Create the declared indexes; create_indexes is a no-op for existing ones"""
+    for collection, indexes in REQUIRED_INDEXES.items():
+        try:
+            await db[collection].create_indexes(indexes)
+        except Exception as e:
+            logging.error(f"Index creation on {collection} failed: {str(e)}")
+            if INDEX_DIAGNOSTICS == "strict":
+                raise
+
+async def diagnose_query_plans() -> list:
+    """explain() each handler query shape and flag collection scans"""
+    report = []
+    for name, collection, query, sort in QUERY_SHAPES:
+        cursor = db[collection].find(query)
+        if sort:
+            cursor = cursor.sort(sort)
+        explain = await cursor.explain()
+        stages = plan_stages(explain.get("queryPlanner", {}).get("winningPlan", {}))
+        report.append({
+            "query": name,
+            "collection": collection,
+            "stages": sorted(stages),
+            "collscan": "COLLSCAN" in stages
+        })
+    return report
+
+async def bootstrap_indexes():
+    await ensure_indexes()
+    if INDEX_DIAGNOSTICS == "off":
+        return
+    scans = [row["query"] for row in await diagnose_query_plans() if row["collscan"]]
+    if not scans:
+        return
+    message = f"Queries doing a COLLSCAN: {', '.join(scans)}"
+    if INDEX_DIAGNOSTICS == "strict":
+        raise RuntimeError(message)
+    logging.warning(message)
 
 # Auth Endpoints
 @api_router.post("/auth/register")
@@ -202,30 +2581,33 @@ async def register(user_data: UserRegister):
     )
     
     user_dict = user.model_dump()
-    user_dict['password'] = hash_password(user_data.password)
+    user_dict['password'] = await password_pool.hash(user_data.password)
     user_dict['created_at'] = user_dict['created_at'].isoformat()
     
     await db.users.insert_one(user_dict)
+    principal_cache.put(user)
     
-    token = create_jwt_token(user.id, user.email, user.role)
-    return {"token": token, "user": user}
+    token = create_jwt_token(user.id, user.email, user.role, user)
+    return FastJSONResponse({"token": token, "user": user})
 
 @api_router.post("/auth/login")
 async def login(credentials: UserLogin):
     user = await db.users.find_one({"email": credentials.email}, {"_id": 0})
-    if not user or not verify_password(credentials.password, user['password']):
+    if not user or not await password_pool.verify(credentials.password, user['password']):
         raise HTTPException(status_code=401, detail="Invalid credentials")
     
-    token = create_jwt_token(user['id'], user['email'], user['role'])
     user_obj = User(**user)
-    return {"token": token, "user": user_obj}
+    principal_cache.put(user_obj)
+    token = create_jwt_token(user_obj.id, user_obj.email, user_obj.role, user_obj)
+    return FastJSONResponse({"token": token, "user": user_obj})
 
 @api_router.post("/auth/google-session")
 async def google_session(data: GoogleAuthSession):
     """Process Google OAuth session ID"""
     try:
-        response = requests.get(
-            "https://demobackend.emergentagent.com/auth/v1/env/oauth/session-data",
+        response = await http.request(
+            "GET",
+            OAUTH_SESSION_URL,
             headers={"X-Session-ID": data.session_id}
         )
         
@@ -248,162 +2630,1339 @@ async def google_session(data: GoogleAuthSession):
                 role="user"
             )
             user_dict = user.model_dump()
-            user_dict['password'] = hash_password(str(uuid.uuid4()))  # Random password for OAuth users
+            user_dict['password'] = await password_pool.hash(str(uuid.uuid4()))  # Random password for OAuth users
             user_dict['created_at'] = user_dict['created_at'].isoformat()
             await db.users.insert_one(user_dict)
+        principal_cache.put(user)
         
         # Store session
         session_expiry = datetime.now(timezone.utc) + timedelta(days=7)
         await db.sessions.insert_one({
             "session_token": session_data['session_token'],
             "user_id": user.id,
-            "expires_at": session_expiry.isoformat()
+            # BSON date so the TTL index can expire it
+            "expires_at": session_expiry
         })
         
-        token = create_jwt_token(user.id, user.email, user.role)
-        return {"token": token, "user": user, "session_token": session_data['session_token']}
+        token = create_jwt_token(user.id, user.email, user.role, user)
+        return FastJSONResponse({"token": token, "user": user, "session_token": session_data['session_token']})
     
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @api_router.get("/auth/me")
 async def get_me(user: User = Depends(get_current_user)):
-    return user
+    return FastJSONResponse(user)
 
 # Ration Card Endpoints
-@api_router.post("/ration-cards/apply")
-async def apply_ration_card(application: RationCardApplication, user: User = Depends(get_current_user)):
+async def ensure_no_active_application(user: User):
     # Check if user already has a pending or approved application
     existing = await db.ration_cards.find_one({
         "user_id": user.id,
-        "status": {"$in": ["pending", "approved"]}
+        "status": {"$in": ["verifying", "pending", "approved"]}
     })
     
     if existing:
         raise HTTPException(status_code=400, detail="You already have an active application")
+
+async def submit_application(user: User, fields: dict, documents: dict) -> dict:
+    fields['aadhaar'] = normalize_aadhaar(fields['aadhaar'])
+    card = RationCard(user_id=user.id, **fields, **documents)
     
-    card = RationCard(
-        user_id=user.id,
-        name=application.name,
-        address=application.address,
-        family_members=application.family_members,
-        aadhaar=application.aadhaar,
-        income_proof=application.income_proof,
-        photo=application.photo
-    )
-    
-    # AI Verification
     card_dict = card.model_dump()
-    ai_result = await verify_ration_card_with_ai(card_dict)
-    card_dict['ai_verification_result'] = ai_result['details']
-    
-    if ai_result['result'] == 'fake':
-        card_dict['status'] = 'fake'
-    
     card_dict['created_at'] = card_dict['created_at'].isoformat()
     card_dict['updated_at'] = card_dict['updated_at'].isoformat()
     
     await db.ration_cards.insert_one(card_dict)
+    await card_stats.record([(None, card.status, card.family_members)])
+    await card_events.publish("created", [card_dict])
+    # Indexed before verification so pre-screening sees the matches
+    await duplicate_index.index(card_dict)
+    
+    # AI Verification runs in the background
+    job = await verification_queue.enqueue(card_dict)
+    
+    # The stored dict is the response; re-dumping the model would encode the card twice
+    return FastJSONResponse({
+        "message": "Application submitted",
+        "card": {k: v for k, v in card_dict.items() if k != "_id"},
+        "ai_verification": {"result": "queued", "job_id": job['id']}
+    })
+
+@api_router.post("/ration-cards/apply")
+async def apply_ration_card(application: RationCardApplication, user: User = Depends(get_current_user)):
+    await ensure_no_active_application(user)
+    
+    documents = await store_encoded_documents({field: getattr(application, field) for field in DOCUMENT_FIELDS})
+    fields = application.model_dump(exclude=set(DOCUMENT_FIELDS))
+    return await submit_application(user, fields, documents)
+
+@api_router.post("/ration-cards/apply-upload")
+async def apply_ration_card_upload(
+    name: str = Form(...),
+    address: str = Form(...),
+    family_members: int = Form(...),
+    aadhaar: str = Form(...),
+    income_proof: UploadFile = File(...),
+    photo: UploadFile = File(...),
+    user: User = Depends(get_current_user)
+):
+    """Multipart variant of /ration-cards/apply that streams documents to storage"""
+    await ensure_no_active_application(user)
     
-    return {"message": "Application submitted", "card": card, "ai_verification": ai_result}
+    documents = await store_uploaded_documents({"income_proof": income_proof, "photo": photo})
+    fields = {"name": name, "address": address, "family_members": family_members, "aadhaar": aadhaar}
+    return await submit_application(user, fields, documents)
 
 @api_router.get("/ration-cards/my-card")
 async def get_my_card(user: User = Depends(get_current_user)):
     card = await db.ration_cards.find_one({"user_id": user.id}, {"_id": 0})
     if not card:
         raise HTTPException(status_code=404, detail="No ration card found")
-    return card
+    return FastJSONResponse(card)
 
-@api_router.put("/ration-cards/update")
-async def update_ration_card(update: RationCardUpdate, user: User = Depends(get_current_user)):
-    card = await db.ration_cards.find_one({"user_id": user.id, "status": {"$in": ["approved", "pending"]}})
+@api_router.get("/ration-cards/my-card/documents/{document}")
+async def download_my_document(document: str, range: Optional[str] = Header(None), user: User = Depends(get_current_user)):
+    """Stream the user's income proof, photo or photo thumbnail, with Range support"""
+    if document not in DOWNLOADABLE_DOCUMENTS:
+        raise HTTPException(status_code=404, detail="Unknown document")
+    card = await db.ration_cards.find_one({"user_id": user.id}, {"_id": 0, document: 1})
+    if not card or not isinstance(card.get(document), dict):
+        raise HTTPException(status_code=404, detail="Document not found")
+    return blob_service.response(card[document], range)
+
+async def find_active_card(user: User) -> dict:
+    card = await db.ration_cards.find_one({"user_id": user.id, "status": {"$in": ["approved", "pending", "verifying"]}})
     if not card:
         raise HTTPException(status_code=404, detail="No active ration card found")
-    
-    update_data = {k: v for k, v in update.model_dump().items() if v is not None}
+    return card
+
+async def save_card_update(card: dict, update_data: dict):
     update_data['updated_at'] = datetime.now(timezone.utc).isoformat()
+    if 'aadhaar' in update_data:
+        update_data['aadhaar'] = normalize_aadhaar(update_data['aadhaar'])
+    
+    # Edits to verified fields of an unapproved card send it back through verification
+    reverify = card['status'] != "approved" and any(
+        field in update_data and update_data[field] != card.get(field) for field in VERIFIED_FIELDS
+    )
+    if reverify:
+        update_data['status'] = "verifying"
+        # Written with the edit, so a job still running for the old fields cannot settle the card
+        update_data['verification_job_id'] = str(uuid.uuid4())
     
     await db.ration_cards.update_one(
         {"id": card['id']},
         {"$set": update_data}
     )
+    await card_stats.record([(
+        card['status'],
+        update_data.get('status', card['status']),
+        update_data.get('family_members', card['family_members']) - card['family_members']
+    )])
+    await card_events.publish("updated", [{"id": card['id'], **update_data}])
+    if any(field in update_data for field in ("name", "address", "aadhaar", "photo_hash")):
+        await duplicate_index.index({**card, **update_data})
+    
+    if reverify:
+        await verification_queue.enqueue({"id": card['id'], **update_data})
+
+@api_router.put("/ration-cards/update")
+async def update_ration_card(update: RationCardUpdate, user: User = Depends(get_current_user)):
+    card = await find_active_card(user)
+    
+    update_data = {k: v for k, v in update.model_dump().items() if v is not None}
+    # The form sends "" for documents the user did not replace
+    documents = {field: update_data.pop(field) for field in DOCUMENT_FIELDS if field in update_data}
+    documents = {field: value for field, value in documents.items() if value != ""}
+    update_data.update(await store_encoded_documents(documents))
+    
+    await save_card_update(card, update_data)
+    return {"message": "Ration card updated successfully"}
+
+@api_router.put("/ration-cards/update-upload")
+async def update_ration_card_upload(
+    name: Optional[str] = Form(None),
+    address: Optional[str] = Form(None),
+    family_members: Optional[int] = Form(None),
+    aadhaar: Optional[str] = Form(None),
+    income_proof: Optional[UploadFile] = File(None),
+    photo: Optional[UploadFile] = File(None),
+    user: User = Depends(get_current_user)
+):
+    """Multipart variant of /ration-cards/update that streams documents to storage"""
+    card = await find_active_card(user)
     
+    fields = {"name": name, "address": address, "family_members": family_members, "aadhaar": aadhaar}
+    update_data = {k: v for k, v in fields.items() if v is not None}
+    uploads = {"income_proof": income_proof, "photo": photo}
+    # An empty file input still sends a part, with no filename
+    update_data.update(await store_uploaded_documents({k: v for k, v in uploads.items() if v is not None and v.filename}))
+    
+    await save_card_update(card, update_data)
     return {"message": "Ration card updated successfully"}
 
+@api_router.get("/ration-cards/verification-status")
+async def get_verification_status(user: User = Depends(get_current_user)):
+    """Status of the latest AI verification job for the user's card"""
+    card = await db.ration_cards.find_one(
+        {"user_id": user.id},
+        {"_id": 0, "id": 1, "status": 1, "ai_verification_result": 1},
+        sort=[("created_at", -1)]
+    )
+    if not card:
+        raise HTTPException(status_code=404, detail="No ration card found")
+    
+    job = await db.verification_jobs.find_one({"card_id": card['id']}, {"_id": 0}, sort=[("created_at", -1)])
+    return FastJSONResponse({"card": card, "job": job})
+
 # Admin Endpoints
+CARD_FIELDS = set(RationCard.model_fields)
+# Listings carry the thumbnail reference; full documents are opt-in
+CARD_DEFAULT_FIELDS = CARD_FIELDS - set(DOCUMENT_FIELDS)
+
+def encode_cursor(card: dict) -> str:
+    raw = json.dumps([card['created_at'], card['id']]).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii')
+
+def decode_cursor(cursor: str) -> tuple:
+    try:
+        created_at, card_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        return str(created_at), str(card_id)
+    except (ValueError, TypeError, binascii.Error):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def card_projection(fields: Optional[str]) -> dict:
+    """Mongo projection for a comma-separated field list; blobs are opt-in"""
+    if fields:
+        selected = {f.strip() for f in fields.split(",") if f.strip()}
+        unknown = selected - CARD_FIELDS
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+    else:
+        selected = set(CARD_DEFAULT_FIELDS)
+    # The cursor is built from these
+    selected |= {"id", "created_at"}
+    projection = {field: 1 for field in selected}
+    projection["_id"] = 0
+    return projection
+
+def card_filter(status_filter: Optional[str], created_from: Optional[str], created_to: Optional[str], card_number: Optional[str]) -> dict:
+    query = {}
+    if status_filter:
+        query["status"] = {"$in": [s.strip() for s in status_filter.split(",") if s.strip()]}
+    if created_from or created_to:
+        query["created_at"] = {}
+        if created_from:
+            query["created_at"]["$gte"] = created_from
+        if created_to:
+            query["created_at"]["$lt"] = created_to
+    if card_number:
+        query["card_number"] = card_number
+    return query
+
 @api_router.get("/admin/cards")
-async def get_all_cards(admin: User = Depends(get_admin_user)):
-    cards = await db.ration_cards.find({}, {"_id": 0}).to_list(1000)
-    return cards
+async def get_all_cards(
+    limit: int = Query(ADMIN_PAGE_SIZE, ge=1),
+    cursor: Optional[str] = None,
+    status: Optional[str] = None,
+    created_from: Optional[str] = None,
+    created_to: Optional[str] = None,
+    card_number: Optional[str] = None,
+    fields: Optional[str] = None,
+    include_total: bool = False,
+    admin: User = Depends(get_admin_user)
+):
+    """Newest-first keyset pagination over ration cards"""
+    limit = min(limit, ADMIN_MAX_PAGE_SIZE)
+    query = card_filter(status, created_from, created_to, card_number)
+    
+    page_query = dict(query)
+    if cursor:
+        created_at, card_id = decode_cursor(cursor)
+        page_query = {"$and": [query, {"$or": [
+            {"created_at": {"$lt": created_at}},
+            {"created_at": created_at, "id": {"$lt": card_id}}
+        ]}]}
+    
+    cards = await db.ration_cards.find(page_query, card_projection(fields)) \
+        .sort([("created_at", -1), ("id", -1)]) \
+        .limit(limit + 1) \
+        .to_list(limit + 1)
+    
+    has_more = len(cards) > limit
+    cards = cards[:limit]
+    response = {
+        "items": cards,
+        "next_cursor": encode_cursor(cards[-1]) if has_more else None
+    }
+    if include_total:
+        # Unfiltered totals come from collection metadata instead of an index scan
+        response["total"] = await (
+            db.ration_cards.count_documents(query) if query else db.ration_cards.estimated_document_count()
+        )
+    return FastJSONResponse(response)
+
+@api_router.get("/admin/cards/{card_id}/documents/{document}")
+async def download_card_document(card_id: str, document: str, range: Optional[str] = Header(None), admin: User = Depends(get_admin_user)):
+    """Stream a card's income proof, photo or photo thumbnail, with Range support"""
+    if document not in DOWNLOADABLE_DOCUMENTS:
+        raise HTTPException(status_code=404, detail="Unknown document")
+    card = await db.ration_cards.find_one({"id": card_id}, {"_id": 0, document: 1})
+    if not card or not isinstance(card.get(document), dict):
+        raise HTTPException(status_code=404, detail="Document not found")
+    return blob_service.response(card[document], range)
+
+DUPLICATE_SUMMARY_PROJECTION = {
+    "_id": 0, "id": 1, "user_id": 1, "name": 1, "address": 1, "status": 1,
+    "card_number": 1, "photo_thumbnail": 1, "created_at": 1
+}
+
+async def card_summaries(card_ids: list) -> dict:
+    cards = await db.ration_cards.find({"id": {"$in": card_ids}}, DUPLICATE_SUMMARY_PROJECTION).to_list(len(card_ids))
+    return {card['id']: card for card in cards}
+
+@api_router.get("/admin/cards/{card_id}/duplicates")
+async def get_card_duplicates(card_id: str, admin: User = Depends(get_admin_user)):
+    """Live lookup of cards that share this card's Aadhaar, or resemble its name+address or photo"""
+    card = await db.ration_cards.find_one(
+        {"id": card_id},
+        {"_id": 0, "id": 1, "user_id": 1, "name": 1, "address": 1, "aadhaar": 1, "photo_hash": 1}
+    )
+    if not card:
+        raise HTTPException(status_code=404, detail="Card not found")
+    matches = await duplicate_index.matches(duplicate_index.fingerprint(card))
+    summaries = await card_summaries([m['card_id'] for m in matches])
+    return {
+        "card_id": card_id,
+        "matches": [{**match, "card": summaries.get(match['card_id'])} for match in matches]
+    }
+
+@api_router.get("/admin/duplicates")
+async def get_possible_duplicates(
+    limit: int = Query(ADMIN_PAGE_SIZE, ge=1),
+    cursor: Optional[str] = None,
+    admin: User = Depends(get_admin_user)
+):
+    """Cards flagged at write time as resembling an existing card, most recent first"""
+    limit = min(limit, ADMIN_MAX_PAGE_SIZE)
+    query = {"match_count": {"$gt": 0}}
+    if cursor:
+        updated_at, card_id = decode_cursor(cursor)
+        query["$or"] = [
+            {"updated_at": {"$lt": updated_at}},
+            {"updated_at": updated_at, "card_id": {"$lt": card_id}}
+        ]
+    flagged = await db.card_fingerprints.find(query, {"_id": 0, "card_id": 1, "matches": 1, "updated_at": 1}) \
+        .sort([("updated_at", -1), ("card_id", -1)]) \
+        .limit(limit + 1) \
+        .to_list(limit + 1)
+    
+    has_more = len(flagged) > limit
+    flagged = flagged[:limit]
+    summaries = await card_summaries(list({
+        card_id
+        for entry in flagged
+        for card_id in [entry['card_id']] + [m['card_id'] for m in entry['matches']]
+    }))
+    items = [{
+        "card": summaries.get(entry['card_id']),
+        "flagged_at": entry['updated_at'],
+        "matches": [{**match, "card": summaries.get(match['card_id'])} for match in entry['matches']]
+    } for entry in flagged]
+    last = flagged[-1] if flagged else None
+    return {
+        "items": items,
+        "next_cursor": encode_cursor({"created_at": last['updated_at'], "id": last['card_id']}) if has_more else None
+    }
+
+class CardNumberAllocator:
+    """Sequential card numbers from an atomic Mongo counter, leased in blocks.
+
+    Each process reserves CARD_NUMBER_BLOCK_SIZE numbers per counter round
+    trip and hands them out from memory. Numbers read
+    <prefix><region><8-digit sequence><Verhoeff check digit>.
+    """
+
+    def __init__(self, prefix: str, block_size: int):
+        self.prefix = prefix
+        self.block_size = max(1, block_size)
+        self._blocks = {}  # region -> (next sequence, end of lease)
+        self._lock = asyncio.Lock()
+        self.allocated = 0
+        self.leases = 0
+
+    def format(self, region: str, sequence: int) -> str:
+        digits = f"{region}{sequence:08d}"
+        return f"{self.prefix}{digits}{verhoeff_check_digit(digits)}"
+
+    async def _lease(self, region: str, size: int) -> tuple:
+        counter = await db.counters.find_one_and_update(
+            {"_id": f"card_number:{region}"},
+            {"$inc": {"seq": size}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        self.leases += 1
+        return counter["seq"] - size + 1, counter["seq"] + 1
+
+    async def allocate(self, count: int, region: Optional[str] = None) -> list:
+        region = region or CARD_NUMBER_REGION
+        if not region.isdigit() or len(region) > 6:
+            raise HTTPException(status_code=400, detail="Region must be up to 6 digits")
+        numbers = []
+        async with self._lock:
+            while len(numbers) < count:
+                next_seq, end = self._blocks.get(region, (0, 0))
+                if next_seq >= end:
+                    next_seq, end = await self._lease(region, max(self.block_size, count - len(numbers)))
+                take = min(end - next_seq, count - len(numbers))
+                numbers.extend(self.format(region, seq) for seq in range(next_seq, next_seq + take))
+                self._blocks[region] = (next_seq + take, end)
+        self.allocated += len(numbers)
+        return numbers
+
+    def stats(self) -> dict:
+        return {
+            "block_size": self.block_size,
+            "allocated": self.allocated,
+            "leases": self.leases,
+            "blocks": {region: {"next": n, "end": e} for region, (n, e) in self._blocks.items()},
+        }
+
+card_numbers = CardNumberAllocator(CARD_NUMBER_PREFIX, CARD_NUMBER_BLOCK_SIZE)
+
+async def record_audit(admin: User, action: str, entries: list, batch_id: Optional[str] = None):
+    """Append one audit_log row per affected card"""
+    if not entries:
+        return
+    now = datetime.now(timezone.utc).isoformat()
+    await db.audit_log.insert_many([{
+        "id": str(uuid.uuid4()),
+        "batch_id": batch_id,
+        "actor_id": admin.id,
+        "action": action,
+        "created_at": now,
+        **entry
+    } for entry in entries])
 
 @api_router.put("/admin/cards/{card_id}/approve")
-async def approve_card(card_id: str, admin: User = Depends(get_admin_user)):
-    card = await db.ration_cards.find_one({"id": card_id})
+async def approve_card(card_id: str, region: Optional[str] = None, admin: User = Depends(get_admin_user)):
+    card = await db.ration_cards.find_one({"id": card_id}, {"_id": 0, "status": 1, "card_number": 1})
     if not card:
         raise HTTPException(status_code=404, detail="Card not found")
+    # Approving again keeps the issued number, as the bulk path does
+    if card['status'] == "approved" and card.get('card_number'):
+        return {"message": "Card already approved", "card_number": card['card_number']}
     
-    # Generate card number
-    card_number = f"RC{str(uuid.uuid4())[:8].upper()}"
+    # A card rejected after approval keeps the number it was issued
+    card_number = card.get('card_number') or (await card_numbers.allocate(1, region))[0]
     
-    await db.ration_cards.update_one(
-        {"id": card_id},
+    # Conditional, so of two concurrent approves only one issues a number and counts
+    previous = await db.ration_cards.find_one_and_update(
+        {"id": card_id, "$or": [{"status": {"$ne": "approved"}}, {"card_number": None}]},
         {"$set": {
             "status": "approved",
             "card_number": card_number,
             "updated_at": datetime.now(timezone.utc).isoformat()
-        }}
+        }},
+        projection={"_id": 0, "status": 1}
     )
+    if previous is None:
+        current = await db.ration_cards.find_one({"id": card_id}, {"_id": 0, "card_number": 1})
+        if not current:
+            raise HTTPException(status_code=404, detail="Card not found")
+        return {"message": "Card already approved", "card_number": current.get('card_number')}
+    
+    await card_stats.record([(previous['status'], "approved", 0)])
+    await record_audit(admin, "approve", [{
+        "card_id": card_id,
+        "outcome": "approved",
+        "card_number": card_number,
+        "previous_status": previous['status']
+    }])
+    await card_events.publish("updated", [{"id": card_id, "status": "approved", "card_number": card_number}])
     
     return {"message": "Card approved", "card_number": card_number}
 
 @api_router.put("/admin/cards/{card_id}/reject")
 async def reject_card(card_id: str, admin: User = Depends(get_admin_user)):
-    await db.ration_cards.update_one(
+    previous = await db.ration_cards.find_one_and_update(
         {"id": card_id},
         {"$set": {
             "status": "rejected",
             "updated_at": datetime.now(timezone.utc).isoformat()
-        }}
+        }},
+        projection={"_id": 0, "status": 1}
     )
+    if previous:
+        await card_stats.record([(previous['status'], "rejected", 0)])
+        await record_audit(admin, "reject", [{"card_id": card_id, "outcome": "rejected"}])
+        await card_events.publish("updated", [{"id": card_id, "status": "rejected"}])
     
     return {"message": "Card rejected"}
 
 @api_router.delete("/admin/cards/{card_id}")
 async def delete_card(card_id: str, admin: User = Depends(get_admin_user)):
-    result = await db.ration_cards.delete_one({"id": card_id})
-    if result.deleted_count == 0:
+    deleted = await db.ration_cards.find_one_and_delete(
+        {"id": card_id},
+        projection={"_id": 0, "status": 1, "family_members": 1}
+    )
+    if not deleted:
         raise HTTPException(status_code=404, detail="Card not found")
+    await card_stats.record([(deleted['status'], None, -deleted.get('family_members', 0))])
+    await record_audit(admin, "delete", [{"card_id": card_id, "outcome": "deleted"}])
+    await card_events.publish("deleted", [{"id": card_id}])
+    await duplicate_index.remove([card_id])
     return {"message": "Card deleted"}
 
+@api_router.post("/admin/cards/bulk")
+async def bulk_card_action(request: BulkCardAction, admin: User = Depends(get_admin_user)):
+    """Approve, reject or delete many cards, selected by id list or filter, in one request"""
+    if (request.card_ids is None) == (request.filter is None):
+        raise HTTPException(status_code=400, detail="Provide exactly one of card_ids or filter")
+    
+    if request.card_ids is not None:
+        card_ids = list(dict.fromkeys(request.card_ids))
+        if len(card_ids) > BULK_MAX_CARDS:
+            raise HTTPException(status_code=400, detail=f"At most {BULK_MAX_CARDS} cards per request")
+        query = {"id": {"$in": card_ids}}
+    else:
+        f = request.filter
+        query = card_filter(f.status, f.created_from, f.created_to, f.card_number)
+        if not query:
+            raise HTTPException(status_code=400, detail="Filter must set at least one criterion")
+    
+    cards = await db.ration_cards.find(query, {"_id": 0, "id": 1, "status": 1, "card_number": 1, "family_members": 1}) \
+        .to_list(BULK_MAX_CARDS + 1)
+    if len(cards) > BULK_MAX_CARDS:
+        raise HTTPException(status_code=400, detail=f"Filter matches more than {BULK_MAX_CARDS} cards")
+    
+    found = {card['id'] for card in cards}
+    results = {}
+    if request.card_ids is not None:
+        for card_id in card_ids:
+            if card_id not in found:
+                results[card_id] = {"card_id": card_id, "outcome": "not_found"}
+    
+    now = datetime.now(timezone.utc).isoformat()
+    operations = []
+    targets = []
+    if request.action == "approve":
+        # Already-approved cards keep their number
+        for card in cards:
+            if card['status'] == "approved":
+                results[card['id']] = {"card_id": card['id'], "outcome": "unchanged", "card_number": card.get('card_number')}
+            else:
+                targets.append(card)
+        numbers = await card_numbers.allocate(len(targets), request.region)
+        for card, card_number in zip(targets, numbers):
+            operations.append(UpdateOne({"id": card['id']}, {"$set": {
+                "status": "approved",
+                "card_number": card_number,
+                "updated_at": now
+            }}))
+            results[card['id']] = {"card_id": card['id'], "outcome": "approved", "card_number": card_number}
+    elif request.action == "reject":
+        for card in cards:
+            if card['status'] == "rejected":
+                results[card['id']] = {"card_id": card['id'], "outcome": "unchanged"}
+                continue
+            targets.append(card)
+            operations.append(UpdateOne({"id": card['id']}, {"$set": {"status": "rejected", "updated_at": now}}))
+            results[card['id']] = {"card_id": card['id'], "outcome": "rejected"}
+    else:
+        for card in cards:
+            targets.append(card)
+            operations.append(DeleteOne({"id": card['id']}))
+            results[card['id']] = {"card_id": card['id'], "outcome": "deleted"}
+    
+    if operations:
+        try:
+            await db.ration_cards.bulk_write(operations, ordered=False)
+        except BulkWriteError as e:
+            for error in e.details.get('writeErrors', []):
+                card_id = targets[error['index']]['id']
+                results[card_id] = {"card_id": card_id, "outcome": "error", "error": error.get('errmsg')}
+    
+    batch_id = str(uuid.uuid4())
+    changed = [r for r in results.values() if r['outcome'] not in ("not_found", "unchanged", "error")]
+    previous = {card['id']: card for card in cards}
+    # previous_status lets stats reconciliation tell first approvals from re-approvals
+    await record_audit(admin, request.action, [
+        {**r, "previous_status": previous[r['card_id']]['status']} for r in changed
+    ], batch_id)
+    await card_stats.record([(
+        previous[r['card_id']]['status'],
+        None if request.action == "delete" else r['outcome'],
+        -previous[r['card_id']].get('family_members', 0) if request.action == "delete" else 0
+    ) for r in changed])
+    if request.action == "delete":
+        await card_events.publish("deleted", [{"id": r['card_id']} for r in changed])
+        await duplicate_index.remove([r['card_id'] for r in changed])
+    else:
+        await card_events.publish("updated", [{
+            "id": r['card_id'],
+            "status": r['outcome'],
+            **({"card_number": r['card_number']} if 'card_number' in r else {})
+        } for r in changed])
+    
+    items = [results[card_id] for card_id in (card_ids if request.card_ids is not None else [c['id'] for c in cards])]
+    summary = {}
+    for item in items:
+        summary[item['outcome']] = summary.get(item['outcome'], 0) + 1
+    return {"batch_id": batch_id, "action": request.action, "summary": summary, "results": items}
+
+@api_router.get("/admin/audit-log")
+async def get_audit_log(
+    card_id: Optional[str] = None,
+    batch_id: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=10000),
+    admin: User = Depends(get_admin_user)
+):
+    query = {}
+    if card_id:
+        query["card_id"] = card_id
+    if batch_id:
+        query["batch_id"] = batch_id
+    return await db.audit_log.find(query, {"_id": 0}).sort("created_at", -1).to_list(limit)
+
 @api_router.post("/admin/distribute-tokens")
 async def distribute_tokens(distribution: TokenDistribution, admin: User = Depends(get_admin_user)):
-    """Send SMS tokens to selected users"""
-    sent_count = 0
-    failed = []
+    """Queue SMS tokens for selected users; delivery happens in the background"""
+    distribution_id = distribution.distribution_id or str(uuid.uuid4())
+    body = f"{distribution.message}\nTime Slot: {distribution.time_slot}"
+    user_ids = list(dict.fromkeys(distribution.user_ids))
     
-    for user_id in distribution.user_ids[:50]:  # Limit to 50
-        try:
-            user = await db.users.find_one({"id": user_id}, {"_id": 0})
-            if user and user.get('phone'):
-                message = twilio_client.messages.create(
-                    body=f"{distribution.message}\nTime Slot: {distribution.time_slot}",
-                    from_=TWILIO_PHONE,
-                    to=user['phone']
-                )
-                sent_count += 1
-        except Exception as e:
-            failed.append({"user_id": user_id, "error": str(e)})
+    await db.distributions.update_one(
+        {"id": distribution_id},
+        {"$setOnInsert": {
+            "id": distribution_id,
+            "message": distribution.message,
+            "time_slot": distribution.time_slot,
+            "created_by": admin.id,
+            "created_at": datetime.now(timezone.utc).isoformat()
+        }},
+        upsert=True
+    )
+    counts = await sms_outbox.enqueue(distribution_id, user_ids, body)
     
     return {
-        "message": f"Tokens sent to {sent_count} users",
-        "sent_count": sent_count,
-        "failed": failed
+        "message": f"Tokens queued for {counts['queued']} users",
+        "distribution_id": distribution_id,
+        "queued_count": counts['queued'],
+        "skipped_count": counts['skipped'],
+        "duplicate_count": counts['duplicate']
+    }
+
+@api_router.get("/admin/distributions/{distribution_id}")
+async def get_distribution(distribution_id: str, admin: User = Depends(get_admin_user)):
+    """Delivery progress and latency of a token distribution"""
+    distribution = await db.distributions.find_one({"id": distribution_id}, {"_id": 0})
+    if not distribution:
+        raise HTTPException(status_code=404, detail="Distribution not found")
+    distribution["delivery"] = await sms_outbox.summary(distribution_id)
+    return distribution
+
+@api_router.get("/admin/distributions/{distribution_id}/deliveries")
+async def get_distribution_deliveries(
+    distribution_id: str,
+    status: Optional[str] = None,
+    limit: int = Query(1000, ge=1, le=10000),
+    admin: User = Depends(get_admin_user)
+):
+    """Per-recipient delivery log of a token distribution"""
+    query = {"distribution_id": distribution_id}
+    if status:
+        query["status"] = status
+    return await db.sms_outbox.find(query, {"_id": 0, "body": 0}).to_list(limit)
+
+@api_router.get("/admin/sms/outbox")
+async def get_sms_outbox_stats(admin: User = Depends(get_admin_user)):
+    """Outbox-wide counts, latency and dispatcher counters"""
+    summary = await sms_outbox.summary()
+    summary["dispatcher"] = sms_outbox.stats()
+    return summary
+
+@api_router.post("/admin/schedules")
+async def create_schedule(request: SlotScheduleRequest, admin: User = Depends(get_admin_user)):
+    """Assign approved cardholders to time slots, balancing shop load"""
+    if not request.slots or request.capacity_per_slot < 1:
+        raise HTTPException(status_code=400, detail="At least one slot and a positive capacity are required")
+    
+    query = {"status": "approved"}
+    if request.card_ids is not None:
+        query["id"] = {"$in": request.card_ids}
+    cards = await db.ration_cards.find(query, {"_id": 0, "id": 1, "user_id": 1, "family_members": 1}).to_list(None)
+    
+    owners = {card['id']: card['user_id'] for card in cards}
+    households = [(card['id'], max(1, card.get('family_members') or 1)) for card in cards]
+    assigned, unassigned, loads = assign_slots(households, len(request.slots), request.capacity_per_slot)
+    
+    schedule_id = str(uuid.uuid4())
+    now = datetime.now(timezone.utc).isoformat()
+    assignments = [{
+        "schedule_id": schedule_id,
+        "card_id": card_id,
+        "user_id": owners[card_id],
+        "slot": request.slots[slot],
+        "family_members": size,
+        "created_at": now
+    } for (card_id, size), slot in assigned]
+    # Households too large for any remaining capacity are kept with no slot
+    assignments += [{
+        "schedule_id": schedule_id,
+        "card_id": card_id,
+        "user_id": owners[card_id],
+        "slot": None,
+        "family_members": size,
+        "created_at": now
+    } for card_id, size in unassigned]
+    for i in range(0, len(assignments), SCHEDULE_INSERT_BATCH_SIZE):
+        await db.slot_assignments.insert_many(assignments[i:i + SCHEDULE_INSERT_BATCH_SIZE])
+    
+    schedule = {
+        "id": schedule_id,
+        "name": request.name,
+        "slots": request.slots,
+        "capacity_per_slot": request.capacity_per_slot,
+        "slot_loads": dict(zip(request.slots, loads)),
+        "assigned_count": len(assigned),
+        "unassigned_count": len(unassigned),
+        "created_by": admin.id,
+        "created_at": now
+    }
+    await db.schedules.insert_one(schedule)
+    schedule.pop("_id", None)
+    return schedule
+
+@api_router.get("/admin/schedules/{schedule_id}")
+async def get_schedule(schedule_id: str, admin: User = Depends(get_admin_user)):
+    schedule = await db.schedules.find_one({"id": schedule_id}, {"_id": 0})
+    if not schedule:
+        raise HTTPException(status_code=404, detail="Schedule not found")
+    return schedule
+
+@api_router.get("/admin/schedules/{schedule_id}/assignments")
+async def get_schedule_assignments(
+    schedule_id: str,
+    slot: Optional[str] = None,
+    unassigned: bool = False,
+    limit: int = Query(1000, ge=1, le=10000),
+    admin: User = Depends(get_admin_user)
+):
+    query = {"schedule_id": schedule_id}
+    if unassigned:
+        query["slot"] = None
+    elif slot:
+        query["slot"] = slot
+    return await db.slot_assignments.find(query, {"_id": 0}).to_list(limit)
+
+@api_router.post("/admin/schedules/{schedule_id}/notify")
+async def notify_schedule(schedule_id: str, notification: SlotNotification, admin: User = Depends(get_admin_user)):
+    """Queue one token distribution per slot, each carrying its own time slot"""
+    schedule = await db.schedules.find_one({"id": schedule_id}, {"_id": 0, "slots": 1})
+    if not schedule:
+        raise HTTPException(status_code=404, detail="Schedule not found")
+    
+    distributions = []
+    for index, slot in enumerate(schedule['slots']):
+        user_ids = await db.slot_assignments.distinct("user_id", {"schedule_id": schedule_id, "slot": slot})
+        if not user_ids:
+            continue
+        # Deterministic ids make repeated notify calls idempotent
+        distribution = TokenDistribution(
+            user_ids=user_ids,
+            message=notification.message,
+            time_slot=slot,
+            distribution_id=f"{schedule_id}:{index}"
+        )
+        distributions.append(await distribute_tokens(distribution, admin))
+    return {"message": f"Queued {len(distributions)} slot distributions", "distributions": distributions}
+
+@api_router.get("/ration-cards/my-slot")
+async def get_my_slot(user: User = Depends(get_current_user)):
+    """The user's most recent scheduled collection slot"""
+    assignment = await db.slot_assignments.find_one(
+        {"user_id": user.id, "slot": {"$ne": None}},
+        {"_id": 0},
+        sort=[("created_at", -1)]
+    )
+    if not assignment:
+        raise HTTPException(status_code=404, detail="No slot assigned")
+    return assignment
+
+def create_stream_ticket(user: User) -> str:
+    now = datetime.now(timezone.utc)
+    payload = {
+        "user_id": user.id,
+        # Bearer auth decodes without an audience, so it rejects tickets
+        "aud": STREAM_TICKET_AUDIENCE,
+        "iat": now,
+        "exp": now + timedelta(seconds=STREAM_TICKET_SECONDS)
     }
+    return jwt.encode(payload, JWT_SECRET, algorithm=JWT_ALGORITHM)
+
+async def get_stream_admin(authorization: Optional[str] = Header(None), ticket: Optional[str] = None) -> User:
+    """Admin auth that also accepts a stream ticket in ?ticket=, since EventSource cannot set headers"""
+    if authorization or not ticket:
+        return await get_admin_user(await get_current_user(authorization))
+    try:
+        payload = jwt.decode(ticket, JWT_SECRET, algorithms=[JWT_ALGORITHM], audience=STREAM_TICKET_AUDIENCE)
+    except jwt.ExpiredSignatureError:
+        raise HTTPException(status_code=401, detail="Ticket expired")
+    except jwt.InvalidTokenError:
+        raise HTTPException(status_code=401, detail="Invalid ticket")
+    return await get_admin_user(await load_principal(payload["user_id"]))
+
+@api_router.post("/admin/cards/events/ticket")
+async def get_stream_ticket(admin: User = Depends(get_admin_user)):
+    """Short-lived ticket for opening the event stream, so the session JWT stays out of URLs and logs"""
+    return {"ticket": create_stream_ticket(admin), "expires_in": STREAM_TICKET_SECONDS}
+
+@api_router.get("/admin/cards/events")
+async def stream_card_events(
+    request: Request,
+    last_event_id: Optional[str] = Header(None),
+    resume: Optional[str] = None,
+    admin: User = Depends(get_stream_admin)
+):
+    """Server-sent card events; reconnecting clients resume from Last-Event-ID"""
+    # Clients reopening with a fresh ticket pass the last id as ?resume=
+    return StreamingResponse(
+        card_events.stream(request, last_event_id or resume),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@api_router.get("/admin/stats")
+async def get_stats(days: int = Query(30, ge=1, le=366), admin: User = Depends(get_admin_user)):
+    """Card counts, approvals per day, average family size and fake-detection rate"""
+    return await card_stats.snapshot(days)
+
+@api_router.post("/admin/stats/reconcile")
+async def reconcile_stats(admin: User = Depends(get_admin_user)):
+    """Rebuild the counters from the source collections"""
+    await card_stats.reconcile()
+    return await card_stats.snapshot(366)
+
+USER_EXPORT_FIELDS = set(User.model_fields)
+
+async def export_rows(cursor, fields: list, export_format: str, batch_size: int):
+    """Encode a Motor cursor as NDJSON or CSV, one chunk per batch"""
+    if export_format == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(fields)
+        yield buffer.getvalue().encode('utf-8')
+    rows = []
+    async for document in cursor:
+        rows.append(document)
+        if len(rows) >= batch_size:
+            yield encode_rows(rows, fields, export_format)
+            rows = []
+    if rows:
+        yield encode_rows(rows, fields, export_format)
+
+def encode_rows(rows: list, fields: list, export_format: str) -> bytes:
+    if export_format == "ndjson":
+        return "".join(json.dumps(row, default=str) + "\n" for row in rows).encode('utf-8')
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([
+            json.dumps(row[f], default=str) if isinstance(row.get(f), (dict, list)) else row.get(f, "")
+            for f in fields
+        ])
+    return buffer.getvalue().encode('utf-8')
+
+def export_response(
+    collection, query: dict, projection: dict, export_format: str, batch_size: int, name: str, sort: Optional[list] = None
+) -> StreamingResponse:
+    if export_format not in ("ndjson", "csv"):
+        raise HTTPException(status_code=400, detail="format must be ndjson or csv")
+    fields = sorted(k for k, v in projection.items() if v and k != "_id")
+    cursor = collection.find(query, projection).batch_size(batch_size)
+    if sort:
+        cursor = cursor.sort(sort)
+    media_type = "application/x-ndjson" if export_format == "ndjson" else "text/csv"
+    return StreamingResponse(
+        export_rows(cursor, fields, export_format, batch_size),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{name}.{export_format}"'}
+    )
+
+@api_router.get("/admin/export/cards")
+async def export_cards(
+    format: str = "ndjson",
+    fields: Optional[str] = None,
+    batch_size: int = Query(EXPORT_BATCH_SIZE, ge=1, le=10000),
+    status: Optional[str] = None,
+    created_from: Optional[str] = None,
+    created_to: Optional[str] = None,
+    admin: User = Depends(get_admin_user)
+):
+    """Stream every matching card straight from the cursor in constant memory"""
+    query = card_filter(status, created_from, created_to, None)
+    return export_response(db.ration_cards, query, card_projection(fields), format, batch_size, "ration_cards")
+
+@api_router.get("/admin/export/users")
+async def export_users(
+    format: str = "ndjson",
+    fields: Optional[str] = None,
+    batch_size: int = Query(EXPORT_BATCH_SIZE, ge=1, le=10000),
+    role: Optional[str] = None,
+    admin: User = Depends(get_admin_user)
+):
+    """Stream every user (never the password hash) straight from the cursor"""
+    selected = {f.strip() for f in fields.split(",") if f.strip()} if fields else set(USER_EXPORT_FIELDS)
+    unknown = selected - USER_EXPORT_FIELDS
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+    projection = {field: 1 for field in selected}
+    projection["_id"] = 0
+    query = {"role": role} if role else {}
+    return export_response(db.users, query, projection, format, batch_size, "users")
+
+INVALID_UTF8_ERROR = "Row is not valid UTF-8"
+
+def decode_line(line: bytes) -> Optional[str]:
+    try:
+        return line.decode('utf-8').rstrip("\r")
+    except UnicodeDecodeError:
+        return None
+
+async def import_lines(chunks):
+    """Split a streamed request body into text lines; None stands for a line that is not valid UTF-8"""
+    # Split before decoding: a newline byte never occurs inside a multi-byte UTF-8 sequence
+    pending = b""
+    async for chunk in chunks:
+        pending += chunk
+        lines = pending.split(b"\n")
+        pending = lines.pop()
+        for line in lines:
+            yield decode_line(line)
+    if pending:
+        yield decode_line(pending)
+
+def csv_records(pending: list, queue: list, final: bool):
+    """Parse queued lines into (values, error) CSV records, holding back an open quoted field"""
+    while queue:
+        pending.append(queue.pop(0))
+        try:
+            values = next(csv.reader([f"{line}\n" for line in pending], strict=True), [])
+        except csv.Error as e:
+            unterminated = str(e) == "unexpected end of data"
+            if unterminated and len(pending) < IMPORT_MAX_RECORD_LINES and (queue or not final):
+                continue
+            # Only the opening line is rejected; the lines it swallowed are read again
+            yield None, "Unterminated quoted field" if unterminated else f"Malformed CSV: {e}"
+            queue[:0] = pending[1:]
+            pending.clear()
+            continue
+        pending.clear()
+        yield values, None
+
+async def import_records(lines, import_format: str):
+    """Yield (row number, fields, error) for each NDJSON object or CSV record"""
+    row_number = 0
+    if import_format == "ndjson":
+        async for line in lines:
+            if line is not None and not line.strip():
+                continue
+            row_number += 1
+            if line is None:
+                yield row_number, None, INVALID_UTF8_ERROR
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                yield row_number, None, f"Invalid JSON: {e}"
+                continue
+            if isinstance(row, dict):
+                yield row_number, row, None
+            else:
+                yield row_number, None, "Row must be a JSON object"
+        return
+    
+    header = None
+    pending = []
+    
+    def rows(parsed):
+        nonlocal header, row_number
+        for values, error in parsed:
+            if header is None:
+                if error:
+                    raise HTTPException(status_code=400, detail=f"CSV header: {error}")
+                if any(v.strip() for v in values):
+                    header = [v.strip() for v in values]
+                continue
+            if error is None and not any(v.strip() for v in values):
+                continue
+            row_number += 1
+            if error:
+                yield row_number, None, error
+            elif len(values) != len(header):
+                yield row_number, None, f"Expected {len(header)} columns, got {len(values)}"
+            else:
+                yield row_number, {k: v for k, v in zip(header, values) if v != ""}, None
+    
+    def flush():
+        leftover = pending[:]
+        pending.clear()
+        return rows(csv_records(pending, leftover, final=True))
+    
+    async for line in lines:
+        if line is None:
+            # Any open quoted field ends here; the undecodable line is a row of its own
+            for result in flush():
+                yield result
+            if header is None:
+                raise HTTPException(status_code=400, detail=f"CSV header: {INVALID_UTF8_ERROR}")
+            row_number += 1
+            yield row_number, None, INVALID_UTF8_ERROR
+            continue
+        for result in rows(csv_records(pending, [line], final=False)):
+            yield result
+    for result in flush():
+        yield result
+
+async def import_documents(application: RationCardApplication, slots: asyncio.Semaphore) -> dict:
+    # Waits for the photo pool instead of failing fast, one row per pool worker at a time
+    async with slots:
+        return await store_encoded_documents({field: getattr(application, field) for field in DOCUMENT_FIELDS}, wait=True)
+
+async def import_batch(batch: list, seen: set, import_id: str) -> list:
+    """Insert one batch of validated rows, checking duplicates with one query per batch"""
+    aadhaars = list({application.aadhaar for _, application, _ in batch})
+    user_ids = list({user_id for _, _, user_id in batch if user_id})
+    existing = await db.ration_cards.find(
+        {
+            "status": {"$in": ["verifying", "pending", "approved"]},
+            "$or": [{"aadhaar": {"$in": aadhaars}}, {"user_id": {"$in": user_ids}}]
+        },
+        {"_id": 0, "aadhaar": 1, "user_id": 1}
+    ).to_list(None)
+    taken = {f"aadhaar:{c['aadhaar']}" for c in existing} | {f"user:{c['user_id']}" for c in existing}
+    known_users = set(await db.users.distinct("id", {"id": {"$in": user_ids}})) if user_ids else set()
+    
+    results = []
+    accepted = []
+    for row_number, application, user_id in batch:
+        keys = [f"aadhaar:{application.aadhaar}"] + ([f"user:{user_id}"] if user_id else [])
+        if user_id and user_id not in known_users:
+            results.append({"row": row_number, "outcome": "invalid", "error": "Unknown user_id"})
+        elif any(key in taken for key in keys):
+            results.append({"row": row_number, "outcome": "duplicate", "error": "Active card already exists"})
+        elif any(key in seen for key in keys):
+            results.append({"row": row_number, "outcome": "duplicate", "error": "Repeats an earlier row"})
+        else:
+            seen.update(keys)
+            accepted.append((row_number, application, user_id))
+    
+    slots = asyncio.Semaphore(photo_pool.workers)
+    documents = await asyncio.gather(*(import_documents(a, slots) for _, a, _ in accepted), return_exceptions=True)
+    cards = []
+    for (row_number, application, user_id), docs in zip(accepted, documents):
+        if isinstance(docs, Exception):
+            error = docs.detail if isinstance(docs, HTTPException) else str(docs)
+            results.append({"row": row_number, "outcome": "invalid", "error": error})
+            continue
+        card = RationCard(
+            user_id=user_id or f"offline:{import_id}",
+            **application.model_dump(exclude=set(DOCUMENT_FIELDS)),
+            **docs
+        )
+        card_dict = card.model_dump()
+        card_dict['created_at'] = card_dict['created_at'].isoformat()
+        card_dict['updated_at'] = card_dict['updated_at'].isoformat()
+        cards.append((row_number, card_dict))
+    if not cards:
+        return results
+    
+    failed = {}
+    try:
+        await db.ration_cards.insert_many([card for _, card in cards], ordered=False)
+    except BulkWriteError as e:
+        failed = {error['index']: error.get('errmsg') for error in e.details.get('writeErrors', [])}
+    inserted = []
+    for index, (row_number, card) in enumerate(cards):
+        card.pop("_id", None)
+        if index in failed:
+            results.append({"row": row_number, "outcome": "error", "error": failed[index]})
+        else:
+            inserted.append(card)
+            results.append({"row": row_number, "outcome": "imported", "card_id": card['id']})
+    
+    await card_stats.record([(None, card['status'], card['family_members']) for card in inserted])
+    await card_events.publish("created", inserted)
+    # One at a time, so rows in the same batch are matched against each other
+    for card in inserted:
+        await duplicate_index.index(card)
+    # The verification workers pick these up concurrently
+    await verification_queue.enqueue_many(inserted)
+    return results
+
+class ImportQueue:
+    """Mongo-backed queue that runs bulk imports in the background from a stored request body"""
+
+    def __init__(self, workers: int, max_attempts: int, lease_seconds: int, poll_seconds: float):
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.lease_seconds = lease_seconds
+        self.poll_seconds = poll_seconds
+        self._wakeup = asyncio.Event()
+        self._tasks = []
+        self.processed = 0
+        self.failed = 0
+
+    async def enqueue(self, admin: User, import_format: str, batch_size: int, body: dict) -> dict:
+        now = datetime.now(timezone.utc).isoformat()
+        job = {
+            "id": str(uuid.uuid4()),
+            "status": "queued",  # queued, running, done, failed
+            "format": import_format,
+            "batch_size": batch_size,
+            "body": body,
+            "actor_id": admin.id,
+            "attempts": 0,
+            "rows": 0,  # rows settled so far; a resumed job skips them
+            "summary": {},
+            "truncated": False,
+            "elapsed_seconds": None,
+            "rows_per_second": None,
+            "lease_expires_at": None,
+            "last_error": None,
+            "created_at": now,
+            "updated_at": now
+        }
+        await db.import_jobs.insert_one(job)
+        job.pop("_id", None)
+        self._wakeup.set()
+        return job
+
+    def _lease(self) -> str:
+        return (datetime.now(timezone.utc) + timedelta(seconds=self.lease_seconds)).isoformat()
+
+    async def _claim(self) -> Optional[dict]:
+        now_iso = datetime.now(timezone.utc).isoformat()
+        # Expired leases belong to workers that died mid-import, e.g. on restart
+        return await db.import_jobs.find_one_and_update(
+            {"$or": [
+                {"status": "queued"},
+                {"status": "running", "lease_expires_at": {"$lte": now_iso}}
+            ]},
+            {
+                "$set": {"status": "running", "lease_expires_at": self._lease(), "updated_at": now_iso},
+                "$inc": {"attempts": 1}
+            },
+            sort=[("created_at", 1)],
+            projection={"_id": 0},
+            return_document=ReturnDocument.AFTER
+        )
+
+    async def _finish(self, job: dict, status: str, **fields):
+        fields.update({
+            "status": status,
+            "lease_expires_at": None,
+            "updated_at": datetime.now(timezone.utc).isoformat()
+        })
+        await db.import_jobs.update_one({"id": job["id"]}, {"$set": fields})
+
+    async def _checkpoint(self, job: dict, admin: User, results: list, rows: int):
+        """Persist settled rows and progress together, and renew the lease"""
+        if results:
+            await db.import_rows.insert_many([{"import_id": job['id'], **result} for result in results])
+            await record_audit(admin, "import", [r for r in results if r['outcome'] == "imported"], job['id'])
+        counts = {}
+        for result in results:
+            counts[f"summary.{result['outcome']}"] = counts.get(f"summary.{result['outcome']}", 0) + 1
+        update = {"$set": {"rows": rows, "lease_expires_at": self._lease(), "updated_at": datetime.now(timezone.utc).isoformat()}}
+        if counts:
+            update["$inc"] = counts
+        await db.import_jobs.update_one({"id": job['id']}, update)
+
+    async def _process(self, job: dict):
+        started = time.perf_counter()
+        actor = await db.users.find_one({"id": job['actor_id']}, {"_id": 0, "password": 0})
+        admin = User(**actor)
+        body = job['body']
+        chunks = blob_service.store.stream(body['blob_id'], 0, body['size'] - 1)
+        # Rows settled before a restart are skipped; cards they inserted still count as taken
+        resume_after = job['rows']
+        rows = resume_after
+        results = []
+        seen = set()
+        batch = []
+        truncated = False
+        async for row_number, row, error in import_records(import_lines(chunks), job['format']):
+            if row_number > IMPORT_MAX_ROWS:
+                truncated = True
+                break
+            if row_number <= resume_after:
+                continue
+            rows = row_number
+            if error is None:
+                try:
+                    application = RationCardApplication.model_validate(row)
+                    application.aadhaar = normalize_aadhaar(application.aadhaar)
+                    batch.append((row_number, application, row.get("user_id") or None))
+                except ValidationError as e:
+                    error = "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors())
+            if error is not None:
+                results.append({"row": row_number, "outcome": "invalid", "error": error})
+            if len(batch) >= job['batch_size']:
+                results.extend(await import_batch(batch, seen, job['id']))
+                await self._checkpoint(job, admin, results, rows)
+                results = []
+                batch = []
+        if batch:
+            results.extend(await import_batch(batch, seen, job['id']))
+        await self._checkpoint(job, admin, results, rows)
+        
+        elapsed = time.perf_counter() - started
+        await self._finish(
+            job, "done",
+            truncated=truncated,
+            elapsed_seconds=round(elapsed, 3),
+            rows_per_second=round((rows - resume_after) / elapsed, 1) if elapsed > 0 else None,
+            last_error=None
+        )
+        self.processed += 1
+
+    async def _worker(self):
+        while True:
+            self._wakeup.clear()
+            try:
+                job = await self._claim()
+            except Exception as e:
+                logging.error(f"Import queue claim error: {str(e)}")
+                await asyncio.sleep(self.poll_seconds)
+                continue
+            
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_seconds)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            
+            try:
+                if job['attempts'] > self.max_attempts:
+                    # Each earlier claim died with its worker; retrying would likely kill this one too
+                    await self._finish(job, "failed", last_error="Interrupted too many times")
+                    self.failed += 1
+                    continue
+                await self._process(job)
+            except Exception as e:
+                logging.error(f"Import job {job['id']} error: {str(e)}")
+                self.failed += 1
+                try:
+                    await self._finish(job, "failed", last_error=e.detail if isinstance(e, HTTPException) else str(e))
+                except Exception as e:
+                    logging.error(f"Import job {job['id']} could not be marked failed: {str(e)}")
+
+    def start(self):
+        for _ in range(self.workers):
+            self._tasks.append(asyncio.create_task(self._worker()))
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+import_queue = ImportQueue(IMPORT_WORKERS, IMPORT_MAX_ATTEMPTS, IMPORT_LEASE_SECONDS, IMPORT_POLL_SECONDS)
+
+@api_router.post("/admin/import/cards")
+async def import_cards(
+    request: Request,
+    format: Optional[str] = None,
+    batch_size: int = Query(IMPORT_BATCH_SIZE, ge=1, le=5000),
+    admin: User = Depends(get_admin_user)
+):
+    """Store an NDJSON or CSV body of offline applications and queue it for import"""
+    import_format = format or ("csv" if "csv" in request.headers.get("content-type", "") else "ndjson")
+    if import_format not in ("ndjson", "csv"):
+        raise HTTPException(status_code=400, detail="format must be ndjson or csv")
+    
+    # The whole body is stored before anything is parsed, so none of it is left unread
+    content_type = "text/csv" if import_format == "csv" else "application/x-ndjson"
+    body = await blob_service.put_stream(request.stream(), content_type, IMPORT_MAX_BYTES)
+    return await import_queue.enqueue(admin, import_format, batch_size, body)
+
+@api_router.get("/admin/import/cards/{import_id}")
+async def get_import_status(import_id: str, admin: User = Depends(get_admin_user)):
+    """Progress and outcome counts of an import"""
+    job = await db.import_jobs.find_one({"id": import_id}, {"_id": 0})
+    if not job:
+        raise HTTPException(status_code=404, detail="Import not found")
+    return job
+
+@api_router.get("/admin/import/cards/{import_id}/results")
+async def get_import_results(
+    import_id: str,
+    format: str = "ndjson",
+    batch_size: int = Query(EXPORT_BATCH_SIZE, ge=1, le=10000),
+    admin: User = Depends(get_admin_user)
+):
+    """Stream the per-row outcomes of an import in row order"""
+    if not await db.import_jobs.find_one({"id": import_id}, {"_id": 1}):
+        raise HTTPException(status_code=404, detail="Import not found")
+    projection = {"_id": 0, "row": 1, "outcome": 1, "error": 1, "card_id": 1}
+    return export_response(
+        db.import_rows, {"import_id": import_id}, projection, format, batch_size, f"import-{import_id}", sort=[("row", 1)]
+    )
 
 @api_router.get("/admin/users")
 async def get_all_users(admin: User = Depends(get_admin_user)):
     users = await db.users.find({"role": "user"}, {"_id": 0, "password": 0}).to_list(1000)
-    return users
+    return FastJSONResponse(users)
+
+@api_router.get("/admin/cache/principals")
+async def get_principal_cache_stats(admin: User = Depends(get_admin_user)):
+    """Hit/miss counters for the principal cache"""
+    return principal_cache.stats()
+
+@api_router.get("/admin/pools/password")
+async def get_password_pool_stats(admin: User = Depends(get_admin_user)):
+    """Queue depth and throughput of the bcrypt worker pool"""
+    return password_pool.stats()
+
+@api_router.get("/admin/pools/photo")
+async def get_photo_pool_stats(admin: User = Depends(get_admin_user)):
+    """Queue depth and throughput of the photo processing pool"""
+    return photo_pool.stats()
+
+@api_router.get("/admin/verification/queue")
+async def get_verification_queue_stats(admin: User = Depends(get_admin_user)):
+    """Job counts by state and worker counters for the verification queue"""
+    return await verification_queue.stats()
+
+@api_router.get("/admin/card-numbers")
+async def get_card_number_stats(admin: User = Depends(get_admin_user)):
+    """Allocator counters and the blocks this process currently holds"""
+    return card_numbers.stats()
+
+@api_router.get("/admin/indexes/diagnostics")
+async def get_index_diagnostics(admin: User = Depends(get_admin_user)):
+    """Winning plan stages for each handler query shape"""
+    return await diagnose_query_plans()
+
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    """Prometheus scrape endpoint"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+metrics.gauge("password_pool_queue_depth", "Callers waiting for a bcrypt worker", lambda: password_pool.queued)
+metrics.gauge("photo_pool_queue_depth", "Photos waiting for a processing worker", lambda: photo_pool.queued)
+metrics.counter("duplicate_index_flagged_total", "Cards flagged as possible duplicates", lambda: duplicate_index.flagged)
+metrics.counter("principal_cache_hits_total", "Principal cache hits", lambda: principal_cache.hits)
+metrics.counter("principal_cache_misses_total", "Principal cache misses", lambda: principal_cache.misses)
+metrics.counter("verification_llm_calls_total", "LLM verification calls", lambda: verification_cache.llm_calls)
+metrics.counter("verification_llm_calls_avoided_total", "Verifications settled by pre-screening", lambda: prescreener.short_circuit_fake + prescreener.short_circuit_genuine)
 
 # Include router
 app.include_router(api_router)
@@ -415,6 +3974,8 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(UploadLimitMiddleware, paths={"/api/ration-cards/apply-upload", "/api/ration-cards/update-upload"})
+app.add_middleware(MetricsMiddleware)
 
 logging.basicConfig(
     level=logging.INFO,
@@ -422,6 +3983,29 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+@app.on_event("startup")
+async def start_background_workers():
+    http.start()
+    await bootstrap_indexes()
+    # After the indexes, so ration_cards exists for collMod
+    await card_events.detect()
+    verification_queue.start()
+    import_queue.start()
+    sms_outbox.start()
+    card_stats.start()
+    app.state.migration_task = asyncio.create_task(migrate_documents())
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
-    client.close()
\ No newline at end of file
+    await verification_queue.stop()
+    await import_queue.stop()
+    await sms_outbox.stop()
+    await card_stats.stop()
+    # A migration still running would otherwise hit a closed client
+    app.state.migration_task.cancel()
+    await asyncio.gather(app.state.migration_task, return_exceptions=True)
+    await http.close()
+    client.close()
+    password_pool.shutdown()
+    photo_pool.shutdown()
+    sms_sender.shutdown()
\ No newline at end of file
@@ -0,0 +1,23 @@
+"""Local stand-ins for the external services server.py calls.
+
+Run with `uvicorn stub_services:app --port 8099` and point the backend at it:
+OAUTH_SESSION_URL=http://localhost:8099/auth/v1/env/oauth/session-data
+"""
+from fastapi import FastAPI, Header, HTTPException
+import hashlib
+
+app = FastAPI()
+
+@app.get("/auth/v1/env/oauth/session-data")
+async def oauth_session_data(x_session_id: str = Header(None)):
+    """Deterministic session data for any session id; 'invalid' is rejected"""
+    if not x_session_id or x_session_id == "invalid":
+        raise HTTPException(status_code=404, detail="Session not found")
+    suffix = hashlib.sha256(x_session_id.encode('utf-8')).hexdigest()[:12]
+    return {
+        "id": suffix,
+        "email": f"oauth-{suffix}@example.com",
+        "name": f"OAuth User {suffix}",
+        "picture": None,
+        "session_token": f"stub-session-{suffix}"
+    }
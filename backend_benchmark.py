@@ -0,0 +1,473 @@
+"""In-process load tests for the e-Ration API.
+
+Boots backend/server.py inside this process against a local Mongo, with the
+LLM verifier and SMS backend replaced by fakes, drives concurrent workloads
+through an ASGI transport and reports throughput and p50/p95/p99 latency.
+
+Mongo, in order of preference:
+  --mongo-url mongodb://...   an existing server (a throwaway database is used)
+  mongod on PATH              started on a free port with a temporary dbpath
+  mongomock-motor installed   in-memory stand-in (no GridFS, change streams)
+
+With --serialization, skips Mongo and instead times JSON encoding of each
+hot endpoint's response: FastAPI's default jsonable_encoder + json.dumps path
+versus the FastJSONResponse (orjson) path the handlers now return.
+
+Examples:
+  python backend_benchmark.py
+  python backend_benchmark.py --serialization --iterations 5000
+  python backend_benchmark.py --users 500 --cards 100000 --concurrency 100 --json bench.json
+"""
+import argparse
+import asyncio
+import base64
+import io
+import json
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timezone, timedelta
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).parent
+BENCH_DB = f"bench_{uuid.uuid4().hex[:8]}"
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_mongod() -> tuple:
+    """Start a throwaway mongod; returns (url, process, dbpath)"""
+    dbpath = tempfile.mkdtemp(prefix="bench-mongo-")
+    port = free_port()
+    process = subprocess.Popen(
+        ["mongod", "--dbpath", dbpath, "--port", str(port), "--bind_ip", "127.0.0.1", "--quiet"],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL
+    )
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.5).close()
+            return f"mongodb://127.0.0.1:{port}", process, dbpath
+        except OSError:
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError("mongod did not start")
+
+
+def configure_environment(args, mongo_url: str, blob_dir: str):
+    """Env must be set before server.py is imported; load_dotenv does not override it"""
+    os.environ.update({
+        "MONGO_URL": mongo_url or "mongodb://127.0.0.1:1",
+        "DB_NAME": BENCH_DB,
+        "EMERGENT_LLM_KEY": "bench",
+        "SMS_BACKEND": "fake",
+        "SMS_RATE_PER_SECOND": str(args.sms_rate),
+        "SMS_BURST": str(args.sms_rate),
+        "BLOB_BACKEND": "local",
+        "BLOB_DIR": blob_dir,
+        "BLOB_MIGRATE_ON_STARTUP": "false",
+        "STATS_RECONCILE_SECONDS": "0",
+        "INDEX_DIAGNOSTICS": "off",
+        "VERIFICATION_POLL_SECONDS": "0.2",
+        "SMS_POLL_SECONDS": "0.2",
+    })
+    sys.path.insert(0, str(ROOT_DIR / "backend"))
+
+
+def percentile(sorted_values: list, fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def summarize(name: str, latencies: list, errors: int, wall: float, **extra) -> dict:
+    latencies = sorted(latencies)
+    return {
+        "workload": name,
+        "requests": len(latencies),
+        "errors": errors,
+        "wall_seconds": round(wall, 3),
+        "throughput_rps": round(len(latencies) / wall, 1) if wall else 0.0,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+        **extra
+    }
+
+
+async def run_workload(name: str, count: int, concurrency: int, make_request) -> dict:
+    """Issue count requests with at most concurrency in flight"""
+    latencies = []
+    errors = 0
+    slots = asyncio.Semaphore(concurrency)
+
+    async def one(i: int):
+        nonlocal errors
+        async with slots:
+            start = time.perf_counter()
+            try:
+                response = await make_request(i)
+                if response.status_code >= 400:
+                    errors += 1
+            except Exception:
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(count)))
+    return summarize(name, latencies, errors, time.perf_counter() - start)
+
+
+def fake_aadhaar(server) -> str:
+    digits = str(random.randint(2, 9)) + "".join(random.choice("0123456789") for _ in range(10))
+    return digits + server.verhoeff_check_digit(digits)
+
+
+FIRST_NAMES = ["Aarav", "Priya", "Rahul", "Ananya", "Vikram", "Lakshmi", "Arjun", "Meera", "Suresh", "Fatima",
+               "Rohan", "Kavya", "Imran", "Deepa", "Harish", "Sneha", "Gopal", "Nisha", "Manoj", "Zoya"]
+LAST_NAMES = ["Sharma", "Iyer", "Khan", "Reddy", "Das", "Patel", "Nair", "Singh", "Mehta", "Banerjee",
+              "Pillai", "Gupta", "Rao", "Joshi", "Kulkarni", "Verma", "Menon", "Chowdhury", "Naidu", "Bose"]
+STREETS = ["Market Road", "Temple Street", "Station Road", "Lake View", "Gandhi Nagar", "Nehru Colony",
+           "Canal Bank", "Mill Lane", "Fort Area", "Church Road", "Old Bazaar", "Park Avenue"]
+CITIES = ["Pune", "Mysuru", "Nagpur", "Kochi", "Indore", "Guntur", "Salem", "Cuttack", "Ajmer", "Siliguri"]
+
+
+def fake_photo() -> str:
+    """A random 16x16 PNG, so photos do not collide in the perceptual-hash index"""
+    from PIL import Image  # a backend dependency, so present wherever server.py runs
+    buffer = io.BytesIO()
+    Image.frombytes("L", (16, 16), os.urandom(256)).save(buffer, format="PNG")
+    return "data:image/png;base64," + base64.b64encode(buffer.getvalue()).decode()
+
+
+def fake_application(server, i: int) -> dict:
+    # Every fifth address lacks a PIN code, so pre-screening escalates it to the fake LLM
+    pin = "" if i % 5 == 0 else f" {random.randint(110001, 855999)}"
+    return {
+        "name": f"{random.choice(FIRST_NAMES)} {random.choice(LAST_NAMES)}",
+        "address": f"{random.randint(1, 999)}, {random.choice(STREETS)}, Ward {random.randint(1, 60)}, "
+                   f"{random.choice(CITIES)}{pin}",
+        "family_members": random.randint(1, 8),
+        "aadhaar": fake_aadhaar(server),
+        "income_proof": fake_photo(),
+        "photo": fake_photo()
+    }
+
+
+async def seed_cards(server, count: int):
+    """Insert synthetic cards directly, bypassing the API"""
+    start = datetime.now(timezone.utc) - timedelta(days=365)
+    statuses = ["pending", "approved", "rejected", "fake", "verifying"]
+    batch = []
+    for i in range(count):
+        created = (start + timedelta(seconds=i * 300)).isoformat()
+        batch.append({
+            "id": str(uuid.uuid4()),
+            "user_id": str(uuid.uuid4()),
+            "card_number": None,
+            "name": f"Seeded Holder {i}",
+            "address": f"{i} Seed Street, Bench District 560001",
+            "family_members": random.randint(1, 8),
+            "aadhaar": fake_aadhaar(server),
+            "income_proof": None,
+            "photo": None,
+            "status": statuses[i % len(statuses)],
+            "ai_verification_result": None,
+            "created_at": created,
+            "updated_at": created
+        })
+        if len(batch) == 5000:
+            await server.db.ration_cards.insert_many(batch)
+            batch = []
+    if batch:
+        await server.db.ration_cards.insert_many(batch)
+
+
+async def wait_for_outbox(server, distribution_id: str, expected: int, timeout: float) -> float:
+    start = time.perf_counter()
+    while time.perf_counter() - start < timeout:
+        done = await server.db.sms_outbox.count_documents({
+            "distribution_id": distribution_id,
+            "status": {"$in": ["sent", "dead", "skipped"]}
+        })
+        if done >= expected:
+            break
+        await asyncio.sleep(0.1)
+    return time.perf_counter() - start
+
+
+async def benchmark(args) -> list:
+    import httpx
+    import server
+
+    if args.use_mongomock:
+        from mongomock_motor import AsyncMongoMockClient
+        server.client = AsyncMongoMockClient()
+        server.db = server.client[BENCH_DB]
+
+    async def fake_llm(card_data: dict) -> dict:
+        await asyncio.sleep(args.llm_latency)
+        return {"result": "genuine", "details": "GENUINE (benchmark fake)"}
+    server.verify_ration_card_with_ai = fake_llm
+
+    await server.start_background_workers()
+    results = []
+    transport = httpx.ASGITransport(app=server.app)
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", limits=limits, timeout=120) as api:
+        password = "BenchPass123!"
+
+        # Setup: one admin and N users (registration itself is a bcrypt workload)
+        admin = (await api.post("/api/auth/register", json={
+            "name": "Bench Admin", "email": "admin@bench.example.com", "password": password,
+            "phone": "+10000000000", "role": "admin"
+        })).json()
+        admin_headers = {"Authorization": f"Bearer {admin['token']}"}
+        tokens = [None] * args.users
+
+        async def register(i: int):
+            response = await api.post("/api/auth/register", json={
+                "name": f"Bench User {i}", "email": f"user{i}@bench.example.com", "password": password,
+                "phone": f"+1555{i:07d}", "role": "user"
+            })
+            if response.status_code == 200:
+                tokens[i] = response.json()['token']
+            return response
+        results.append(await run_workload("register", args.users, args.concurrency, register))
+
+        results.append(await run_workload("login_storm", args.users, args.concurrency, lambda i: api.post(
+            "/api/auth/login", json={"email": f"user{i}@bench.example.com", "password": password}
+        )))
+
+        results.append(await run_workload("auth_me", args.users * 4, args.concurrency, lambda i: api.get(
+            "/api/auth/me", headers={"Authorization": f"Bearer {tokens[i % args.users]}"}
+        )))
+
+        results.append(await run_workload("apply_burst", args.users, args.concurrency, lambda i: api.post(
+            "/api/ration-cards/apply",
+            json=fake_application(server, i),
+            headers={"Authorization": f"Bearer {tokens[i]}"}
+        )))
+
+        # Time until the background queue has verified every application
+        start = time.perf_counter()
+        while time.perf_counter() - start < args.timeout:
+            if not await server.db.ration_cards.count_documents({"status": "verifying"}):
+                break
+            await asyncio.sleep(0.1)
+        drain = time.perf_counter() - start
+        results.append({
+            "workload": "verification_drain",
+            "requests": args.users,
+            "wall_seconds": round(drain, 3),
+            "throughput_rps": round(args.users / drain, 1) if drain else 0.0,
+            "verification": await server.verification_queue.stats()
+        })
+
+        pending = await server.db.ration_cards.find({"status": "pending"}, {"_id": 0, "id": 1}).to_list(None)
+        results.append(await run_workload("approve", len(pending), args.concurrency, lambda i: api.put(
+            f"/api/admin/cards/{pending[i]['id']}/approve", headers=admin_headers
+        )))
+
+        await seed_cards(server, args.cards)
+        await server.bootstrap_indexes()
+        results.append(await run_workload("admin_list_first_page", args.pages, args.concurrency, lambda i: api.get(
+            "/api/admin/cards", params={"limit": 100}, headers=admin_headers
+        )))
+        results.append(await run_workload("admin_list_filtered", args.pages, args.concurrency, lambda i: api.get(
+            "/api/admin/cards", params={"limit": 100, "status": "pending", "include_total": "true"}, headers=admin_headers
+        )))
+
+        # Walk the full keyset pagination sequentially, as an export would
+        latencies = []
+        cursor = None
+        start = time.perf_counter()
+        while True:
+            params = {"limit": 500, **({"cursor": cursor} if cursor else {})}
+            t = time.perf_counter()
+            page = (await api.get("/api/admin/cards", params=params, headers=admin_headers)).json()
+            latencies.append(time.perf_counter() - t)
+            cursor = page.get('next_cursor')
+            if not cursor:
+                break
+        results.append(summarize("admin_list_full_walk", latencies, 0, time.perf_counter() - start))
+
+        user_ids = [u['id'] for u in await server.db.users.find({"role": "user"}, {"_id": 0, "id": 1}).to_list(None)]
+        start = time.perf_counter()
+        response = await api.post("/api/admin/distribute-tokens", json={
+            "user_ids": user_ids, "message": "Benchmark token", "time_slot": "10:00-11:00"
+        }, headers=admin_headers)
+        enqueue = time.perf_counter() - start
+        distribution_id = response.json()['distribution_id']
+        delivery = await wait_for_outbox(server, distribution_id, len(user_ids), args.timeout)
+        results.append({
+            "workload": "token_distribution",
+            "requests": len(user_ids),
+            "enqueue_ms": round(enqueue * 1000, 2),
+            "wall_seconds": round(delivery, 3),
+            "throughput_rps": round(len(user_ids) / delivery, 1) if delivery else 0.0,
+            "outbox": await server.sms_outbox.summary(distribution_id)
+        })
+
+    await server.shutdown_db_client()
+    return results
+
+
+def per_call_us(encode, iterations: int) -> float:
+    encode()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        encode()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def serialization_benchmark(args) -> list:
+    """Encode representative response payloads both ways; no Mongo or HTTP involved"""
+    import server
+    from fastapi.encoders import jsonable_encoder
+    from starlette.responses import JSONResponse
+
+    user = server.User(name="Bench User", email="user@bench.example.com", phone="+15550000000", role="user")
+    token = server.create_jwt_token(user.id, user.email, user.role, user)
+    ref = {"blob_id": "0" * 64, "content_type": "image/jpeg", "size": 48213}
+
+    def stored_card(i: int) -> dict:
+        card = server.RationCard(
+            user_id=user.id, name=f"{random.choice(FIRST_NAMES)} {random.choice(LAST_NAMES)}",
+            address=f"{i}, {random.choice(STREETS)}, {random.choice(CITIES)} 411001", family_members=4,
+            aadhaar="234567890124", income_proof=ref, photo=ref, photo_thumbnail=ref, photo_hash="064b197979194b06",
+            ai_verification_result="GENUINE (pre-screen): Aadhaar format and checksum valid"
+        ).model_dump()
+        card['created_at'] = card['created_at'].isoformat()
+        card['updated_at'] = card['updated_at'].isoformat()
+        return card
+
+    card = stored_card(0)
+    queued = {"result": "queued", "job_id": str(uuid.uuid4())}
+    listing = lambda n: {"items": [stored_card(i) for i in range(n)], "next_cursor": server.encode_cursor(card)}
+    page_50, page_500 = listing(50), listing(500)
+    # (endpoint, what the handler used to return, what it returns now)
+    cases = [
+        ("POST /auth/login", {"token": token, "user": user}, {"token": token, "user": user}),
+        ("GET /auth/me", user, user),
+        ("POST /ration-cards/apply",
+         {"message": "Application submitted", "card": server.RationCard(**card), "ai_verification": queued},
+         {"message": "Application submitted", "card": card, "ai_verification": queued}),
+        ("GET /ration-cards/my-card", card, card),
+        ("GET /admin/cards (50)", page_50, page_50),
+        ("GET /admin/cards (500)", page_500, page_500),
+    ]
+    results = []
+    for endpoint, before, after in cases:
+        iterations = max(1, args.iterations // (100 if "500" in endpoint else 10 if "50" in endpoint else 1))
+        before_us = per_call_us(lambda: JSONResponse(jsonable_encoder(before)).body, iterations)
+        after_us = per_call_us(lambda: server.FastJSONResponse(after).body, iterations)
+        results.append({
+            "workload": endpoint,
+            "iterations": iterations,
+            "bytes": len(server.FastJSONResponse(after).body),
+            "before_us": round(before_us, 1),
+            "after_us": round(after_us, 1),
+            "speedup": round(before_us / after_us, 1) if after_us else None,
+        })
+    return results
+
+
+def print_serialization_report(results: list):
+    print("\n" + "=" * 84)
+    print(f"{'endpoint':<28}{'iterations':>12}{'bytes':>10}{'before us':>12}{'after us':>12}{'speedup':>10}")
+    print("-" * 84)
+    for row in results:
+        print(
+            f"{row['workload']:<28}{row['iterations']:>12}{row['bytes']:>10}"
+            f"{row['before_us']:>12}{row['after_us']:>12}{row['speedup']:>9}x"
+        )
+    print("=" * 84)
+
+
+def print_report(results: list):
+    print("\n" + "=" * 96)
+    print(f"{'workload':<24}{'requests':>10}{'errors':>8}{'rps':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'wall s':>10}")
+    print("-" * 96)
+    for row in results:
+        print(
+            f"{row['workload']:<24}{row.get('requests', ''):>10}{row.get('errors', ''):>8}"
+            f"{row.get('throughput_rps', ''):>10}{row.get('p50_ms', ''):>10}{row.get('p95_ms', ''):>10}"
+            f"{row.get('p99_ms', ''):>10}{row.get('wall_seconds', ''):>10}"
+        )
+    print("=" * 96)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mongo-url", help="use an existing Mongo server")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--cards", type=int, default=100000, help="synthetic cards seeded for the listing workloads")
+    parser.add_argument("--pages", type=int, default=500, help="listing requests per listing workload")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="seconds the fake LLM takes per call")
+    parser.add_argument("--sms-rate", type=float, default=1000, help="fake SMS sends per second")
+    parser.add_argument("--timeout", type=float, default=300, help="max seconds to wait for background drains")
+    parser.add_argument("--json", help="write the report to this file")
+    parser.add_argument("--keep", action="store_true", help="keep the benchmark database")
+    parser.add_argument("--serialization", action="store_true", help="only run the response serialization microbenchmark")
+    parser.add_argument("--iterations", type=int, default=2000, help="encodes per payload for --serialization")
+    args = parser.parse_args()
+
+    if args.serialization:
+        blob_dir = tempfile.mkdtemp(prefix="bench-blobs-")
+        configure_environment(args, None, blob_dir)
+        try:
+            results = serialization_benchmark(args)
+        finally:
+            shutil.rmtree(blob_dir, ignore_errors=True)
+        print_serialization_report(results)
+        if args.json:
+            with open(args.json, "w") as handle:
+                json.dump({"generated_at": datetime.now(timezone.utc).isoformat(), "results": results}, handle, indent=2)
+        return 0
+
+    mongod = None
+    dbpath = None
+    args.use_mongomock = False
+    mongo_url = args.mongo_url
+    if not mongo_url and shutil.which("mongod"):
+        mongo_url, mongod, dbpath = start_mongod()
+    elif not mongo_url:
+        args.use_mongomock = True
+    blob_dir = tempfile.mkdtemp(prefix="bench-blobs-")
+    configure_environment(args, mongo_url, blob_dir)
+
+    print(f"🚀 Benchmarking against {'mongomock' if args.use_mongomock else mongo_url} (db {BENCH_DB})")
+    try:
+        results = asyncio.run(benchmark(args))
+        print_report(results)
+        if args.json:
+            with open(args.json, "w") as handle:
+                json.dump({"generated_at": datetime.now(timezone.utc).isoformat(), "results": results}, handle, indent=2, default=str)
+    finally:
+        if mongo_url and not args.keep and not mongod:
+            from pymongo import MongoClient
+            MongoClient(mongo_url).drop_database(BENCH_DB)
+        if mongod:
+            mongod.terminate()
+            mongod.wait()
+            shutil.rmtree(dbpath, ignore_errors=True)
+        shutil.rmtree(blob_dir, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,7 +2,28 @@ import requests
 import sys
 import json
 import base64
+import argparse
+import asyncio
+import random
+import time
+import uuid
+import httpx
 from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent / "backend"))
+from verhoeff import verhoeff_check_digit
+
+# Photos are decoded and re-encoded server-side, so they must be real images (1x1 PNG)
+SAMPLE_PHOTO = "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAIAAACQd1PeAAAADElEQVR4nGM4UaEBAAN0AWnL+tDXAAAAAElFTkSuQmCC"
+
+# Known server bug: apply checks for an active card, then inserts, with no unique constraint between them
+DOUBLE_APPLICATION_XFAIL = "concurrent applies for one user can both pass the active-card check"
+
+def fake_aadhaar() -> str:
+    """A fresh checksum-valid Aadhaar, so each applicant passes the duplicate pre-screen"""
+    digits = str(random.randint(2, 9)) + "".join(random.choice("0123456789") for _ in range(10))
+    return digits + verhoeff_check_digit(digits)
 
 class ERationAPITester:
     def __init__(self, base_url="https://rationportal-1.preview.emergentagent.com/api"):
@@ -176,7 +197,7 @@ class ERationAPITester:
             return False
             
         # Create sample base64 data for files
-        sample_image = base64.b64encode(b"fake_image_data").decode()
+        sample_image = SAMPLE_PHOTO
         sample_pdf = base64.b64encode(b"fake_pdf_data").decode()
         
         card_data = {
@@ -185,7 +206,7 @@ class ERationAPITester:
             "family_members": 4,
             "aadhaar": "123456789012",
             "income_proof": f"data:application/pdf;base64,{sample_pdf}",
-            "photo": f"data:image/jpeg;base64,{sample_image}"
+            "photo": f"data:image/png;base64,{sample_image}"
         }
         
         success, response = self.run_test(
@@ -258,7 +279,7 @@ class ERationAPITester:
             description="Admin retrieve all ration cards"
         )
         
-        return success and isinstance(response, list)
+        return success and isinstance(response, dict) and isinstance(response.get('items'), list)
 
     def test_admin_get_all_users(self):
         """Test admin getting all users"""
@@ -302,7 +323,7 @@ class ERationAPITester:
             
         # Create another card to reject
         if self.user_token:
-            sample_image = base64.b64encode(b"fake_image_data").decode()
+            sample_image = SAMPLE_PHOTO
             sample_pdf = base64.b64encode(b"fake_pdf_data").decode()
             
             card_data = {
@@ -311,7 +332,7 @@ class ERationAPITester:
                 "family_members": 2,
                 "aadhaar": "987654321098",
                 "income_proof": f"data:application/pdf;base64,{sample_pdf}",
-                "photo": f"data:image/jpeg;base64,{sample_image}"
+                "photo": f"data:image/png;base64,{sample_image}"
             }
             
             # Apply for card first
@@ -356,10 +377,10 @@ class ERationAPITester:
             200,
             data=token_data,
             token=self.admin_token,
-            description="Admin send SMS tokens to users"
+            description="Admin queue SMS tokens for users"
         )
         
-        return success and 'sent_count' in response
+        return success and 'distribution_id' in response
 
     def test_unauthorized_access(self):
         """Test unauthorized access to protected endpoints"""
@@ -390,11 +411,218 @@ class ERationAPITester:
         
         return success
 
-def main():
+class AsyncERationAPITester:
+    """Concurrent variant of ERationAPITester.
+
+    Independent checks run concurrently over one pooled httpx client, each
+    virtual user walks the full user flow, and every call is timed per
+    endpoint for the JSON report.
+    """
+
+    def __init__(self, base_url="https://rationportal-1.preview.emergentagent.com/api", concurrency=20, timeout=30):
+        self.base_url = base_url
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.client = None
+        self.admin_token = None
+        self.tests_run = 0
+        self.tests_passed = 0
+        self.failed_tests = []
+        self.expected_failures = []
+        self.timings = {}  # endpoint label -> list of (seconds, passed)
+
+    async def run_test(self, name, method, endpoint, expected_status, data=None, token=None, label=None):
+        """Run a single API test; label groups timings for parametrised endpoints"""
+        headers = {'Content-Type': 'application/json'}
+        if token:
+            headers['Authorization'] = f'Bearer {token}'
+        label = f"{method} {label or endpoint}"
+        
+        self.tests_run += 1
+        start = time.perf_counter()
+        try:
+            response = await self.client.request(method, f"{self.base_url}/{endpoint}", json=data, headers=headers)
+        except Exception as e:
+            self.timings.setdefault(label, []).append((time.perf_counter() - start, False))
+            self.failed_tests.append({"test": name, "error": str(e)})
+            return False, {}
+        elapsed = time.perf_counter() - start
+        
+        success = response.status_code == expected_status
+        self.timings.setdefault(label, []).append((elapsed, success))
+        if success:
+            self.tests_passed += 1
+        else:
+            self.failed_tests.append({
+                "test": name,
+                "expected": expected_status,
+                "actual": response.status_code,
+                "response": response.text[:200]
+            })
+        try:
+            return success, response.json()
+        except ValueError:
+            return success, response.text
+
+    async def register(self, prefix, role="user"):
+        suffix = uuid.uuid4().hex[:10]
+        success, response = await self.run_test(
+            f"{role.title()} Registration",
+            "POST",
+            "auth/register",
+            200,
+            data={
+                "name": f"{prefix} {suffix}",
+                "email": f"{prefix.lower().replace(' ', '')}{suffix}@example.com",
+                "password": "TestPass123!",
+                "phone": f"+1{int(suffix, 16) % 10**10:010d}",
+                "role": role
+            }
+        )
+        if success and isinstance(response, dict) and 'token' in response:
+            return response['token'], response['user']
+        return None, None
+
+    def card_data(self, name, aadhaar=None):
+        sample_image = SAMPLE_PHOTO
+        sample_pdf = base64.b64encode(b"fake_pdf_data").decode()
+        return {
+            "name": name,
+            "address": "123 Test Street, Test City, Test State 560001",
+            "family_members": 4,
+            "aadhaar": aadhaar or fake_aadhaar(),
+            "income_proof": f"data:application/pdf;base64,{sample_pdf}",
+            "photo": f"data:image/png;base64,{sample_image}"
+        }
+
+    async def user_flow(self, vu):
+        """Register, log in, apply, read and update a card as one virtual user"""
+        token, user = await self.register(f"VU {vu}")
+        if not token:
+            return None
+        await self.run_test("User Login", "POST", "auth/login", 200,
+                            data={"email": user['email'], "password": "TestPass123!"})
+        await self.run_test("Get Current User", "GET", "auth/me", 200, token=token)
+        success, response = await self.run_test("Apply Ration Card", "POST", "ration-cards/apply", 200,
+                                                data=self.card_data(f"VU Applicant {vu}"), token=token)
+        await self.run_test("Get My Ration Card", "GET", "ration-cards/my-card", 200, token=token)
+        await self.run_test("Update Ration Card", "PUT", "ration-cards/update", 200,
+                            data={"family_members": 5}, token=token)
+        if success and isinstance(response, dict) and 'card' in response:
+            return response['card']['id']
+        return None
+
+    async def test_double_application_race(self, attempts=5):
+        """Fire concurrent applications for one user; exactly one may succeed (expected to fail for now)"""
+        token, _ = await self.register("Race User")
+        if not token:
+            return False
+        data = self.card_data("Race Applicant")
+        statuses = await asyncio.gather(*(
+            self.client.post(
+                f"{self.base_url}/ration-cards/apply",
+                json=data,
+                headers={'Authorization': f'Bearer {token}'}
+            ) for _ in range(attempts)
+        ))
+        accepted = sum(1 for r in statuses if r.status_code == 200)
+        self.tests_run += 1
+        if accepted == 1:
+            self.tests_passed += 1
+            return True
+        self.expected_failures.append({
+            "test": "Double Application Race",
+            "expected": "1 accepted application",
+            "actual": f"{accepted} accepted",
+            "reason": DOUBLE_APPLICATION_XFAIL,
+            "response": str([r.status_code for r in statuses])
+        })
+        return False
+
+    async def run(self, virtual_users=1):
+        limits = httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency)
+        async with httpx.AsyncClient(limits=limits, timeout=self.timeout) as client:
+            self.client = client
+            self.admin_token, _ = await self.register("Test Admin", role="admin")
+            
+            slots = asyncio.Semaphore(self.concurrency)
+            async def bounded(coro):
+                async with slots:
+                    return await coro
+            
+            card_ids = await asyncio.gather(
+                *(bounded(self.user_flow(vu)) for vu in range(virtual_users)),
+                bounded(self.run_test("Unauthorized Access Test", "GET", "auth/me", 401)),
+                bounded(self.test_double_application_race()),
+                bounded(self.run_test("Admin Get All Cards", "GET", "admin/cards", 200, token=self.admin_token)),
+                bounded(self.run_test("Admin Get All Users", "GET", "admin/users", 200, token=self.admin_token))
+            )
+            card_ids = [card_id for card_id in card_ids[:virtual_users] if card_id]
+            
+            await asyncio.gather(*(bounded(self.run_test(
+                "Admin Approve Card", "PUT", f"admin/cards/{card_id}/approve", 200,
+                token=self.admin_token, label="admin/cards/{card_id}/approve"
+            )) for card_id in card_ids))
+
+    def report(self):
+        """Machine-readable summary with per-endpoint latency percentiles"""
+        endpoints = {}
+        for label, samples in sorted(self.timings.items()):
+            latencies = sorted(seconds for seconds, _ in samples)
+            def pct(fraction):
+                return round(latencies[min(len(latencies) - 1, int(round(fraction * (len(latencies) - 1))))] * 1000, 2)
+            endpoints[label] = {
+                "calls": len(samples),
+                "passed": sum(1 for _, passed in samples if passed),
+                "mean_ms": round(sum(latencies) / len(latencies) * 1000, 2),
+                "p50_ms": pct(0.50),
+                "p95_ms": pct(0.95),
+                "p99_ms": pct(0.99),
+                "max_ms": round(latencies[-1] * 1000, 2)
+            }
+        return {
+            "base_url": self.base_url,
+            "generated_at": datetime.now().isoformat(),
+            "tests_run": self.tests_run,
+            "tests_passed": self.tests_passed,
+            "failed_tests": self.failed_tests,
+            "expected_failures": self.expected_failures,
+            "endpoints": endpoints
+        }
+
+def run_async(args):
+    print(f"🚀 Starting E-Ration Portal API Tests (async, {args.virtual_users} virtual users)")
+    print("=" * 50)
+    
+    tester = AsyncERationAPITester(base_url=args.base_url, concurrency=args.concurrency)
+    start = time.perf_counter()
+    asyncio.run(tester.run(args.virtual_users))
+    report = tester.report()
+    report["wall_seconds"] = round(time.perf_counter() - start, 3)
+    
+    print(f"Tests Run: {report['tests_run']}")
+    print(f"Tests Passed: {report['tests_passed']}")
+    print(f"Tests Failed: {len(report['failed_tests'])}")
+    print(f"Wall Time: {report['wall_seconds']}s")
+    for label, timing in report["endpoints"].items():
+        print(f"  {label:<45} {timing['calls']:>5} calls  p50 {timing['p50_ms']:>8}ms  p95 {timing['p95_ms']:>8}ms")
+    for i, failure in enumerate(report["failed_tests"], 1):
+        print(f"{i}. {failure['test']}: {failure.get('actual', failure.get('error'))}")
+    for failure in report["expected_failures"]:
+        print(f"Expected failure - {failure['test']}: {failure['actual']} ({failure['reason']})")
+    
+    if args.report:
+        with open(args.report, "w") as handle:
+            json.dump(report, handle, indent=2)
+        print(f"\n📄 Report written to {args.report}")
+    
+    return 0 if not report["failed_tests"] else 1
+
+def main(base_url="https://rationportal-1.preview.emergentagent.com/api"):
     print("🚀 Starting E-Ration Portal API Tests")
     print("=" * 50)
     
-    tester = ERationAPITester()
+    tester = ERationAPITester(base_url)
     
     # Test sequence
     test_sequence = [
@@ -447,4 +675,11 @@ def main():
     return 0 if len(tester.failed_tests) == 0 else 1
 
 if __name__ == "__main__":
-    sys.exit(main())
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="E-Ration Portal API tests")
+    parser.add_argument("--async", dest="run_async", action="store_true", help="run independent tests concurrently")
+    parser.add_argument("--virtual-users", type=int, default=1, help="users walking the full flow in async mode")
+    parser.add_argument("--concurrency", type=int, default=20, help="max in-flight requests in async mode")
+    parser.add_argument("--base-url", default="https://rationportal-1.preview.emergentagent.com/api")
+    parser.add_argument("--report", help="write the async JSON report to this file")
+    args = parser.parse_args()
+    sys.exit(run_async(args) if args.run_async else main(args.base_url))
\ No newline at end of file
@@ -13,6 +13,9 @@ import { LogOut, CheckCircle, XCircle, Trash2, Send, Users } from 'lucide-react'
 
 const AdminDashboard = ({ user, onLogout }) => {
   const [cards, setCards] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [totalCards, setTotalCards] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [users, setUsers] = useState([]);
   const [loading, setLoading] = useState(true);
   const [selectedUsers, setSelectedUsers] = useState([]);
@@ -26,13 +29,79 @@ const AdminDashboard = ({ user, onLogout }) => {
     fetchData();
   }, []);
 
+  useEffect(() => {
+    // Apply server-pushed card events instead of re-fetching the list
+    let source = null;
+    let retryTimer = null;
+    let lastEventId = null;
+    let closed = false;
+    const applyEvent = (message) => {
+      if (message.lastEventId) {
+        lastEventId = message.lastEventId;
+      }
+      const event = JSON.parse(message.data);
+      setCards((prev) => {
+        if (event.type === 'deleted') {
+          return prev.filter((card) => card.id !== event.card_id && card._object_id !== event.object_id);
+        }
+        const index = prev.findIndex((card) => card.id === event.card_id);
+        if (index === -1) {
+          return event.type === 'created'
+            ? [{ ...event.fields, _object_id: event.object_id }, ...prev]
+            : prev;
+        }
+        const next = [...prev];
+        next[index] = { ...next[index], ...event.fields };
+        return next;
+      });
+    };
+    const reconnect = () => {
+      if (!closed) {
+        retryTimer = setTimeout(connect, 3000);
+      }
+    };
+    // EventSource cannot send headers, so each connection opens with a short-lived ticket
+    // instead of putting the session token in the URL
+    const connect = async () => {
+      try {
+        const response = await axios.post(`${API}/admin/cards/events/ticket`);
+        if (closed) {
+          return;
+        }
+        const params = new URLSearchParams({ ticket: response.data.ticket });
+        if (lastEventId) {
+          params.set('resume', lastEventId);
+        }
+        source = new EventSource(`${API}/admin/cards/events?${params}`);
+        ['created', 'updated', 'verified', 'deleted'].forEach((type) => source.addEventListener(type, applyEvent));
+        // The ticket has expired by the time the browser would retry, so reconnect with a new one
+        source.onerror = () => {
+          source.close();
+          reconnect();
+        };
+      } catch (error) {
+        reconnect();
+      }
+    };
+    connect();
+    return () => {
+      closed = true;
+      clearTimeout(retryTimer);
+      if (source) {
+        source.close();
+      }
+    };
+  }, []);
+
   const fetchData = async () => {
     try {
       const [cardsRes, usersRes] = await Promise.all([
-        axios.get(`${API}/admin/cards`),
+        axios.get(`${API}/admin/cards`, { params: { include_total: true } }),
         axios.get(`${API}/admin/users`)
       ]);
-      setCards(cardsRes.data);
+      setCards(cardsRes.data.items);
+      setNextCursor(cardsRes.data.next_cursor);
+      setTotalCards(cardsRes.data.total);
       setUsers(usersRes.data);
     } catch (error) {
       toast.error('Failed to fetch data');
@@ -41,11 +110,33 @@ const AdminDashboard = ({ user, onLogout }) => {
     }
   };
 
+  const loadMoreCards = async () => {
+    setLoadingMore(true);
+    try {
+      const response = await axios.get(`${API}/admin/cards`, { params: { cursor: nextCursor } });
+      // Cards pushed over the event stream may already be in the list
+      setCards((prev) => {
+        const known = new Set(prev.map((card) => card.id));
+        return [...prev, ...response.data.items.filter((card) => !known.has(card.id))];
+      });
+      setNextCursor(response.data.next_cursor);
+    } catch (error) {
+      toast.error('Failed to load more cards');
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
+  // Update loaded pages in place so acting on a card does not reset the list to the first page
+  const updateCard = (cardId, fields) => {
+    setCards((prev) => prev.map((card) => (card.id === cardId ? { ...card, ...fields } : card)));
+  };
+
   const handleApprove = async (cardId) => {
     try {
       const response = await axios.put(`${API}/admin/cards/${cardId}/approve`);
       toast.success(`Card approved! Card Number: ${response.data.card_number}`);
-      fetchData();
+      updateCard(cardId, { status: 'approved', card_number: response.data.card_number });
     } catch (error) {
       toast.error('Failed to approve card');
     }
@@ -55,7 +146,7 @@ const AdminDashboard = ({ user, onLogout }) => {
     try {
       await axios.put(`${API}/admin/cards/${cardId}/reject`);
       toast.success('Card rejected');
-      fetchData();
+      updateCard(cardId, { status: 'rejected' });
     } catch (error) {
       toast.error('Failed to reject card');
     }
@@ -66,7 +157,8 @@ const AdminDashboard = ({ user, onLogout }) => {
       try {
         await axios.delete(`${API}/admin/cards/${cardId}`);
         toast.success('Card deleted');
-        fetchData();
+        setCards((prev) => prev.filter((card) => card.id !== cardId));
+        setTotalCards((prev) => (typeof prev === 'number' ? prev - 1 : prev));
       } catch (error) {
         toast.error('Failed to delete card');
       }
@@ -87,11 +179,6 @@ const AdminDashboard = ({ user, onLogout }) => {
       return;
     }
 
-    if (selectedUsers.length > 50) {
-      toast.error('Maximum 50 users can be selected');
-      return;
-    }
-
     try {
       const response = await axios.post(`${API}/admin/distribute-tokens`, {
         user_ids: selectedUsers,
@@ -109,6 +196,7 @@ const AdminDashboard = ({ user, onLogout }) => {
 
   const getStatusBadge = (status) => {
     const variants = {
+      verifying: 'outline',
       pending: 'secondary',
       approved: 'default',
       rejected: 'destructive',
@@ -143,7 +231,10 @@ const AdminDashboard = ({ user, onLogout }) => {
             <Card className="backdrop-blur-xl bg-white/95 shadow-2xl border-0">
               <CardHeader>
                 <CardTitle>All Ration Cards</CardTitle>
-                <CardDescription>Manage ration card applications</CardDescription>
+                <CardDescription>
+                  Manage ration card applications
+                  {typeof totalCards === 'number' && ` (showing ${cards.length} of ${totalCards})`}
+                </CardDescription>
               </CardHeader>
               <CardContent>
                 {loading ? (
@@ -194,6 +285,13 @@ const AdminDashboard = ({ user, onLogout }) => {
                         </div>
                       </div>
                     ))}
+                    {nextCursor && (
+                      <div className="flex justify-center">
+                        <Button variant="outline" onClick={loadMoreCards} disabled={loadingMore} data-testid="load-more-cards-btn">
+                          {loadingMore ? 'Loading...' : 'Load more'}
+                        </Button>
+                      </div>
+                    )}
                   </div>
                 )}
               </CardContent>
@@ -77,7 +77,13 @@ const UserDashboard = ({ user, onLogout }) => {
     setLoading(true);
 
     try {
-      await axios.put(`${API}/ration-cards/update`, formData);
+      // Documents left blank keep the ones already on file
+      const { income_proof, photo, ...fields } = formData;
+      await axios.put(`${API}/ration-cards/update`, {
+        ...fields,
+        ...(income_proof && { income_proof }),
+        ...(photo && { photo })
+      });
       toast.success('Ration card updated successfully!');
       setShowUpdate(false);
       fetchRationCard();
@@ -90,6 +96,7 @@ const UserDashboard = ({ user, onLogout }) => {
 
   const getStatusBadge = (status) => {
     const variants = {
+      verifying: { variant: 'secondary', icon: <Clock className="w-4 h-4" />, text: 'Verifying' },
       pending: { variant: 'secondary', icon: <Clock className="w-4 h-4" />, text: 'Pending' },
       approved: { variant: 'default', icon: <CheckCircle className="w-4 h-4" />, text: 'Approved' },
       rejected: { variant: 'destructive', icon: <XCircle className="w-4 h-4" />, text: 'Rejected' },
@@ -0,0 +1,37 @@
+import os
+import sys
+
+import mongomock
+import mongomock_motor
+import pytest
+
+os.environ.setdefault("MONGO_URL", "mongodb://127.0.0.1:1")
+os.environ.setdefault("DB_NAME", "test_database")
+os.environ.setdefault("EMERGENT_LLM_KEY", "test")
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+import server  # noqa: E402
+
+
+original_find_one_and_update = mongomock.collection.Collection.find_one_and_update
+
+
+def find_one_and_update(self, filter, update, projection=None, **kwargs):
+    """mongomock re-reads the updated document by _id, so it returns None once the projection drops _id"""
+    if projection and projection.get("_id") == 0:
+        rest = {k: v for k, v in projection.items() if k != "_id"} or None
+        document = original_find_one_and_update(self, filter, update, projection=rest, **kwargs)
+        if document is not None:
+            document.pop("_id", None)
+        return document
+    return original_find_one_and_update(self, filter, update, projection=projection, **kwargs)
+
+
+@pytest.fixture
+def db(monkeypatch):
+    """An in-memory database in place of the server's Mongo connection"""
+    database = mongomock_motor.AsyncMongoMockClient()["test_database"]
+    monkeypatch.setattr(server, "db", database)
+    monkeypatch.setattr(mongomock.collection.Collection, "find_one_and_update", find_one_and_update)
+    return database
+
@@ -0,0 +1,39 @@
+import random
+
+import server
+
+
+def test_every_household_is_placed_once_and_loads_add_up():
+    households = [(f"card-{i}", size) for i, size in enumerate([5, 3, 3, 2, 2, 1, 1, 1])]
+    assigned, unassigned, loads = server.assign_slots(households, 3, 10)
+    assert unassigned == []
+    assert sorted(household for household, _ in assigned) == sorted(households)
+    for slot in range(3):
+        assert loads[slot] == sum(size for (_, size), s in assigned if s == slot)
+    assert sum(loads) == 18 and max(loads) <= 10
+
+
+def test_loads_stay_flat():
+    rng = random.Random(7)
+    households = [(f"card-{i}", rng.randint(1, 8)) for i in range(300)]
+    _, unassigned, loads = server.assign_slots(households, 12, 1000)
+    # Longest-first greedy leaves slots at most one household apart
+    assert unassigned == [] and max(loads) - min(loads) <= 8
+
+
+def test_households_too_large_for_any_slot_are_unassigned():
+    households = [("big", 9), ("a", 4), ("b", 4), ("c", 3)]
+    assigned, unassigned, loads = server.assign_slots(households, 2, 8)
+    assert unassigned == [("big", 9)]
+    assert sorted(loads) == [4, 7]
+
+
+def test_capacity_exhaustion_keeps_the_rest_unassigned():
+    households = [(f"card-{i}", 2) for i in range(5)]
+    assigned, unassigned, loads = server.assign_slots(households, 2, 4)
+    assert len(assigned) == 4 and len(unassigned) == 1 and loads == [4, 4]
+
+
+def test_largest_household_goes_first_to_the_least_loaded_slot():
+    assigned, _, _ = server.assign_slots([("small", 1), ("large", 6), ("medium", 3)], 2, 10)
+    assert assigned == [(("large", 6), 0), (("medium", 3), 1), (("small", 1), 1)]
@@ -0,0 +1,73 @@
+import asyncio
+from typing import Optional
+
+import pytest
+from fastapi import FastAPI, Header, HTTPException
+from fastapi.testclient import TestClient
+
+import server
+
+DATA = bytes(range(256)) * 4  # 1024 bytes, every offset distinguishable by position
+
+
+@pytest.fixture
+def blobs(monkeypatch, tmp_path):
+    # Small chunks so ranges start and end mid-chunk and span several
+    monkeypatch.setattr(server, "BLOB_CHUNK_SIZE", 100)
+    service = server.BlobService(server.LocalBlobStore(tmp_path))
+    ref = asyncio.run(service.put(DATA, "application/pdf"))
+    return service, ref
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("bytes=0-99", (0, 99)),
+    ("bytes=150-", (150, 1023)),
+    ("bytes=-24", (1000, 1023)),
+    ("bytes=-5000", (0, 1023)),
+    ("bytes=1000-9999", (1000, 1023)),
+    ("bytes=5-9, 20-29", (5, 9)),
+    (None, None),
+    ("items=0-9", None),
+    ("bytes=a-b", None),
+])
+def test_parse_byte_range(header, expected):
+    assert server.parse_byte_range(header, 1024) == expected
+
+
+@pytest.mark.parametrize("header", ["bytes=1024-", "bytes=20-10"])
+def test_unsatisfiable_range(header):
+    with pytest.raises(HTTPException) as error:
+        server.parse_byte_range(header, 1024)
+    assert error.value.status_code == 416 and error.value.headers["Content-Range"] == "bytes */1024"
+
+
+@pytest.mark.parametrize("start, end", [(0, 1023), (0, 0), (99, 100), (150, 849), (1023, 1023)])
+def test_store_streams_exact_ranges(blobs, start, end):
+    service, ref = blobs
+
+    async def read():
+        return [chunk async for chunk in service.store.stream(ref['blob_id'], start, end)]
+
+    chunks = asyncio.run(read())
+    assert b"".join(chunks) == DATA[start:end + 1]
+    assert all(len(chunk) <= 100 for chunk in chunks)
+
+
+def test_response_serves_partial_content(blobs):
+    service, ref = blobs
+    app = FastAPI()
+
+    @app.get("/doc")
+    async def doc(range: Optional[str] = Header(None)):
+        return service.response(ref, range)
+
+    client = TestClient(app)
+    full = client.get("/doc")
+    assert full.status_code == 200 and full.content == DATA and full.headers["accept-ranges"] == "bytes"
+
+    partial = client.get("/doc", headers={"Range": "bytes=250-349"})
+    assert partial.status_code == 206 and partial.content == DATA[250:350]
+    assert partial.headers["content-range"] == "bytes 250-349/1024"
+    assert partial.headers["content-length"] == "100"
+
+    assert client.get("/doc", headers={"Range": "bytes=2000-"}).status_code == 416
@@ -0,0 +1,56 @@
+import asyncio
+import base64
+import json
+
+import pytest
+from fastapi import HTTPException
+
+import server
+
+
+def test_cursor_round_trips():
+    card = {"created_at": "2026-03-01T10:00:00.123456+00:00", "id": "5b0c-ü", "name": "ignored"}
+    cursor = server.encode_cursor(card)
+    assert cursor.isascii() and "/" not in cursor and "+" not in cursor
+    assert server.decode_cursor(cursor) == (card['created_at'], card['id'])
+
+
+@pytest.mark.parametrize("cursor", [
+    "not base64!",
+    base64.urlsafe_b64encode(b"not json").decode(),
+    base64.urlsafe_b64encode(b'["only one"]').decode(),
+    base64.urlsafe_b64encode(b'{"a": 1, "b": 2, "c": 3}').decode(),
+    "ü",
+])
+def test_malformed_cursor_is_a_bad_request(cursor):
+    with pytest.raises(HTTPException) as error:
+        server.decode_cursor(cursor)
+    assert error.value.status_code == 400
+
+
+def test_pages_cover_every_card_once_across_created_at_ties(db):
+    cards = [
+        {"id": f"card-{i:02d}", "status": "pending" if i % 3 else "approved", "created_at": f"2026-01-0{1 + i // 4}"}
+        for i in range(20)
+    ]
+
+    async def run(**filters):
+        await db.ration_cards.delete_many({})
+        await db.ration_cards.insert_many([dict(card) for card in cards])
+        seen = []
+        cursor = None
+        while True:
+            response = await server.get_all_cards(limit=3, cursor=cursor, fields="id,created_at", admin=None, **filters)
+            page = json.loads(response.body)
+            seen += [card['id'] for card in page['items']]
+            cursor = page['next_cursor']
+            if cursor is None:
+                return seen
+
+    def newest_first(selected):
+        return [c['id'] for c in sorted(selected, key=lambda c: (c['created_at'], c['id']), reverse=True)]
+
+    everything = asyncio.run(run(status=None, created_from=None, created_to=None, card_number=None))
+    assert everything == newest_first(cards)
+    pending = asyncio.run(run(status="pending", created_from=None, created_to=None, card_number=None))
+    assert pending == newest_first([c for c in cards if c['status'] == "pending"])
@@ -0,0 +1,81 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+import server
+from verhoeff import verhoeff_check_digit, verhoeff_valid
+
+
+def test_verhoeff_known_values():
+    assert verhoeff_check_digit("236") == "3"
+    assert verhoeff_check_digit("12345") == "1"
+    assert verhoeff_valid("2363") and verhoeff_valid("499118665246")
+
+
+def test_verhoeff_catches_single_digit_errors_and_adjacent_swaps():
+    number = "49911866524"
+    valid = number + verhoeff_check_digit(number)
+    for i in range(len(valid)):
+        for digit in "0123456789":
+            if digit != valid[i]:
+                assert not verhoeff_valid(valid[:i] + digit + valid[i + 1:])
+    for i in range(len(valid) - 1):
+        if valid[i] != valid[i + 1]:
+            assert not verhoeff_valid(valid[:i] + valid[i + 1] + valid[i] + valid[i + 2:])
+
+
+def test_numbers_are_sequential_within_a_block(db):
+    allocator = server.CardNumberAllocator("RC", block_size=10)
+    numbers = asyncio.run(allocator.allocate(3, "27"))
+    assert numbers == [allocator.format("27", seq) for seq in (1, 2, 3)]
+    assert numbers[0].startswith("RC2700000001") and verhoeff_valid(numbers[0][2:])
+    assert allocator.leases == 1
+
+
+def test_blocks_are_leased_only_when_exhausted(db):
+    allocator = server.CardNumberAllocator("RC", block_size=4)
+
+    async def run():
+        numbers = []
+        for _ in range(9):
+            numbers += await allocator.allocate(1, "27")
+        return numbers
+
+    numbers = asyncio.run(run())
+    assert numbers == [allocator.format("27", seq) for seq in range(1, 10)]
+    assert allocator.leases == 3
+
+
+def test_large_request_leases_one_block_big_enough(db):
+    allocator = server.CardNumberAllocator("RC", block_size=4)
+    numbers = asyncio.run(allocator.allocate(10, "27"))
+    assert len(set(numbers)) == 10 and allocator.leases == 1
+
+
+def test_processes_sharing_a_counter_never_collide(db):
+    processes = [server.CardNumberAllocator("RC", block_size=5) for _ in range(3)]
+
+    async def run():
+        batches = await asyncio.gather(*(p.allocate(1, "27") for p in processes for _ in range(7)))
+        return [number for batch in batches for number in batch]
+
+    numbers = asyncio.run(run())
+    assert len(numbers) == len(set(numbers)) == 21
+
+
+def test_regions_have_their_own_sequences(db):
+    allocator = server.CardNumberAllocator("RC", block_size=10)
+
+    async def run():
+        return await allocator.allocate(1, "27"), await allocator.allocate(1, "29")
+
+    first, second = asyncio.run(run())
+    assert first == [allocator.format("27", 1)] and second == [allocator.format("29", 1)]
+
+
+def test_region_must_be_digits(db):
+    allocator = server.CardNumberAllocator("RC", block_size=10)
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(allocator.allocate(1, "MH"))
+    assert error.value.status_code == 400
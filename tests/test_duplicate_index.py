@@ -0,0 +1,115 @@
+import asyncio
+
+import server
+
+
+def card(index, **overrides):
+    values = {
+        "id": f"card-{index}",
+        "user_id": f"user-{index}",
+        "name": "Ravi Kumar",
+        "address": f"{index}, Market Road, Ward 12, Pune 411001",
+        "aadhaar": f"{100000000000 + index}",
+        "photo_hash": None,
+    }
+    values.update(overrides)
+    return values
+
+
+def flip_bits(photo_hash, *bits):
+    value = int(photo_hash, 16)
+    for bit in bits:
+        value ^= 1 << bit
+    return f"{value:016x}"
+
+
+def test_near_duplicates_share_a_band():
+    index = server.DuplicateIndex(0.7, 3, 200)
+    original = index.fingerprint(card(1, address="14, Market Road, Ward 12, Pune 411001"))
+    variant = index.fingerprint(card(2, name="RAVI KUMAR", address="14 Market Rd Ward 12 Pune 411001"))
+    assert set(original['text_bands']) & set(variant['text_bands'])
+
+
+def test_shared_street_alone_does_not_share_a_band():
+    index = server.DuplicateIndex(0.7, 3, 200)
+    original = index.fingerprint(card(1, name="Ravi Kumar"))
+    neighbour = index.fingerprint(card(1, name="Meera Iyer"))
+    assert not set(original['text_bands']) & set(neighbour['text_bands'])
+
+
+def test_photo_bands_cover_the_allowed_distance():
+    photo_hash = "f0e1d2c3b4a59687"
+    # Worst case: one flipped bit in each band but one
+    width = server.PHOTO_HASH_BITS // server.PHOTO_HASH_BANDS
+    flipped = flip_bits(photo_hash, *(band * width for band in range(server.PHOTO_HASH_BANDS - 1)))
+    assert set(server.photo_hash_bands(photo_hash)) & set(server.photo_hash_bands(flipped))
+    everywhere = flip_bits(photo_hash, *(band * width for band in range(server.PHOTO_HASH_BANDS)))
+    assert not set(server.photo_hash_bands(photo_hash)) & set(server.photo_hash_bands(everywhere))
+
+
+def test_exact_aadhaar_found_past_candidate_limit(db):
+    index = server.DuplicateIndex(0.7, 3, candidate_limit=5)
+
+    async def run():
+        # Neighbours on the same street fill the fuzzy candidate cap
+        for i in range(30):
+            await index.index(card(i, address="7, Market Road, Ward 12, Pune 411001"))
+        await index.index(card(500, name="Meera Iyer", address="Lake View, Ward 3, Nagpur 440001", aadhaar="9999 8888 7777"))
+        return await index.index(card(501, address="7, Market Road, Ward 12, Pune 411001", aadhaar="999988887777"))
+
+    matches = asyncio.run(run())
+    reasons = {match['card_id']: match['reasons'] for match in matches}
+    assert "aadhaar" in reasons["card-500"]
+
+
+def test_name_address_and_photo_matches(db):
+    index = server.DuplicateIndex(0.7, 3, 200)
+    photo_hash = "0123456789abcdef"
+
+    async def run():
+        await index.index(card(1, address="14, Market Road, Ward 12, Pune 411001"))
+        await index.index(card(2, name="Meera Iyer", address="Lake View, Nagpur 440001", photo_hash=photo_hash))
+        await index.index(card(3, name="Arjun Das", address="Fort Area, Kochi 682001", photo_hash=flip_bits(photo_hash, 0, 63)))
+        return await index.index(card(
+            4, name="RAVI KUMAR", address="14 Market Rd Ward 12 Pune 411001", photo_hash=flip_bits(photo_hash, 5, 40)
+        ))
+
+    matches = {match['card_id']: match for match in asyncio.run(run())}
+    assert matches["card-1"]['reasons'] == ["name_address"]
+    assert matches["card-2"]['reasons'] == ["photo"] and matches["card-2"]['photo_distance'] == 2
+    assert "card-3" not in matches
+
+
+def test_backfill_runs_once_per_layout(db, monkeypatch):
+    index = server.DuplicateIndex(0.7, 3, 200)
+
+    async def run():
+        await db.ration_cards.insert_many([{**card(i), "created_at": f"2026-01-0{i + 1}"} for i in range(3)])
+        await index.backfill()
+        first = index.indexed
+        await db.ration_cards.insert_one({**card(9), "created_at": "2026-01-09"})
+        await index.backfill()
+        unchanged = index.indexed
+        monkeypatch.setattr(server, "FINGERPRINT_VERSION", "next")
+        await index.backfill()
+        return first, unchanged, index.indexed
+
+    assert asyncio.run(run()) == (3, 3, 7)
+
+
+def test_check_fails_reused_aadhaar_until_the_other_card_is_rejected(db):
+    index = server.DuplicateIndex(0.7, 3, 200)
+    first = {**card(1, aadhaar="999988887777"), "status": "pending"}
+    second = card(2, name="Meera Iyer", address="Lake View, Ward 3, Nagpur 440001", aadhaar="999988887777")
+
+    async def run():
+        await db.ration_cards.insert_one(dict(first))
+        await index.index(first)
+        await index.index(second)
+        before = await index.check(second)
+        await db.ration_cards.update_one({"id": "card-1"}, {"$set": {"status": "rejected"}})
+        return before, await index.check(second)
+
+    before, after = asyncio.run(run())
+    assert before[0] == ("fail", "Aadhaar is already registered on another card")
+    assert after[0][0] == "pass"
@@ -0,0 +1,136 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+import server
+
+
+async def stream(chunks):
+    for chunk in chunks:
+        yield chunk
+
+
+def parse(body, import_format, chunk_size=7):
+    data = body if isinstance(body, bytes) else body.encode("utf-8")
+    chunks = [data[i:i + chunk_size] for i in range(0, len(data), chunk_size)]
+
+    async def run():
+        return [r async for r in server.import_records(server.import_lines(stream(chunks)), import_format)]
+
+    return asyncio.run(run())
+
+
+def test_lines_survive_split_multibyte_characters_and_crlf():
+    async def run():
+        return [line async for line in server.import_lines(stream([b"na\xc3", b"\xafve\r\nsecond\r", b"\nlast"]))]
+
+    assert asyncio.run(run()) == ["naïve", "second", "last"]
+
+
+def test_invalid_utf8_line_is_not_replaced():
+    async def run():
+        return [line async for line in server.import_lines(stream([b"ok\n", b"bad \xff\n", b"fine"]))]
+
+    assert asyncio.run(run()) == ["ok", None, "fine"]
+
+
+def test_ndjson_rows():
+    body = '{"name": "A"}\n\n[1, 2]\n{bad\n{"name": "B"}'
+    results = parse(body, "ndjson")
+    assert results[0] == (1, {"name": "A"}, None)
+    assert results[1] == (2, None, "Row must be a JSON object")
+    assert results[2][0] == 3 and results[2][2].startswith("Invalid JSON")
+    assert results[3] == (4, {"name": "B"}, None)
+
+
+def test_csv_quoted_field_spans_lines():
+    body = 'name,address,family_members\nA,"12 Market Road\nWard 4",3\nB,Lake View,2\n'
+    assert parse(body, "csv") == [
+        (1, {"name": "A", "address": "12 Market Road\nWard 4", "family_members": "3"}, None),
+        (2, {"name": "B", "address": "Lake View", "family_members": "2"}, None),
+    ]
+
+
+def test_csv_stray_quote_does_not_swallow_later_rows():
+    body = 'name,address,family_members\nC,5" Road,2\nD,Fort Area,4\n'
+    assert parse(body, "csv") == [
+        (1, {"name": "C", "address": '5" Road', "family_members": "2"}, None),
+        (2, {"name": "D", "address": "Fort Area", "family_members": "4"}, None),
+    ]
+
+
+def test_csv_unterminated_quote_fails_only_its_row():
+    body = 'name,address,family_members\nE,"Mill Lane,1\nF,Canal Bank,5'
+    assert parse(body, "csv") == [
+        (1, None, "Unterminated quoted field"),
+        (2, {"name": "F", "address": "Canal Bank", "family_members": "5"}, None),
+    ]
+
+
+def test_csv_unterminated_quote_gives_up_after_max_lines(monkeypatch):
+    monkeypatch.setattr(server, "IMPORT_MAX_RECORD_LINES", 3)
+    body = 'name,address\nE,"Mill Lane\nF,x\nG,y\nH,z\n'
+    results = parse(body, "csv")
+    assert results[0] == (1, None, "Unterminated quoted field")
+    assert results[1:] == [
+        (2, {"name": "F", "address": "x"}, None),
+        (3, {"name": "G", "address": "y"}, None),
+        (4, {"name": "H", "address": "z"}, None),
+    ]
+
+
+def test_csv_malformed_and_short_rows():
+    body = 'name,address\nA,"x"y\nB\n\nC,z\n'
+    results = parse(body, "csv")
+    assert results[0][0] == 1 and results[0][2].startswith("Malformed CSV")
+    assert results[1] == (2, None, "Expected 2 columns, got 1")
+    assert results[2] == (3, {"name": "C", "address": "z"}, None)
+
+
+def test_csv_malformed_header_is_rejected():
+    with pytest.raises(HTTPException) as error:
+        parse('name,"address\n', "csv")
+    assert error.value.status_code == 400
+
+
+def test_invalid_utf8_rows_are_reported():
+    assert parse(b'{"name": "A"}\n{"name": "\xff"}\n{"name": "B"}', "ndjson") == [
+        (1, {"name": "A"}, None),
+        (2, None, "Row is not valid UTF-8"),
+        (3, {"name": "B"}, None),
+    ]
+    body = b'name,address\nA,"open\nB,\xe9\nC,z\n'
+    assert parse(body, "csv") == [
+        (1, None, "Unterminated quoted field"),
+        (2, None, "Row is not valid UTF-8"),
+        (3, {"name": "C", "address": "z"}, None),
+    ]
+
+
+def test_import_job_resumes_after_settled_rows(db, monkeypatch, tmp_path):
+    monkeypatch.setattr(server.blob_service, "store", server.LocalBlobStore(tmp_path))
+    admin = server.User(id="admin-1", email="admin@example.com", name="Admin", phone="1", role="admin")
+
+    async def run():
+        await db.users.insert_one(admin.model_dump())
+        body = await server.blob_service.put_stream(stream([b'[1]\n{bad\n"x"\n']), "application/x-ndjson", 1000)
+        job = await server.import_queue.enqueue(admin, "ndjson", 2, body)
+        # As if a worker settled the first row and then died
+        job['rows'] = 1
+        await server.import_queue._process(job)
+        return (
+            await db.import_jobs.find_one({"id": job['id']}, {"_id": 0}),
+            await db.import_rows.find({}, {"_id": 0, "row": 1}).to_list(None),
+        )
+
+    job, rows = asyncio.run(run())
+    assert job['status'] == "done" and job['rows'] == 3 and job['summary'] == {"invalid": 2}
+    assert sorted(r['row'] for r in rows) == [2, 3]
+
+
+def test_oversized_import_body_is_rejected(monkeypatch, tmp_path):
+    monkeypatch.setattr(server.blob_service, "store", server.LocalBlobStore(tmp_path))
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(server.blob_service.put_stream(stream([b"x" * 600, b"x" * 600]), "text/csv", 1000))
+    assert error.value.status_code == 413
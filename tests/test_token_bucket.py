@@ -0,0 +1,72 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import server
+
+
+class FakeClock:
+    """monotonic() and asyncio.sleep() on virtual time, so rate tests run instantly"""
+
+    def __init__(self, monkeypatch):
+        self.now = 0.0
+        # Only the server's module references are swapped; the event loop keeps the real clock
+        monkeypatch.setattr(server, "time", SimpleNamespace(**{**vars(time), "monotonic": lambda: self.now}))
+        monkeypatch.setattr(server, "asyncio", SimpleNamespace(**{**vars(asyncio), "sleep": self.sleep}))
+
+    async def sleep(self, seconds):
+        self.now += seconds
+        await asyncio.sleep(0)
+
+
+def test_burst_is_free_then_tokens_arrive_at_the_rate(monkeypatch):
+    clock = FakeClock(monkeypatch)
+    bucket = server.TokenBucket(rate=5, capacity=3)
+
+    async def run():
+        times = []
+        for _ in range(6):
+            await bucket.acquire()
+            times.append(clock.now)
+        return times
+
+    assert asyncio.run(run()) == pytest.approx([0, 0, 0, 0.2, 0.4, 0.6])
+
+
+def test_idle_time_refills_only_up_to_capacity(monkeypatch):
+    clock = FakeClock(monkeypatch)
+    bucket = server.TokenBucket(rate=10, capacity=2)
+
+    async def run():
+        for _ in range(2):
+            await bucket.acquire()
+        clock.now += 60
+        start = clock.now
+        for _ in range(3):
+            await bucket.acquire()
+        return clock.now - start
+
+    assert asyncio.run(run()) == pytest.approx(0.1)
+
+
+def test_concurrent_waiters_share_the_rate(monkeypatch):
+    clock = FakeClock(monkeypatch)
+    bucket = server.TokenBucket(rate=4, capacity=1)
+    served = []
+
+    async def waiter(index):
+        await bucket.acquire()
+        served.append((index, clock.now))
+
+    async def run():
+        await asyncio.gather(*(waiter(i) for i in range(5)))
+
+    asyncio.run(run())
+    assert [index for index, _ in served] == [0, 1, 2, 3, 4]
+    assert [at for _, at in served] == pytest.approx([0, 0.25, 0.5, 0.75, 1.0])
+
+
+def test_capacity_is_at_least_one():
+    assert server.TokenBucket(rate=1, capacity=0).capacity == 1
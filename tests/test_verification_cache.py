@@ -0,0 +1,83 @@
+import asyncio
+
+import server
+
+CARD = {"name": "Ravi Kumar", "address": "14, Market Road, Pune 411001", "family_members": 4, "aadhaar": "999988887777"}
+
+
+def fake_llm(monkeypatch, results):
+    """Stand in for the LLM call; each call waits on a gate so callers can pile up"""
+    calls = []
+    gate = asyncio.Event()
+
+    async def verify(card_data):
+        calls.append(card_data)
+        await gate.wait()
+        return results[len(calls) - 1]
+
+    monkeypatch.setattr(server, "verify_ration_card_with_ai", verify)
+    return calls, gate
+
+
+def test_concurrent_identical_cards_share_one_llm_call(db, monkeypatch):
+    calls, gate = fake_llm(monkeypatch, [{"result": "genuine", "details": "GENUINE: ok"}])
+    cache = server.VerificationCache(100, 3600)
+
+    async def run():
+        # Whitespace and case differences hash to the same key
+        variants = [CARD, {**CARD, "name": "RAVI  KUMAR"}, {**CARD, "id": "another-card"}]
+        pending = asyncio.gather(*(cache.verify(card) for card in variants))
+        await asyncio.sleep(0)
+        gate.set()
+        return await pending
+
+    results = asyncio.run(run())
+    assert len(calls) == 1 and cache.llm_calls == 1 and cache.coalesced == 2
+    assert all(result == {"result": "genuine", "details": "GENUINE: ok"} for result in results)
+    assert cache._in_flight == {}
+
+
+def test_cancelled_caller_does_not_cancel_the_shared_call(db, monkeypatch):
+    calls, gate = fake_llm(monkeypatch, [{"result": "fake", "details": "FAKE: mismatch"}])
+    cache = server.VerificationCache(100, 3600)
+
+    async def run():
+        first = asyncio.ensure_future(cache.verify(CARD))
+        second = asyncio.ensure_future(cache.verify(CARD))
+        await asyncio.sleep(0)
+        first.cancel()
+        gate.set()
+        return await second, first.cancelled()
+
+    result, cancelled = asyncio.run(run())
+    assert cancelled and result['result'] == "fake" and len(calls) == 1
+
+
+def test_errors_are_shared_but_not_cached(db, monkeypatch):
+    calls, gate = fake_llm(monkeypatch, [
+        {"result": "error", "details": "timeout"},
+        {"result": "genuine", "details": "GENUINE: ok"},
+    ])
+    gate.set()
+    cache = server.VerificationCache(100, 3600)
+
+    async def run():
+        first = await asyncio.gather(cache.verify(CARD), cache.verify(CARD))
+        return first, await cache.verify(CARD), await db.verification_cache.count_documents({})
+
+    first, retried, stored = asyncio.run(run())
+    assert [r['result'] for r in first] == ["error", "error"]
+    assert retried['result'] == "genuine" and len(calls) == 2 and stored == 1
+
+
+def test_stored_verdict_is_reused_by_a_fresh_process(db, monkeypatch):
+    calls, gate = fake_llm(monkeypatch, [{"result": "genuine", "details": "GENUINE: ok"}])
+    gate.set()
+
+    async def run():
+        await server.VerificationCache(100, 3600).verify(CARD)
+        restarted = server.VerificationCache(100, 3600)
+        return await restarted.verify(CARD), restarted
+
+    result, restarted = asyncio.run(run())
+    assert result['result'] == "genuine" and len(calls) == 1 and restarted.store_hits == 1
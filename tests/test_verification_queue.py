@@ -0,0 +1,79 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import server
+
+
+@pytest.fixture
+def queue(db):
+    return server.VerificationQueue(workers=1, max_attempts=3, backoff_seconds=10, lease_seconds=60, poll_seconds=0.01)
+
+
+def ago(seconds):
+    return (datetime.now(timezone.utc) - timedelta(seconds=seconds)).isoformat()
+
+
+def test_claim_leases_a_job_until_the_lease_expires(db, queue):
+    async def run():
+        await queue.enqueue({"id": "card-1", "verification_job_id": "job-1"})
+        first = await queue._claim()
+        while_leased = await queue._claim()
+        await db.verification_jobs.update_one({"id": "job-1"}, {"$set": {"lease_expires_at": ago(1)}})
+        return first, while_leased, await queue._claim()
+
+    first, while_leased, reclaimed = asyncio.run(run())
+    assert first['status'] == "running" and first['attempts'] == 1
+    assert first['lease_expires_at'] > datetime.now(timezone.utc).isoformat()
+    assert while_leased is None
+    assert reclaimed['id'] == "job-1" and reclaimed['attempts'] == 2
+
+
+def test_failed_attempts_back_off_exponentially(db, queue):
+    async def run():
+        await queue.enqueue({"id": "card-1", "verification_job_id": "job-1"})
+        delays = []
+        for _ in range(2):
+            job = await queue._claim()
+            before = datetime.now(timezone.utc)
+            await queue._retry_or_fail(job, "card-1", "LLM unavailable")
+            stored = await db.verification_jobs.find_one({"id": "job-1"})
+            delays.append((datetime.fromisoformat(stored['next_run_at']) - before).total_seconds())
+            # Not claimable before its backoff has passed
+            assert await queue._claim() is None
+            await db.verification_jobs.update_one({"id": "job-1"}, {"$set": {"next_run_at": ago(1)}})
+        return delays, stored
+
+    delays, stored = asyncio.run(run())
+    assert delays[0] == pytest.approx(10, abs=1) and delays[1] == pytest.approx(20, abs=1)
+    assert stored['status'] == "queued" and stored['last_error'] == "LLM unavailable"
+    assert queue.retried == 2
+
+
+def test_last_attempt_fails_the_job_and_leaves_the_card_for_review(db, queue):
+    async def run():
+        await db.ration_cards.insert_one({"id": "card-1", "status": "verifying", "verification_job_id": "job-1"})
+        await queue.enqueue({"id": "card-1", "verification_job_id": "job-1"})
+        await db.verification_jobs.update_one({"id": "job-1"}, {"$set": {"attempts": 2}})
+        job = await queue._claim()
+        await queue._retry_or_fail(job, "card-1", "LLM unavailable")
+        return (
+            await db.verification_jobs.find_one({"id": "job-1"}, {"_id": 0}),
+            await db.ration_cards.find_one({"id": "card-1"}, {"_id": 0}),
+        )
+
+    job, card = asyncio.run(run())
+    assert job['status'] == "failed" and job['attempts'] == 3 and job['lease_expires_at'] is None
+    assert card['status'] == "pending" and card['ai_verification_result'] == "LLM unavailable"
+    assert queue.failed == 1
+
+
+def test_newer_job_cancels_the_queued_one(db, queue):
+    async def run():
+        await queue.enqueue({"id": "card-1", "verification_job_id": "job-1"})
+        await queue.enqueue({"id": "card-1", "verification_job_id": "job-2"})
+        return await db.verification_jobs.find_one({"id": "job-1"}, {"_id": 0})
+
+    job = asyncio.run(run())
+    assert job['status'] == "cancelled" and job['last_error'] == "Superseded by a newer job"